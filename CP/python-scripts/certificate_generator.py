@@ -32,7 +32,10 @@ import tkinter as tk
 from tkinter import messagebox
 import io
 import base64
+from functools import lru_cache
+from cryptography.hazmat.primitives import serialization
 from hardware_info import get_device_type, get_device_id
+from generate_keys import algorithm_for_key, key_id
 
 
 # HARDCODED PRIVATE KEY - Generated by generate_keys.py
@@ -146,9 +149,25 @@ def create_certificate_payload():
     return payload
 
 
+@lru_cache(maxsize=1)
+def get_signing_key():
+    """
+    Parse the embedded private key once and reuse it for every signature.
+    
+    Returns:
+        tuple: (private_key, algorithm, kid) where the algorithm is inferred
+        from the key type (RSA -> RS256, P-256 -> ES256, Ed25519 -> EdDSA)
+        
+    Raises:
+        ValueError: For unsupported key types and EC curves other than P-256
+    """
+    private_key = serialization.load_pem_private_key(PRIVATE_KEY.encode('utf-8'), password=None)
+    return private_key, algorithm_for_key(private_key), key_id(private_key.public_key())
+
+
 def sign_certificate(payload):
     """
-    Sign the certificate payload using RS256 algorithm.
+    Sign the certificate payload with the embedded key (RS256, ES256 or EdDSA).
     
     Args:
         payload (dict): Certificate data to sign
@@ -160,11 +179,13 @@ def sign_certificate(payload):
         Exception: If signing fails
     """
     try:
-        # Sign the payload using RS256 algorithm
+        # Sign the payload, naming the key in the header for verifiers
+        private_key, algorithm, kid = get_signing_key()
         token = jwt.encode(
             payload=payload,
-            key=PRIVATE_KEY,
-            algorithm='RS256'
+            key=private_key,
+            algorithm=algorithm,
+            headers={'kid': kid}
         )
         
         return token
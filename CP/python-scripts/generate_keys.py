@@ -1,23 +1,30 @@
 #!/usr/bin/env python3
 """
-RS256 Key Pair Generator for Secure Certificate System
+Signing Key Pair Generator for Secure Certificate System
 
-This utility generates an RS256 private/public key pair for use in the
-offline certificate system. The private key is used by the certificate
-generator, and the public key is embedded in the mobile verifier app.
+This utility generates a private/public key pair for use in the offline
+certificate system. The private key is used by the certificate generator,
+and the public key is embedded in the mobile verifier app.
+
+Supported algorithms:
+    - RS256: RSA 2048-bit (default, supported by the mobile app)
+    - ES256: ECDSA P-256 (64-byte signatures)
+    - EdDSA: Ed25519 (64-byte signatures, fastest signing)
 
 Usage:
-    python generate_keys.py
+    python generate_keys.py [--alg RS256|ES256|EdDSA]
 
 Output:
     - output/private_key.pem: Private key for signing certificates
     - output/public_key.pem: Public key for verifying certificates
-    - Console output: Key strings for embedding in code
+    - Console output: Key strings and key ID (kid) for embedding in code
 """
 
 import os
-from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric import rsa
+import argparse
+import base64
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
 
 
 def generate_rsa_key_pair():
@@ -39,13 +46,90 @@ def generate_rsa_key_pair():
     return private_key, public_key
 
 
+def generate_ec_key_pair():
+    """
+    Generate an ECDSA P-256 key pair suitable for ES256 JWT signing.
+    
+    Returns:
+        tuple: (private_key, public_key) cryptography objects
+    """
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    return private_key, private_key.public_key()
+
+
+def generate_ed25519_key_pair():
+    """
+    Generate an Ed25519 key pair suitable for EdDSA JWT signing.
+    
+    Returns:
+        tuple: (private_key, public_key) cryptography objects
+    """
+    private_key = ed25519.Ed25519PrivateKey.generate()
+    return private_key, private_key.public_key()
+
+
+KEY_GENERATORS = {
+    'RS256': generate_rsa_key_pair,
+    'ES256': generate_ec_key_pair,
+    'EdDSA': generate_ed25519_key_pair,
+}
+
+
+# The two helpers below mirror src/cert_signer.py so these scripts stay
+# standalone; keep them in step with it.
+def algorithm_for_key(key):
+    """
+    Return the JWS algorithm matching a private or public key object.
+    
+    Args:
+        key: Private or public key object
+        
+    Returns:
+        str: 'RS256', 'ES256' (P-256 only) or 'EdDSA'
+        
+    Raises:
+        ValueError: For other key types and EC curves
+    """
+    if isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+        return 'RS256'
+    if isinstance(key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)):
+        if key.curve.name != 'secp256r1':
+            raise ValueError(f"Unsupported EC curve: {key.curve.name}")
+        return 'ES256'
+    if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        return 'EdDSA'
+    raise ValueError(f"Unsupported key type: {type(key).__name__}")
+
+
+def key_id(public_key):
+    """
+    Compute the key ID (kid) placed in certificate headers.
+    
+    Base64url of the first 12 bytes of the SHA-256 digest of the
+    DER-encoded SubjectPublicKeyInfo, as cert_signer.key_id computes it.
+    
+    Args:
+        public_key: Public key object
+        
+    Returns:
+        str: Key ID
+    """
+    der = public_key.public_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    digest = hashes.Hash(hashes.SHA256())
+    digest.update(der)
+    return base64.urlsafe_b64encode(digest.finalize()[:12]).decode('ascii').rstrip('=')
+
+
 def serialize_keys(private_key, public_key):
     """
     Serialize keys to PEM format strings.
     
     Args:
-        private_key: RSA private key object
-        public_key: RSA public key object
+        private_key: Private key object
+        public_key: Public key object
         
     Returns:
         tuple: (private_pem_string, public_pem_string)
@@ -91,18 +175,23 @@ def save_keys_to_files(private_pem, public_pem, output_dir='output'):
     return private_key_path, public_key_path
 
 
-def print_keys_for_embedding(private_pem, public_pem):
+def print_keys_for_embedding(private_pem, public_pem, algorithm='RS256', kid=None):
     """
     Print keys in a format suitable for embedding in source code.
     
     Args:
         private_pem (str): Private key in PEM format
         public_pem (str): Public key in PEM format
+        algorithm (str): JWS algorithm the key pair is used with
+        kid (str): Key ID carried in certificate headers
     """
     print("\n" + "="*80)
-    print("GENERATED RSA KEY PAIR FOR CERTIFICATE SYSTEM")
+    print(f"GENERATED {algorithm} KEY PAIR FOR CERTIFICATE SYSTEM")
     print("="*80)
     
+    if kid:
+        print(f"\n🏷️  KEY ID (kid): {kid}")
+    
     print("\n📁 FILES SAVED:")
     print("   - output/private_key.pem")
     print("   - output/public_key.pem")
@@ -126,22 +215,29 @@ def print_keys_for_embedding(private_pem, public_pem):
 
 def main():
     """
-    Main function to generate and save RSA key pair.
+    Main function to generate and save a signing key pair.
     """
+    parser = argparse.ArgumentParser(description="Generate a certificate signing key pair")
+    parser.add_argument('--alg', choices=sorted(KEY_GENERATORS), default='RS256',
+                        help="Signing algorithm (default: RS256)")
+    parser.add_argument('--output-dir', default='output', help="Directory for the PEM files")
+    args = parser.parse_args()
+    
     try:
-        print("🔑 Generating RSA key pair for certificate system...")
+        print(f"🔑 Generating {args.alg} key pair for certificate system...")
         
         # Generate key pair
-        private_key, public_key = generate_rsa_key_pair()
+        private_key, public_key = KEY_GENERATORS[args.alg]()
+        kid = key_id(public_key)
         
         # Serialize to PEM format
         private_pem, public_pem = serialize_keys(private_key, public_key)
         
         # Save to files
-        private_path, public_path = save_keys_to_files(private_pem, public_pem)
+        private_path, public_path = save_keys_to_files(private_pem, public_pem, args.output_dir)
         
         # Print for embedding in code
-        print_keys_for_embedding(private_pem, public_pem)
+        print_keys_for_embedding(private_pem, public_pem, args.alg, kid)
         
         print(f"\n✅ Key generation completed successfully!")
         print(f"   Private key saved to: {private_path}")
@@ -11,6 +11,28 @@ hidden = [
     'oblivion_core',
     'hardware_info',
     'disk_wiper',
+    'cert_signer',
+    'cert_compact',
+    'cert_keyring',
+    'qr_render',
+    'cert_aggregate',
+    'cert_ledger',
+    'cert_verify',
+    'qr_batch',
+    'wipe_daemon',
+    'io_topology',
+    'wipe_metrics',
+    'io_trace',
+    'wipe_planner',
+    'image_wiper',
+    'shm_stats',
+    'wipe_dashboard',
+    'throughput_trace',
+    'device_stack',
+    'crypto_erase',
+    'signature_wipe',
+    'wipe_async',
+    'device_health',
 ]
 
 block_cipher = None
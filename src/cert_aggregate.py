@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+OBLIVION Aggregate Certificates (Production)
+
+One signed certificate for a whole multi-disk job. Each per-disk result
+record becomes a leaf of a SHA-256 Merkle tree (RFC 6962 hashing: 0x00 leaf
+prefix, 0x01 node prefix, odd nodes promoted unchanged); only the root is
+signed. Every disk receives a compact inclusion proof, so a single disk's
+record can be verified against the job certificate on its own.
+
+The aggregate JWT keeps the fields the mobile verifier requires; its
+``dataHash`` is the Merkle root and ``diskCount`` the number of leaves.
+"""
+
+from __future__ import annotations
+import os
+import json
+import time
+import uuid
+import hashlib
+from typing import Dict, List, Optional, Sequence
+
+from jwt.utils import base64url_decode, base64url_encode
+
+MERKLE_ALG = 'sha256-rfc6962'
+
+
+# ---------------------- Merkle tree ----------------------
+def canonical_record(record: Dict) -> bytes:
+    return json.dumps(record, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def leaf_hash(record: Dict) -> bytes:
+    return hashlib.sha256(b'\x00' + canonical_record(record)).digest()
+
+
+def _node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b'\x01' + left + right).digest()
+
+
+def _build_levels(leaves: List[bytes]) -> List[List[bytes]]:
+    if not leaves:
+        raise ValueError("Cannot build a Merkle tree without leaves")
+    levels = [leaves]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parent = [_node_hash(level[i], level[i + 1]) if i + 1 < len(level) else level[i]
+                  for i in range(0, len(level), 2)]
+        levels.append(parent)
+    return levels
+
+
+def merkle_root(records: Sequence[Dict]) -> bytes:
+    return _build_levels([leaf_hash(r) for r in records])[-1][0]
+
+
+def inclusion_proof(levels: List[List[bytes]], index: int) -> List[str]:
+    """Sibling hashes from leaf to root; sides follow from index and tree size."""
+    path = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            path.append(base64url_encode(level[sibling]).decode('ascii'))
+        index //= 2
+    return path
+
+
+def verify_inclusion(record: Dict, proof: Dict, root_hex: str) -> bool:
+    """Recompute the root from a record and its proof ({'i', 'n', 'p'})."""
+    try:
+        index, size = int(proof['i']), int(proof['n'])
+        path = [base64url_decode(p.encode('ascii')) for p in proof['p']]
+    except (KeyError, TypeError, ValueError):
+        return False
+    if not 0 <= index < size:
+        return False
+    node = leaf_hash(record)
+    while size > 1:
+        if index % 2 == 1:
+            if not path:
+                return False
+            node = _node_hash(path.pop(0), node)
+        elif index + 1 < size:
+            if not path:
+                return False
+            node = _node_hash(node, path.pop(0))
+        # else: last node of an odd level is promoted unchanged
+        index //= 2
+        size = (size + 1) // 2
+    return not path and node.hex() == root_hex
+
+
+# ---------------------- Certificates ----------------------
+class AggregateCertificate:
+    """Signed job certificate plus per-disk inclusion proofs."""
+
+    def __init__(self, token: str, payload: Dict, records: List[Dict], proofs: List[Dict]):
+        self.token = token
+        self.payload = payload
+        self.records = records
+        self.proofs = proofs
+
+    def disk_bundle(self, index: int) -> Dict:
+        """Everything needed to verify one disk independently of the others."""
+        return {'record': self.records[index], 'proof': self.proofs[index], 'token': self.token}
+
+    def save(self, output_dir: str) -> List[str]:
+        """Write the job token and one proof bundle per disk; returns the paths."""
+        job_id = self.payload['certificateID']
+        os.makedirs(output_dir, exist_ok=True)
+        paths = [os.path.join(output_dir, f"aggregate_{job_id}.jwt")]
+        with open(paths[0], 'w', encoding='utf-8') as f:
+            f.write(self.token)
+        for i in range(len(self.records)):
+            path = os.path.join(output_dir, f"aggregate_{job_id}_disk{i:03d}.json")
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.disk_bundle(i), f, separators=(',', ':'))
+            paths.append(path)
+        return paths
+
+
+def build_aggregate(records: Sequence[Dict], signer, device_type: str, device_id: str,
+                    wipe_method: str, job_id: Optional[str] = None) -> AggregateCertificate:
+    """Sign the Merkle root over ``records`` with a CertificateSigner."""
+    records = list(records)
+    levels = _build_levels([leaf_hash(r) for r in records])
+    root = levels[-1][0].hex()
+    now = int(time.time())
+    payload = {
+        'iss': 'OBLIVION',
+        'iat': now,
+        'certificateID': job_id or str(uuid.uuid4()),
+        'deviceType': device_type,
+        'deviceID': device_id,
+        'wipeMethod': wipe_method,
+        'wipeTimestamp': now,
+        'dataHash': root,
+        'diskCount': len(records),
+        'merkleAlg': MERKLE_ALG,
+    }
+    token = signer.sign(payload)
+    proofs = [{'i': i, 'n': len(records), 'p': inclusion_proof(levels, i)} for i in range(len(records))]
+    return AggregateCertificate(token, payload, records, proofs)
+
+
+def verify_disk(bundle: Dict, keyring) -> Dict:
+    """Verify one disk bundle: the job signature via KeyRing, the inclusion proof and the disk's status.
+
+    Returns {'valid': True, 'payload': job payload} or {'valid': False, 'reason': ...};
+    a record is only valid if its wipe finished with status 'done'.
+    """
+    result: Dict = {'valid': False}
+    try:
+        payload = keyring.verify_jwt(bundle['token'])
+        if payload.get('merkleAlg') != MERKLE_ALG:
+            result['reason'] = "Certificate is not an aggregate certificate"
+        elif not verify_inclusion(bundle['record'], bundle['proof'], payload['dataHash']):
+            result['reason'] = "Disk record is not included in the signed job"
+        elif int(bundle['proof']['n']) != payload['diskCount']:
+            result['reason'] = "Proof tree size does not match the signed disk count"
+        elif bundle['record'].get('status') != 'done':
+            result['reason'] = f"Disk wipe did not complete (status: {bundle['record'].get('status')})"
+        else:
+            result['valid'] = True
+            result['payload'] = payload
+    except Exception as e:  # malformed bundle or token
+        result['reason'] = f"Invalid disk bundle: {e}"
+    return result
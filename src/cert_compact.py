@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+OBLIVION Compact Certificate Encoding (Production)
+
+Alternative to the JSON JWT for QR transport. The payload is mapped to small
+integer keys (CWT registered claims plus private negative keys), hex hashes
+and UUIDs are stored as raw bytes, the result is wrapped in a COSE_Sign1
+structure, optionally deflated, and finally base45-encoded so the QR code can
+use alphanumeric mode.
+
+Text form:  OB1:<base45(zlib(COSE_Sign1)) or base45(COSE_Sign1)>
+
+Only the small CBOR subset needed for certificates is implemented here.
+"""
+
+from __future__ import annotations
+import struct
+import time
+import uuid
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+PREFIX = 'OB1:'
+
+# CWT registered claims (RFC 8392) and private claims (negative keys)
+CLAIM_KEYS: Dict[str, int] = {
+    'iss': 1,
+    'iat': 6,
+    'certificateID': 7,   # cti
+    'deviceType': -1,
+    'deviceID': -2,
+    'wipeMethod': -3,
+    'wipeTimestamp': -4,
+    'dataHash': -5,
+    'wipeStatus': -6,
+    'coverage': -7,
+    'badSectors': -8,
+}
+CLAIM_NAMES: Dict[int, str] = {v: k for k, v in CLAIM_KEYS.items()}
+
+# Frequent wipe method strings collapse to a single-byte integer
+WIPE_METHODS = [
+    'NIST SP 800-88 Clear',
+    'NIST SP 800-88 Purge',
+    'DoD 5220.22-M (3-pass)',
+    'NIST',
+    'DoD',
+    'NIST SP 800-88 Purge (Cryptographic Erase)',
+]
+
+# COSE algorithm identifiers (RFC 9053 / RFC 8812)
+COSE_ALGS = {'RS256': -257, 'ES256': -7, 'EdDSA': -8}
+COSE_ALG_NAMES = {v: k for k, v in COSE_ALGS.items()}
+
+COSE_SIGN1_TAG = 18
+_HEX = set('0123456789abcdefABCDEF')
+
+
+# ---------------------- CBOR (subset) ----------------------
+def _cbor_head(major: int, value: int) -> bytes:
+    if value < 24:
+        return bytes([(major << 5) | value])
+    if value < 0x100:
+        return bytes([(major << 5) | 24, value])
+    if value < 0x10000:
+        return bytes([(major << 5) | 25]) + struct.pack('>H', value)
+    if value < 0x100000000:
+        return bytes([(major << 5) | 26]) + struct.pack('>I', value)
+    return bytes([(major << 5) | 27]) + struct.pack('>Q', value)
+
+
+def cbor_dumps(obj: Any) -> bytes:
+    if obj is False:
+        return b'\xf4'
+    if obj is True:
+        return b'\xf5'
+    if obj is None:
+        return b'\xf6'
+    if isinstance(obj, int):
+        return _cbor_head(0, obj) if obj >= 0 else _cbor_head(1, -1 - obj)
+    if isinstance(obj, float):
+        return b'\xfb' + struct.pack('>d', obj)
+    if isinstance(obj, (bytes, bytearray)):
+        return _cbor_head(2, len(obj)) + bytes(obj)
+    if isinstance(obj, str):
+        raw = obj.encode('utf-8')
+        return _cbor_head(3, len(raw)) + raw
+    if isinstance(obj, (list, tuple)):
+        return _cbor_head(4, len(obj)) + b''.join(cbor_dumps(v) for v in obj)
+    if isinstance(obj, dict):
+        return _cbor_head(5, len(obj)) + b''.join(cbor_dumps(k) + cbor_dumps(v) for k, v in obj.items())
+    if isinstance(obj, CBORTag):
+        return _cbor_head(6, obj.tag) + cbor_dumps(obj.value)
+    raise TypeError(f"Cannot CBOR-encode {type(obj).__name__}")
+
+
+def cbor_loads(data: bytes) -> Any:
+    value, end = _cbor_decode(data, 0)
+    if end != len(data):
+        raise ValueError("Trailing bytes after CBOR item")
+    return value
+
+
+class CBORTag:
+    def __init__(self, tag: int, value: Any):
+        self.tag = tag
+        self.value = value
+
+
+def _cbor_decode(data: bytes, pos: int) -> Tuple[Any, int]:
+    if pos >= len(data):
+        raise ValueError("Truncated CBOR data")
+    initial = data[pos]
+    major, info = initial >> 5, initial & 0x1f
+    pos += 1
+    if major == 7:
+        if info == 20:
+            return False, pos
+        if info == 21:
+            return True, pos
+        if info == 22:
+            return None, pos
+        if info == 27:
+            return struct.unpack('>d', data[pos:pos + 8])[0], pos + 8
+        raise ValueError(f"Unsupported CBOR simple value {info}")
+    if info < 24:
+        arg = info
+    elif info in (24, 25, 26, 27):
+        width = 1 << (info - 24)
+        if pos + width > len(data):
+            raise ValueError("Truncated CBOR data")
+        arg = int.from_bytes(data[pos:pos + width], 'big')
+        pos += width
+    else:
+        raise ValueError("Indefinite-length CBOR items are not supported")
+    if major == 0:
+        return arg, pos
+    if major == 1:
+        return -1 - arg, pos
+    if major in (2, 3):
+        if pos + arg > len(data):
+            raise ValueError("Truncated CBOR data")
+        raw = data[pos:pos + arg]
+        return (bytes(raw) if major == 2 else raw.decode('utf-8')), pos + arg
+    if major == 4:
+        items = []
+        for _ in range(arg):
+            item, pos = _cbor_decode(data, pos)
+            items.append(item)
+        return items, pos
+    if major == 5:
+        out = {}
+        for _ in range(arg):
+            key, pos = _cbor_decode(data, pos)
+            out[key], pos = _cbor_decode(data, pos)
+        return out, pos
+    value, pos = _cbor_decode(data, pos)
+    return CBORTag(arg, value), pos
+
+
+# ---------------------- Base45 (RFC 9285) ----------------------
+_B45 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:'
+_B45_INDEX = {c: i for i, c in enumerate(_B45)}
+
+
+def b45encode(data: bytes) -> str:
+    out = []
+    for i in range(0, len(data) - 1, 2):
+        n = data[i] * 256 + data[i + 1]
+        c, n = divmod(n, 45 * 45)
+        b, a = divmod(n, 45)
+        out.append(_B45[a] + _B45[b] + _B45[c])
+    if len(data) % 2:
+        b, a = divmod(data[-1], 45)
+        out.append(_B45[a] + _B45[b])
+    return ''.join(out)
+
+
+def b45decode(text: str) -> bytes:
+    try:
+        values = [_B45_INDEX[c] for c in text]
+    except KeyError as e:
+        raise ValueError(f"Invalid base45 character {e}") from None
+    out = bytearray()
+    for i in range(0, len(values), 3):
+        chunk = values[i:i + 3]
+        if len(chunk) == 3:
+            n = chunk[0] + chunk[1] * 45 + chunk[2] * 45 * 45
+            if n > 0xffff:
+                raise ValueError("Invalid base45 triplet")
+            out += n.to_bytes(2, 'big')
+        elif len(chunk) == 2:
+            n = chunk[0] + chunk[1] * 45
+            if n > 0xff:
+                raise ValueError("Invalid base45 pair")
+            out.append(n)
+        else:
+            raise ValueError("Invalid base45 length")
+    return bytes(out)
+
+
+# ---------------------- Claims mapping ----------------------
+def _pack_value(name: str, value: Any) -> Any:
+    if name == 'certificateID' and isinstance(value, str):
+        try:
+            u = uuid.UUID(value)
+            if str(u) == value:
+                return u.bytes
+        except ValueError:
+            pass
+    if name == 'dataHash' and isinstance(value, str) and value and len(value) % 2 == 0 \
+            and set(value) <= _HEX and value == value.lower():
+        return bytes.fromhex(value)
+    if name == 'wipeMethod' and value in WIPE_METHODS:
+        return WIPE_METHODS.index(value)
+    return value
+
+
+def _unpack_value(name: str, value: Any) -> Any:
+    if name == 'certificateID' and isinstance(value, bytes) and len(value) == 16:
+        return str(uuid.UUID(bytes=value))
+    if name == 'dataHash' and isinstance(value, bytes):
+        return value.hex()
+    if name == 'wipeMethod' and isinstance(value, int):
+        return WIPE_METHODS[value] if 0 <= value < len(WIPE_METHODS) else value
+    return value
+
+
+def pack_claims(payload: Dict) -> Dict:
+    """Map a certificate payload onto integer-keyed claims."""
+    out: Dict[Any, Any] = {}
+    for name, value in payload.items():
+        out[CLAIM_KEYS.get(name, name)] = _pack_value(name, value)
+    return out
+
+
+def unpack_claims(claims: Dict) -> Dict:
+    """Inverse of pack_claims; unknown text keys pass through unchanged."""
+    out: Dict[str, Any] = {}
+    for key, value in claims.items():
+        name = CLAIM_NAMES.get(key, key) if isinstance(key, int) else key
+        out[str(name)] = _unpack_value(str(name), value)
+    return out
+
+
+# ---------------------- COSE_Sign1 ----------------------
+def _sig_structure(protected: bytes, payload: bytes) -> bytes:
+    return cbor_dumps(['Signature1', protected, b'', payload])
+
+
+def encode_compact(payload: Dict, signer, compress: bool = True) -> str:
+    """Sign ``payload`` with a CertificateSigner and return the QR text form."""
+    alg = COSE_ALGS.get(signer.algorithm)
+    if alg is None:
+        raise ValueError(f"No COSE algorithm id for {signer.algorithm}")
+    # Protected header: alg (label 1) and kid (label 4)
+    protected = cbor_dumps({1: alg, 4: signer.kid.encode('ascii')})
+    body = cbor_dumps(pack_claims(payload))
+    signature = signer.sign_bytes(_sig_structure(protected, body))
+    message = cbor_dumps(CBORTag(COSE_SIGN1_TAG, [protected, {}, body, signature]))
+    if compress:
+        deflated = zlib.compress(message, 9)
+        if len(deflated) < len(message):
+            message = deflated
+    return PREFIX + b45encode(message)
+
+
+def decode_compact(text: str, public_key_pem: Optional[str] = None, keyring=None) -> Dict:
+    """Decode the QR text form back into a payload with the original field names.
+
+    When ``public_key_pem`` or a KeyRing is given the COSE signature is
+    verified and a ValueError is raised if it does not match. Damaged input
+    (base45, zlib, CBOR or COSE) also raises ValueError.
+    """
+    try:
+        return _decode_compact(text, public_key_pem, keyring)
+    except ValueError:
+        raise
+    except Exception as e:  # zlib.error, struct.error, wrongly typed CBOR/COSE members
+        raise ValueError(f"Malformed compact certificate: {type(e).__name__}: {e}") from None
+
+
+def _decode_compact(text: str, public_key_pem: Optional[str], keyring) -> Dict:
+    if not text.startswith(PREFIX):
+        raise ValueError("Not an OBLIVION compact certificate")
+    raw = b45decode(text[len(PREFIX):])
+    if raw[:1] == b'\x78':  # zlib header; COSE_Sign1 starts with tag 0xd2
+        raw = zlib.decompress(raw)
+    item = cbor_loads(raw)
+    if not isinstance(item, CBORTag) or item.tag != COSE_SIGN1_TAG or len(item.value) != 4:
+        raise ValueError("Malformed COSE_Sign1 structure")
+    protected, _unprotected, body, signature = item.value
+    if public_key_pem is not None or keyring is not None:
+        header = cbor_loads(protected)
+        alg_name = COSE_ALG_NAMES.get(header.get(1))
+        if alg_name is None:
+            raise ValueError("Unknown COSE algorithm")
+        to_verify = _sig_structure(protected, body)
+        if keyring is not None:
+            kid = header.get(4)
+            try:
+                ok = keyring.verify_bytes(kid.decode('ascii') if kid else None, alg_name, to_verify, signature)
+            except KeyError as e:
+                raise ValueError(str(e)) from None
+        else:
+            ok = _verify(alg_name, public_key_pem, to_verify, signature)
+        if not ok:
+            raise ValueError("Signature verification failed")
+    claims = cbor_loads(body)
+    if not isinstance(claims, dict):
+        raise ValueError("COSE payload is not a claims map")
+    return unpack_claims(claims)
+
+
+def _verify(alg_name: str, public_key_pem: str, data: bytes, signature: bytes) -> bool:
+    from jwt.algorithms import get_default_algorithms
+    alg = get_default_algorithms()[alg_name]
+    return alg.verify(data, alg.prepare_key(public_key_pem), signature)
+
+
+# ---------------------- Comparison ----------------------
+def compare_sizes(payload: Dict, signer) -> Dict:
+    """Report text length, QR version and module count for JWT vs compact forms.
+
+    Module count (modules per side squared) stands in for scan time: fewer,
+    larger modules lock faster and tolerate more blur at the same print size.
+    """
+    import qrcode
+
+    def qr_stats(text: str) -> Dict:
+        qr = qrcode.QRCode(version=None, error_correction=qrcode.constants.ERROR_CORRECT_M)
+        qr.add_data(text)
+        qr.make(fit=True)
+        side = qr.modules_count
+        return {'chars': len(text), 'qr_version': qr.version, 'modules': side * side}
+
+    start = time.perf_counter()
+    jwt_text = signer.sign(payload)
+    jwt_encode = time.perf_counter() - start
+    start = time.perf_counter()
+    compact_text = encode_compact(payload, signer)
+    compact_encode = time.perf_counter() - start
+    start = time.perf_counter()
+    decoded = decode_compact(compact_text)
+    compact_decode = time.perf_counter() - start
+    if decoded != payload:
+        raise ValueError("Compact encoding did not round-trip")
+    return {
+        'jwt': dict(qr_stats(jwt_text), encode_ms=round(jwt_encode * 1000, 3)),
+        'compact': dict(qr_stats(compact_text), encode_ms=round(compact_encode * 1000, 3),
+                        decode_ms=round(compact_decode * 1000, 3)),
+    }
+
+
+if __name__ == '__main__':
+    # Size comparison: python cert_compact.py <private_key.pem>
+    import sys
+    import hashlib
+    from cert_signer import CertificateSigner
+    if len(sys.argv) < 2:
+        print("usage: cert_compact.py <private_key.pem>")
+        sys.exit(1)
+    now = int(time.time())
+    sample = {
+        'iss': 'OBLIVION',
+        'iat': now,
+        'certificateID': str(uuid.uuid4()),
+        'deviceType': 'Desktop',
+        'deviceID': 'MB-SN-PF2ABCDE-DISK-SN-S4EVNX0R123456',
+        'wipeMethod': 'NIST SP 800-88 Purge',
+        'wipeTimestamp': now,
+        'dataHash': hashlib.sha256(b'sample').hexdigest(),
+    }
+    result = compare_sizes(sample, CertificateSigner.from_pem_file(sys.argv[1]))
+    for name, row in result.items():
+        print(f"{name:8s} {row}")
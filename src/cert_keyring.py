@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+OBLIVION Verification Key Ring (Production)
+
+Holds parsed public keys indexed by key ID (``kid``). Verifiers look the
+signing key up with a single dict access instead of trying every known key,
+and each key is pinned to the one algorithm it was registered with so a
+token cannot switch a key to a different algorithm family.
+
+Tokens without a ``kid`` (certificates issued before key IDs were added)
+fall back to the default key, which keeps RS256 certificates verifiable.
+"""
+
+from __future__ import annotations
+from typing import Dict, Iterable, Optional, Tuple
+
+import jwt
+from jwt.algorithms import get_default_algorithms
+from cryptography.hazmat.primitives import serialization
+
+from cert_signer import algorithm_for_key, key_id
+
+
+class KeyRing:
+    def __init__(self):
+        self._keys: Dict[str, Tuple[str, object]] = {}
+        self.default_kid: Optional[str] = None
+
+    # ---------------------- Registration ----------------------
+    def add_pem(self, public_key_pem: str, kid: Optional[str] = None, default: bool = False) -> str:
+        """Parse and register a PEM public key; returns its key ID."""
+        key = serialization.load_pem_public_key(public_key_pem.encode('utf-8'))
+        algorithm = algorithm_for_key(key)
+        kid = kid or key_id(key)
+        prepared = get_default_algorithms()[algorithm].prepare_key(key)
+        self._keys[kid] = (algorithm, prepared)
+        if default or self.default_kid is None:
+            self.default_kid = kid
+        return kid
+
+    def add_pem_file(self, path: str, kid: Optional[str] = None, default: bool = False) -> str:
+        with open(path, 'r', encoding='utf-8') as f:
+            return self.add_pem(f.read(), kid=kid, default=default)
+
+    @classmethod
+    def from_files(cls, paths: Iterable[str]) -> 'KeyRing':
+        """Build a key ring from PEM files; the first file becomes the default.
+
+        A missing file raises FileNotFoundError rather than leaving its key out.
+        """
+        ring = cls()
+        for path in paths:
+            ring.add_pem_file(path)
+        return ring
+
+    # ---------------------- Lookup ----------------------
+    def lookup(self, kid: Optional[str]) -> Tuple[str, object]:
+        """Return (algorithm, parsed key) for ``kid`` or raise KeyError."""
+        if kid is None:
+            kid = self.default_kid
+        if kid is None or kid not in self._keys:
+            raise KeyError(f"Unknown key ID: {kid}")
+        return self._keys[kid]
+
+    def __contains__(self, kid: str) -> bool:
+        return kid in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    # ---------------------- Verification ----------------------
+    def verify_jwt(self, token: str, **decode_options) -> Dict:
+        """Verify a JWT with the key named by its ``kid`` header and return the payload.
+
+        Raises jwt.InvalidTokenError on bad signatures and KeyError for unknown keys.
+        """
+        header = jwt.get_unverified_header(token)
+        algorithm, key = self.lookup(header.get('kid'))
+        if header.get('alg') != algorithm:
+            raise jwt.InvalidAlgorithmError(f"Key {header.get('kid')} is registered for {algorithm}")
+        return jwt.decode(token, key, algorithms=[algorithm], **decode_options)
+
+    def verify_bytes(self, kid: Optional[str], algorithm: str, data: bytes, signature: bytes) -> bool:
+        """Verify a raw signature (e.g. COSE) with the key named by ``kid``."""
+        registered, key = self.lookup(kid)
+        if registered != algorithm:
+            return False
+        return get_default_algorithms()[algorithm].verify(data, key, signature)
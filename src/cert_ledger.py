@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+OBLIVION Certificate Ledger (Production)
+
+Append-only local index of every issued certificate, stored in SQLite (WAL
+mode). Certificates are indexed by certificate ID, device ID, wipe timestamp
+and wipe method so audits over years of history are index lookups instead of
+decoding every PNG in the output directory. UPDATE and DELETE are rejected by
+triggers; corrections are made by issuing a new certificate.
+"""
+
+from __future__ import annotations
+import csv
+import json
+import sqlite3
+from typing import Dict, Iterable, IO, List, Optional, Sequence
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS certificates (
+    seq            INTEGER PRIMARY KEY AUTOINCREMENT,
+    certificate_id TEXT NOT NULL UNIQUE,
+    job_id         TEXT,
+    device_id      TEXT NOT NULL,
+    device_type    TEXT,
+    wipe_method    TEXT,
+    wipe_timestamp INTEGER,
+    issued_at      INTEGER NOT NULL,
+    qr_path        TEXT,
+    token          TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cert_device ON certificates(device_id, wipe_timestamp);
+CREATE INDEX IF NOT EXISTS idx_cert_wipe_ts ON certificates(wipe_timestamp);
+CREATE INDEX IF NOT EXISTS idx_cert_issued ON certificates(issued_at);
+CREATE INDEX IF NOT EXISTS idx_cert_method ON certificates(wipe_method, wipe_timestamp);
+CREATE INDEX IF NOT EXISTS idx_cert_job ON certificates(job_id);
+CREATE TRIGGER IF NOT EXISTS certificates_no_update BEFORE UPDATE ON certificates
+BEGIN SELECT RAISE(ABORT, 'certificate ledger is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS certificates_no_delete BEFORE DELETE ON certificates
+BEGIN SELECT RAISE(ABORT, 'certificate ledger is append-only'); END;
+"""
+
+_COLUMNS = ('seq', 'certificate_id', 'job_id', 'device_id', 'device_type', 'wipe_method',
+            'wipe_timestamp', 'issued_at', 'qr_path', 'token')
+
+_INSERT = ("INSERT INTO certificates (certificate_id, job_id, device_id, device_type, wipe_method, "
+           "wipe_timestamp, issued_at, qr_path, token) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+
+class CertificateLedger:
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> 'CertificateLedger':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ---------------------- Writes ----------------------
+    def record(self, payload: Dict, token: str, qr_path: Optional[str] = None,
+               job_id: Optional[str] = None) -> None:
+        """Append one issued certificate."""
+        with self._conn:
+            self._conn.execute(_INSERT, self._row(payload, token, qr_path, job_id))
+
+    def record_many(self, entries: Iterable[Sequence], job_id: Optional[str] = None) -> int:
+        """Append (payload, token, qr_path) entries in a single transaction."""
+        rows = [self._row(e[0], e[1], e[2] if len(e) > 2 else None, job_id) for e in entries]
+        with self._conn:
+            self._conn.executemany(_INSERT, rows)
+        return len(rows)
+
+    @staticmethod
+    def _row(payload: Dict, token: str, qr_path: Optional[str], job_id: Optional[str]) -> tuple:
+        return (
+            payload['certificateID'],
+            job_id,
+            payload.get('deviceID', ''),
+            payload.get('deviceType'),
+            payload.get('wipeMethod'),
+            payload.get('wipeTimestamp'),
+            payload.get('iat', payload.get('wipeTimestamp', 0)),
+            qr_path,
+            token,
+        )
+
+    # ---------------------- Queries ----------------------
+    def get(self, certificate_id: str) -> Optional[Dict]:
+        row = self._conn.execute("SELECT * FROM certificates WHERE certificate_id = ?",
+                                 (certificate_id,)).fetchone()
+        return dict(row) if row else None
+
+    def find(self, device_id: Optional[str] = None, wipe_method: Optional[str] = None,
+             job_id: Optional[str] = None, since: Optional[int] = None,
+             until: Optional[int] = None, limit: Optional[int] = None) -> List[Dict]:
+        """Filter certificates; timestamps bound ``wipe_timestamp`` (inclusive)."""
+        clauses, args = [], []
+        for column, value in (('device_id', device_id), ('wipe_method', wipe_method), ('job_id', job_id)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                args.append(value)
+        if since is not None:
+            clauses.append("wipe_timestamp >= ?")
+            args.append(since)
+        if until is not None:
+            clauses.append("wipe_timestamp <= ?")
+            args.append(until)
+        sql = "SELECT * FROM certificates"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY wipe_timestamp, seq"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(int(limit))
+        return [dict(r) for r in self._conn.execute(sql, args)]
+
+    def count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM certificates").fetchone()[0]
+
+    # ---------------------- Export ----------------------
+    def export(self, fp: IO[str], fmt: str = 'jsonl', **filters) -> int:
+        """Write matching rows to ``fp`` as JSON lines or CSV; returns the row count."""
+        rows = self.find(**filters)
+        if fmt == 'jsonl':
+            for row in rows:
+                fp.write(json.dumps(row, separators=(',', ':')) + '\n')
+        elif fmt == 'csv':
+            writer = csv.DictWriter(fp, fieldnames=_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        return len(rows)
+
+
+if __name__ == '__main__':
+    # Query/export: python cert_ledger.py <ledger.db> [device_id] [--csv]
+    import sys
+    if len(sys.argv) < 2:
+        print("usage: cert_ledger.py <ledger.db> [device_id] [--csv]")
+        sys.exit(1)
+    args = [a for a in sys.argv[2:] if a != '--csv']
+    with CertificateLedger(sys.argv[1]) as ledger:
+        ledger.export(sys.stdout, fmt='csv' if '--csv' in sys.argv else 'jsonl',
+                      device_id=args[0] if args else None)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+OBLIVION Certificate Signer (Production)
+
+Reusable JWT signer for wipe certificates. The private key is read and
+parsed exactly once; the serialized JOSE header is computed once per signer
+and shared by every token it produces. Batches can be signed inline or fanned
+out across a process pool for multi-disk jobs and fleet runs.
+
+Supported algorithms: RS256 (RSA), ES256 (ECDSA P-256) and EdDSA (Ed25519).
+The algorithm is inferred from the key type when not given, and every token
+carries a ``kid`` header derived from the public key so verifiers can pick
+the right key with a single lookup.
+"""
+
+from __future__ import annotations
+import os
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import jwt
+from jwt.algorithms import get_default_algorithms
+from jwt.utils import base64url_encode
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+# Accepted spellings for the Ed25519 JWS algorithm
+ALGORITHM_ALIASES = {'Ed25519': 'EdDSA', 'EDDSA': 'EdDSA'}
+
+
+def algorithm_for_key(key) -> str:
+    """Return the JWS algorithm matching a private or public key object."""
+    if isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+        return 'RS256'
+    if isinstance(key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)):
+        if key.curve.name != 'secp256r1':
+            raise ValueError(f"Unsupported EC curve: {key.curve.name}")
+        return 'ES256'
+    if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        return 'EdDSA'
+    raise ValueError(f"Unsupported key type: {type(key).__name__}")
+
+
+def key_id(public_key) -> str:
+    """Stable key ID: base64url of the first 12 bytes of SHA-256(SPKI DER)."""
+    der = public_key.public_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    digest = hashes.Hash(hashes.SHA256())
+    digest.update(der)
+    return base64url_encode(digest.finalize()[:12]).decode('ascii')
+
+
+class CertificateSigner:
+    def __init__(self, private_key_pem: str, algorithm: Optional[str] = None, kid: Optional[str] = None):
+        # Parse the PEM once; jwt.encode would otherwise re-parse it per token
+        key = serialization.load_pem_private_key(private_key_pem.encode('utf-8'), password=None)
+        inferred = algorithm_for_key(key)
+        algorithm = ALGORITHM_ALIASES.get(algorithm, algorithm) if algorithm else inferred
+        if algorithm != inferred:
+            raise ValueError(f"Key type requires {inferred}, not {algorithm}")
+        algorithms = get_default_algorithms()
+        if algorithm not in algorithms:
+            raise ValueError(f"Unsupported signing algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self.kid = kid or key_id(key.public_key())
+        self._pem = private_key_pem
+        self._alg = algorithms[algorithm]
+        self._key = self._alg.prepare_key(key)
+        header = {'alg': algorithm, 'kid': self.kid, 'typ': 'JWT'}
+        self._header_segment = base64url_encode(
+            json.dumps(header, separators=(',', ':'), sort_keys=True).encode('utf-8')
+        )
+        self.signed_count = 0
+        self.signing_seconds = 0.0
+
+    # ---------------------- Construction ----------------------
+    @classmethod
+    def from_pem_file(cls, path: str, algorithm: Optional[str] = None) -> 'CertificateSigner':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(f.read(), algorithm=algorithm)
+
+    @classmethod
+    def from_candidates(cls, paths: Iterable[str], algorithm: Optional[str] = None) -> 'CertificateSigner':
+        """Load the first existing key file from a list of candidate paths."""
+        for path in paths:
+            try:
+                if os.path.exists(path):
+                    return cls.from_pem_file(path, algorithm=algorithm)
+            except OSError:
+                continue
+        raise RuntimeError('private_key.pem not found. Ensure it is bundled or present.')
+
+    # ---------------------- Signing ----------------------
+    def sign(self, payload: Dict) -> str:
+        """Sign a single payload and return the compact JWT."""
+        start = time.perf_counter()
+        token = self._encode(payload)
+        self._account(1, time.perf_counter() - start)
+        return token
+
+    def sign_many(self, payloads: Sequence[Dict], workers: Optional[int] = None) -> List[str]:
+        """Sign a batch of payloads, preserving order.
+
+        With ``workers`` > 1 the batch is split across a process pool; each
+        worker parses the key once in its initializer.
+        """
+        start = time.perf_counter()
+        if workers and workers > 1 and len(payloads) > 1:
+            chunk = max(1, len(payloads) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(self._pem, self.algorithm, self.kid)) as pool:
+                tokens = list(pool.map(_worker_sign, payloads, chunksize=chunk))
+        else:
+            tokens = [self._encode(p) for p in payloads]
+        self._account(len(tokens), time.perf_counter() - start)
+        return tokens
+
+    def sign_bytes(self, data: bytes) -> bytes:
+        """Sign raw bytes (e.g. a COSE Sig_structure) with the cached key."""
+        start = time.perf_counter()
+        signature = self._alg.sign(data, self._key)
+        self._account(1, time.perf_counter() - start)
+        return signature
+
+    def signatures_per_second(self) -> float:
+        if self.signing_seconds <= 0:
+            return 0.0
+        return self.signed_count / self.signing_seconds
+
+    def stats(self) -> Dict:
+        return {
+            'algorithm': self.algorithm,
+            'kid': self.kid,
+            'signed': self.signed_count,
+            'seconds': round(self.signing_seconds, 6),
+            'signatures_per_second': round(self.signatures_per_second(), 1),
+        }
+
+    # ---------------------- Internals ----------------------
+    def _encode(self, payload: Dict) -> str:
+        payload_segment = base64url_encode(
+            json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        )
+        signing_input = self._header_segment + b'.' + payload_segment
+        signature = self._alg.sign(signing_input, self._key)
+        return (signing_input + b'.' + base64url_encode(signature)).decode('ascii')
+
+    def _account(self, count: int, seconds: float) -> None:
+        self.signed_count += count
+        self.signing_seconds += seconds
+
+
+# Per-process signer used by the pool workers
+_worker_signer: Optional[CertificateSigner] = None
+
+
+def _init_worker(pem: str, algorithm: str, kid: str) -> None:
+    global _worker_signer
+    _worker_signer = CertificateSigner(pem, algorithm=algorithm, kid=kid)
+
+
+def _worker_sign(payload: Dict) -> str:
+    assert _worker_signer is not None
+    return _worker_signer._encode(payload)
+
+
+if __name__ == '__main__':
+    # Simple throughput check: python cert_signer.py <private_key.pem> [count] [workers]
+    import sys
+    if len(sys.argv) < 2:
+        print("usage: cert_signer.py <private_key.pem> [count] [workers]")
+        sys.exit(1)
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    signer = CertificateSigner.from_pem_file(sys.argv[1])
+    now = int(time.time())
+    batch = [{'iss': 'OBLIVION', 'iat': now, 'certificateID': str(i)} for i in range(count)]
+    tokens = signer.sign_many(batch, workers=workers)
+    check = jwt.decode(tokens[0], options={'verify_signature': False})
+    print(f"Signed {len(tokens)} certificates: {signer.stats()}")
+    print(f"First payload round-trips: {check == batch[0]}")
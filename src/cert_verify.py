@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+OBLIVION Bulk Certificate Verifier (Production)
+
+Offline verification of many certificates at once. Applies the same checks
+as the mobile app's jwtVerifier.js (structure, signature, required fields,
+issued-at not in the future with 5 minutes of clock skew) to JWTs and to
+compact ``OB1:`` certificates, fans the work out across a process pool, and
+streams one JSON line per certificate with the failure reason if any.
+
+Each worker parses the public keys once into a KeyRing indexed by ``kid``.
+
+Usage:
+    python cert_verify.py --key public_key.pem [--key other.pem] [--workers N] [FILE ... | -]
+
+Input files hold one certificate per line; '-' reads from stdin.
+"""
+
+from __future__ import annotations
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import jwt
+
+from cert_keyring import KeyRing
+from cert_compact import PREFIX as COMPACT_PREFIX, decode_compact
+
+REQUIRED_FIELDS = ['iss', 'iat', 'deviceID', 'deviceType', 'certificateID']
+CLOCK_SKEW_SECONDS = 300
+
+
+def check_claims(payload: Dict, now: Optional[int] = None) -> Optional[str]:
+    """Field and timestamp checks from jwtVerifier.js; returns a failure reason or None."""
+    missing = [f for f in REQUIRED_FIELDS if not payload.get(f)]
+    if missing:
+        return f"Missing required fields: {', '.join(missing)}"
+    now = int(time.time()) if now is None else now
+    try:
+        if int(payload['iat']) > now + CLOCK_SKEW_SECONDS:
+            return 'Certificate issued in the future'
+    except (TypeError, ValueError):
+        return 'Invalid iat claim'
+    return None
+
+
+def verify_token(token: str, keyring: KeyRing, now: Optional[int] = None) -> Dict:
+    """Verify one certificate string and return a result record."""
+    result: Dict = {'valid': False}
+    if not token or not isinstance(token, str):
+        result['reason'] = 'Invalid token format'
+        return result
+    try:
+        if token.startswith(COMPACT_PREFIX):
+            result['format'] = 'compact'
+            try:
+                payload = decode_compact(token, keyring=keyring)
+            except ValueError as e:
+                result['reason'] = str(e)
+                return result
+        else:
+            result['format'] = 'jwt'
+            if len(token.split('.')) != 3:
+                result['reason'] = 'Invalid JWT structure'
+                return result
+            result['kid'] = jwt.get_unverified_header(token).get('kid')
+            # Signature only; claim checks below mirror the mobile app
+            payload = keyring.verify_jwt(token, options={'verify_iat': False, 'verify_exp': False,
+                                                         'verify_nbf': False})
+    except KeyError as e:
+        result['reason'] = str(e).strip('"\'')
+        return result
+    except jwt.InvalidSignatureError:
+        result['reason'] = 'Invalid signature'
+        return result
+    except jwt.InvalidTokenError as e:
+        result['reason'] = f"Signature verification failed: {e}"
+        return result
+    except Exception as e:
+        # Corrupt base45/zlib/CBOR input must fail this token only, not the whole bulk run
+        result['reason'] = f"Malformed certificate: {type(e).__name__}: {e}"
+        return result
+    if not isinstance(payload, dict):
+        result['reason'] = 'Certificate payload is not an object'
+        return result
+    result['certificateID'] = payload.get('certificateID')
+    reason = check_claims(payload, now)
+    if reason:
+        result['reason'] = reason
+        return result
+    result['valid'] = True
+    result['payload'] = payload
+    return result
+
+
+# ---------------------- Worker pool ----------------------
+_worker_ring: Optional[KeyRing] = None
+
+
+def _init_worker(key_paths: Sequence[str]) -> None:
+    global _worker_ring
+    _worker_ring = KeyRing.from_files(key_paths)
+
+
+def _verify_item(item: Tuple[str, str]) -> Dict:
+    source, token = item
+    result = verify_token(token, _worker_ring)
+    result['source'] = source
+    return result
+
+
+def iter_tokens(paths: Sequence[str]) -> Iterator[Tuple[str, str]]:
+    """Yield (source, token) pairs; source is 'path:line'."""
+    for path in paths:
+        f = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+        try:
+            for lineno, line in enumerate(f, 1):
+                token = line.strip()
+                if token:
+                    yield f"{path}:{lineno}", token
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+
+def verify_stream(items: Iterator[Tuple[str, str]], key_paths: Sequence[str],
+                  workers: Optional[int] = None, chunksize: int = 64) -> Iterator[Dict]:
+    """Verify (source, token) pairs in input order, streaming results."""
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        _init_worker(key_paths)
+        for item in items:
+            yield _verify_item(item)
+        return
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(list(key_paths),)) as pool:
+        for result in pool.imap(_verify_item, items, chunksize=chunksize):
+            yield result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Verify OBLIVION certificates in bulk")
+    parser.add_argument('inputs', nargs='*', default=['-'], help="Files with one certificate per line, or '-'")
+    parser.add_argument('--key', action='append', required=True, help="Public key PEM (repeatable)")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--summary', action='store_true', help="Print totals to stderr when done")
+    args = parser.parse_args(argv)
+    # A mistyped key path would otherwise surface only as "Unknown key ID" on every certificate
+    for path in args.key:
+        if not os.path.isfile(path):
+            parser.error(f"key file not found: {path}")
+
+    start = time.perf_counter()
+    total = failed = 0
+    for result in verify_stream(iter_tokens(args.inputs), args.key, workers=args.workers):
+        total += 1
+        failed += 0 if result['valid'] else 1
+        sys.stdout.write(json.dumps(result, separators=(',', ':')) + '\n')
+    if args.summary:
+        elapsed = time.perf_counter() - start
+        rate = total / elapsed if elapsed > 0 else 0.0
+        print(f"verified={total} failed={failed} seconds={elapsed:.2f} per_second={rate:.0f}", file=sys.stderr)
+    return 0 if failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
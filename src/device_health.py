@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+OBLIVION Device Health Counters (Production)
+
+Snapshots the drive's own SMART / NVMe health counters before and after a
+wipe so a job record can show how much of the wipe the drive actually
+counted and what it cost in endurance:
+
+- host writes       bytes the drive received from the host
+- media writes      bytes the drive wrote to flash (only on drives that
+                    expose a NAND/flash write counter)
+- reallocated       reallocated / grown-defect sector count
+- wear              endurance used, in percent
+- temperature       degrees Celsius
+
+Counters come from ``smartctl --json`` (ATA, SCSI and NVMe). Where smartctl
+is missing or cannot open the device, the kernel's block statistics give
+host writes since boot and an NVMe hwmon sensor gives the temperature, so
+deltas stay meaningful either way. A failed smartctl call is retried once;
+only after several consecutive failures does a device go straight to sysfs.
+Deltas are only computed between snapshots from the same source. Snapshots
+of many devices are taken concurrently and cached per device.
+
+Usage:
+    python device_health.py /dev/sdb /dev/nvme0n1 [--smartctl PATH]
+"""
+
+from __future__ import annotations
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+SMARTCTL_TIMEOUT = 60
+# smartctl exit status bits 0-1: command line did not parse / device could not be opened
+SMARTCTL_FATAL_BITS = 0x03
+NVME_DATA_UNIT = 512 * 1000
+KERNEL_SECTOR = 512
+DEFAULT_MAX_AGE = 30.0
+SMARTCTL_ATTEMPTS = 2
+# Consecutive failed snapshots before a device skips smartctl and uses sysfs directly
+SMARTCTL_FAILURE_LIMIT = 3
+COUNTERS = ('host_writes', 'media_writes', 'reallocated', 'wear_percent', 'temperature')
+
+# ATA attribute ids
+_ATA_REALLOCATED = 5
+_ATA_HOST_WRITES = (241,)
+_ATA_MEDIA_WRITES = (249,)  # NAND_Writes_1GiB and similar
+_ATA_WEAR_REMAINING = (233, 231, 177)  # normalized value counts down from 100
+
+
+def _block_name(device_path: str) -> str:
+    return os.path.basename(os.path.realpath(device_path))
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+# ---------------------- smartctl ----------------------
+def _ata_unit(name: str, block_size: int) -> int:
+    """Byte size of one raw unit of a write-counter attribute, from its name."""
+    if '32MiB' in name:
+        return 32 * 1024 * 1024
+    if 'GiB' in name or 'GB' in name:
+        return 1024 ** 3
+    return block_size
+
+
+def _parse_ata(data: Dict, counters: Dict) -> None:
+    block_size = int(data.get('logical_block_size') or KERNEL_SECTOR)
+    for attr in data.get('ata_smart_attributes', {}).get('table', []):
+        ident, name = attr.get('id'), attr.get('name', '')
+        raw = attr.get('raw', {}).get('value')
+        if ident == _ATA_REALLOCATED and raw is not None:
+            counters['reallocated'] = int(raw)
+        elif ident in _ATA_HOST_WRITES and raw is not None:
+            counters['host_writes'] = int(raw) * _ata_unit(name, block_size)
+        elif (ident in _ATA_MEDIA_WRITES or 'NAND_Writes' in name) and raw is not None:
+            counters['media_writes'] = int(raw) * _ata_unit(name, block_size)
+        elif ident in _ATA_WEAR_REMAINING and 'wear_percent' not in counters and attr.get('value') is not None:
+            counters['wear_percent'] = max(0, 100 - int(attr['value']))
+    # Device statistics (GP log 0x04) are standardized and take precedence when present
+    for page in data.get('ata_device_statistics', {}).get('pages', []):
+        for entry in page.get('table', []):
+            name, value = entry.get('name', ''), entry.get('value')
+            if value is None:
+                continue
+            if name == 'Logical Sectors Written':
+                counters['host_writes'] = int(value) * block_size
+            elif name == 'Percentage Used Endurance Indicator':
+                counters['wear_percent'] = int(value)
+
+
+def _parse_scsi(data: Dict, counters: Dict) -> None:
+    processed = data.get('scsi_error_counter_log', {}).get('write', {}).get('gigabytes_processed')
+    if processed is not None:
+        counters['host_writes'] = int(float(processed) * 1000 ** 3)
+    if data.get('scsi_grown_defect_list') is not None:
+        counters['reallocated'] = int(data['scsi_grown_defect_list'])
+    if data.get('scsi_percentage_used_endurance_indicator') is not None:
+        counters['wear_percent'] = int(data['scsi_percentage_used_endurance_indicator'])
+
+
+def _parse_nvme(data: Dict, counters: Dict) -> None:
+    log = data.get('nvme_smart_health_information_log')
+    if not log:
+        return
+    if log.get('data_units_written') is not None:
+        counters['host_writes'] = int(log['data_units_written']) * NVME_DATA_UNIT
+    if log.get('percentage_used') is not None:
+        counters['wear_percent'] = int(log['percentage_used'])
+    if log.get('temperature') is not None:
+        counters['temperature'] = int(log['temperature'])
+
+
+def parse_smartctl(data: Dict) -> Dict:
+    """Health counters from ``smartctl --json -a`` output; absent counters are left out."""
+    counters: Dict = {}
+    _parse_ata(data, counters)
+    _parse_scsi(data, counters)
+    _parse_nvme(data, counters)
+    if data.get('temperature', {}).get('current') is not None:
+        counters['temperature'] = int(data['temperature']['current'])
+    return counters
+
+
+def read_smartctl(device_path: str, smartctl: str = 'smartctl') -> Optional[Dict]:
+    """Parsed counters, or None when smartctl is missing or cannot open the device."""
+    try:
+        result = subprocess.run([smartctl, '--json', '-a', device_path], capture_output=True, text=True,
+                                timeout=SMARTCTL_TIMEOUT)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if result.returncode & SMARTCTL_FATAL_BITS:
+        return None
+    try:
+        data = json.loads(result.stdout)
+    except ValueError:
+        return None
+    return parse_smartctl(data) if isinstance(data, dict) else None
+
+
+# ---------------------- sysfs ----------------------
+def read_sysfs(device_path: str) -> Dict:
+    """Host writes since boot from /sys/block/X/stat, temperature from an NVMe hwmon sensor."""
+    name = _block_name(device_path)
+    counters: Dict = {}
+    stat = (_read(f'/sys/block/{name}/stat') or '').split()
+    if len(stat) > 6:
+        counters['host_writes'] = int(stat[6]) * KERNEL_SECTOR  # sectors written, always 512-byte units
+    for sensor in sorted(glob.glob(f'/sys/block/{name}/device/hwmon/hwmon*/temp1_input')):
+        value = _read(sensor)
+        if value and value.lstrip('-').isdigit():
+            counters['temperature'] = int(value) // 1000
+            break
+    return counters
+
+
+# ---------------------- Snapshots ----------------------
+class HealthMonitor:
+    """Per-device health snapshots, cached for ``max_age`` seconds."""
+
+    def __init__(self, smartctl: str = 'smartctl', max_age: float = DEFAULT_MAX_AGE, max_workers: int = 16):
+        self.smartctl = smartctl
+        self.max_age = max_age
+        self.max_workers = max(1, max_workers)
+        self._cache: Dict[str, Dict] = {}
+        # Consecutive smartctl failures per device; reset by a successful read
+        self._smart_failures: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def snapshot(self, device_path: str, fresh: bool = False) -> Dict:
+        now = time.time()
+        with self._lock:
+            cached = self._cache.get(device_path)
+            use_smart = self._smart_failures.get(device_path, 0) < SMARTCTL_FAILURE_LIMIT
+        if cached and not fresh and now - cached['taken'] < self.max_age:
+            return cached
+        counters = None
+        if use_smart:
+            # Timeouts under heavy wipe load are common; one retry before falling back
+            for _ in range(SMARTCTL_ATTEMPTS):
+                counters = read_smartctl(device_path, self.smartctl)
+                if counters is not None:
+                    break
+        source = 'smartctl'
+        if counters is None:
+            counters, source = read_sysfs(device_path), 'sysfs'
+        snap = dict(counters, device=device_path, source=source, taken=now)
+        with self._lock:
+            if source == 'smartctl':
+                self._smart_failures.pop(device_path, None)
+            elif use_smart:
+                self._smart_failures[device_path] = self._smart_failures.get(device_path, 0) + 1
+            self._cache[device_path] = snap
+        return snap
+
+    def snapshot_all(self, device_paths: List[str], fresh: bool = False) -> Dict[str, Dict]:
+        """Snapshots of several devices, taken concurrently (smartctl can take seconds per drive)."""
+        if not device_paths:
+            return {}
+        workers = min(self.max_workers, len(device_paths))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='health') as pool:
+            snaps = pool.map(lambda d: self.snapshot(d, fresh), device_paths)
+            return dict(zip(device_paths, snaps))
+
+
+def health_delta(before: Dict, after: Dict, written: int = 0, seconds: float = 0.0) -> Dict:
+    """Counter changes over a job plus derived figures.
+
+    ``written`` is what the wipe issued to the device. Counters from
+    different sources (smartctl lifetime totals vs. kernel stats since boot)
+    cannot be subtracted, so every delta is None when the sources differ.
+    Derived values are None when the counters they need are missing on
+    either side:
+    - reached_device: host writes counted by the drive / bytes issued
+    - write_amplification: media writes / host writes
+    - throughput_mb_s: bytes issued per second of the job
+    - bytes_per_wear_percent: bytes issued per percent of endurance used
+    """
+    delta: Dict = {'source': after.get('source'), 'seconds': round(seconds, 3), 'written': written}
+    same_source = before.get('source') == after.get('source')
+    if not same_source:
+        delta['source'] = f"{before.get('source')}->{after.get('source')}"
+    for key in COUNTERS:
+        if key == 'temperature':
+            continue
+        if same_source and before.get(key) is not None and after.get(key) is not None:
+            delta[key] = after[key] - before[key]
+        else:
+            delta[key] = None
+    delta['temperature'] = {'before': before.get('temperature'), 'after': after.get('temperature')}
+    host, media, wear = delta['host_writes'], delta['media_writes'], delta['wear_percent']
+    delta['reached_device'] = round(host / written, 4) if host is not None and written else None
+    delta['write_amplification'] = round(media / host, 3) if media is not None and host else None
+    delta['throughput_mb_s'] = round(written / seconds / 1e6, 2) if written and seconds > 0 else None
+    delta['bytes_per_wear_percent'] = written // wear if wear and written else None
+    return delta
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Show SMART/NVMe health counters of block devices")
+    parser.add_argument('devices', nargs='+')
+    parser.add_argument('--smartctl', default='smartctl', help="smartctl executable (default: from PATH)")
+    args = parser.parse_args(argv)
+    monitor = HealthMonitor(smartctl=args.smartctl)
+    for device, snap in monitor.snapshot_all(args.devices).items():
+        values = ', '.join(f"{k}={snap[k]}" for k in COUNTERS if snap.get(k) is not None) or 'no counters'
+        print(f"{device} [{snap['source']}]: {values}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
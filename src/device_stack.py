@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+OBLIVION Stacked Device Handling (Production)
+
+Builds the Linux block device graph from /sys/class/block/*/holders and
+slaves so that md-RAID arrays, LVM volumes, dm-crypt mappings and other
+device-mapper targets are wiped through their physical members:
+
+- a logical device (md0, dm-3, /dev/mapper/vg-lv) expands to the whole
+  disks underneath it;
+- a member disk that is still assembled into a stack is only accepted when
+  every physical member of that stack is part of the same wipe, so a
+  mirror or volume group is never left half destroyed;
+- before writing, the stacks above the members are torn down top-down
+  (dmsetup remove, mdadm --stop) after checking nothing in them is mounted
+  or used as swap.
+
+Members are then wiped concurrently and certified one by one. On systems
+without sysfs the graph is empty and every device is its own member.
+"""
+
+from __future__ import annotations
+import os
+import subprocess
+from typing import Callable, Dict, List, Optional, Set
+
+SYS_BLOCK = '/sys/class/block'
+PHYSICAL_KINDS = ('disk', 'loop')
+# device-mapper uuid prefixes set by the tools that create the mapping
+_DM_UUID_KINDS = (('LVM-', 'lvm'), ('CRYPT-', 'crypt'), ('mpath-', 'mpath'))
+
+
+class StackError(RuntimeError):
+    pass
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _listdir(path: str) -> List[str]:
+    try:
+        return sorted(os.listdir(path))
+    except OSError:
+        return []
+
+
+def block_name(device_path: str) -> str:
+    """Kernel name of a device path: /dev/mapper/vg-lv -> dm-3."""
+    return os.path.basename(os.path.realpath(device_path))
+
+
+# ---------------------- Graph ----------------------
+class StackGraph:
+    """Snapshot of the block devices and their holder/slave links."""
+
+    def __init__(self, root: str = SYS_BLOCK):
+        self.root = root
+        self.nodes: Dict[str, Dict] = {}
+        for name in _listdir(root):
+            self.nodes[name] = self._node(name)
+
+    def _node(self, name: str) -> Dict:
+        base = os.path.join(self.root, name)
+        node = {
+            'name': name,
+            'holders': _listdir(os.path.join(base, 'holders')),
+            'slaves': _listdir(os.path.join(base, 'slaves')),
+            'parent': None,
+            'dm_name': None,
+            'kind': 'disk',
+        }
+        if os.path.exists(os.path.join(base, 'partition')):
+            node['kind'] = 'part'
+            node['parent'] = os.path.basename(os.path.dirname(os.path.realpath(base)))
+        elif os.path.isdir(os.path.join(base, 'dm')):
+            node['dm_name'] = _read(os.path.join(base, 'dm', 'name'))
+            dm_uuid = _read(os.path.join(base, 'dm', 'uuid')) or ''
+            node['kind'] = next((kind for prefix, kind in _DM_UUID_KINDS if dm_uuid.startswith(prefix)), 'dm')
+        elif os.path.isdir(os.path.join(base, 'md')):
+            node['kind'] = 'md'
+        elif name.startswith('loop'):
+            node['kind'] = 'loop'
+        return node
+
+    def path(self, name: str) -> str:
+        node = self.nodes.get(name)
+        if node and node['dm_name']:
+            return f"/dev/mapper/{node['dm_name']}"
+        return f"/dev/{name}"
+
+    def partitions(self, name: str) -> List[str]:
+        return [n for n, node in self.nodes.items() if node['parent'] == name]
+
+    def is_stacked(self, name: str) -> bool:
+        """True for logical devices built on others (md, dm)."""
+        node = self.nodes.get(name)
+        return bool(node and node['slaves'] and node['kind'] not in ('part',) + PHYSICAL_KINDS)
+
+    def members(self, name: str) -> List[str]:
+        """Whole physical disks a device is ultimately built on (itself if physical)."""
+        node = self.nodes.get(name)
+        if node is None:
+            return [name]
+        if node['kind'] == 'part':
+            return self.members(node['parent'])
+        if not node['slaves']:
+            return [name]
+        found: List[str] = []
+        for slave in node['slaves']:
+            for member in self.members(slave):
+                if member not in found:
+                    found.append(member)
+        return found
+
+    def holders_above(self, name: str) -> List[str]:
+        """Every stacked device using this disk or its partitions, directly or indirectly."""
+        seen: List[str] = []
+        pending = [name] + self.partitions(name)
+        while pending:
+            current = pending.pop()
+            for holder in self.nodes.get(current, {}).get('holders', []):
+                if holder not in seen:
+                    seen.append(holder)
+                    pending.append(holder)
+        return seen
+
+    def teardown_order(self, names: Set[str]) -> List[str]:
+        """Stacked devices ordered so each is removed before the devices it sits on."""
+        order: List[str] = []
+        remaining = set(names)
+        while remaining:
+            ready = sorted(n for n in remaining if not set(self.nodes[n]['holders']) & remaining)
+            if not ready:
+                raise StackError(f"Cycle in block device holders: {', '.join(sorted(remaining))}")
+            order.extend(ready)
+            remaining.difference_update(ready)
+        return order
+
+    def describe(self, name: str) -> str:
+        node = self.nodes.get(name, {})
+        label = node.get('dm_name') or name
+        return f"{node.get('kind', 'disk')} {label}"
+
+
+# ---------------------- Usage checks ----------------------
+def in_use_names() -> Dict[str, str]:
+    """Kernel names of mounted filesystems and active swap -> where they are used."""
+    used: Dict[str, str] = {}
+    for line in (_read('/proc/mounts') or '').splitlines():
+        parts = line.split()
+        if len(parts) > 1 and parts[0].startswith('/dev/'):
+            used[block_name(parts[0])] = parts[1]
+    for line in (_read('/proc/swaps') or '').splitlines()[1:]:  # first line is a header
+        parts = line.split()
+        if parts and parts[0].startswith('/dev/'):
+            used[block_name(parts[0])] = 'swap'
+    return used
+
+
+# ---------------------- Planning ----------------------
+def resolve_targets(devices: List[str], graph: Optional[StackGraph] = None) -> Dict:
+    """Expand requested devices to physical members and the stacks to tear down.
+
+    Returns {'members': [...], 'stacks': [...teardown order], 'member_of': {member: stack path}}.
+    Raises StackError when a stack would be left partially wiped or is still in use.
+    """
+    graph = graph or StackGraph()
+    members: List[str] = []
+    member_of: Dict[str, str] = {}
+    # Devices sysfs does not know (image files, other platforms) keep their given path
+    given: Dict[str, str] = {}
+    for device in devices:
+        name = block_name(device)
+        given.setdefault(name, device)
+        if graph.is_stacked(name):
+            for member in graph.members(name):
+                member_of.setdefault(member, graph.path(name))
+                if member not in members:
+                    members.append(member)
+        elif name not in members:
+            members.append(name)
+    stacks: Set[str] = set()
+    for member in members:
+        for holder in graph.holders_above(member):
+            if graph.nodes[member]['kind'] == 'part':
+                raise StackError(f"{graph.path(member)} is part of {graph.describe(holder)}; "
+                                 f"wipe {graph.path(holder)} or all of its member disks")
+            missing = [m for m in graph.members(holder) if m not in members]
+            if missing:
+                raise StackError(
+                    f"{graph.path(member)} belongs to {graph.describe(holder)}, which also spans "
+                    f"{', '.join(graph.path(m) for m in missing)}; add those devices or wipe {graph.path(holder)}")
+            stacks.add(holder)
+            member_of.setdefault(member, graph.path(holder))
+    used = in_use_names()
+    for name in sorted(stacks) + members + [p for m in members for p in graph.partitions(m)]:
+        if name in used:
+            raise StackError(f"{graph.path(name)} is in use ({used[name]}); unmount it first")
+    return {
+        'members': [graph.path(m) if m in graph.nodes else given[m] for m in members],
+        'stacks': [graph.path(n) for n in graph.teardown_order(stacks)],
+        'member_of': {graph.path(m): s for m, s in member_of.items()},
+    }
+
+
+def deactivate_stacks(plan: Dict, graph: Optional[StackGraph] = None,
+                      run: Callable = subprocess.run) -> List[str]:
+    """Tear down the stacks of a plan from the top; returns the commands run."""
+    graph = graph or StackGraph()
+    by_path = {graph.path(n): n for n in graph.nodes}
+    done: List[str] = []
+    for path in plan['stacks']:
+        name = by_path.get(path, block_name(path))
+        node = graph.nodes.get(name)
+        if node is None:
+            continue  # already gone
+        if node['kind'] == 'md':
+            cmd = ['mdadm', '--stop', graph.path(name)]
+        else:
+            cmd = ['dmsetup', 'remove', '--retry', node['dm_name'] or name]
+        try:
+            result = run(cmd, capture_output=True, text=True, timeout=60)
+        except (OSError, subprocess.SubprocessError) as e:
+            raise StackError(f"Could not run {cmd[0]} to deactivate {graph.path(name)}: {e}")
+        if result.returncode != 0:
+            raise StackError(f"{' '.join(cmd)} failed: {(result.stderr or result.stdout).strip()}")
+        done.append(' '.join(cmd))
+    # Members must be free of holders before anything is written to them
+    fresh = StackGraph(graph.root)
+    for path in plan['members']:
+        left = fresh.holders_above(block_name(path))
+        if left:
+            raise StackError(f"{path} is still held by {', '.join(fresh.path(h) for h in left)}")
+    return done
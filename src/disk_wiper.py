@@ -20,21 +20,341 @@ import platform
 import ctypes
 import subprocess
 import time
-from typing import Callable, List, Optional, Dict
+import errno
+import struct
+import bisect
+import mmap
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Dict, Tuple
+
+from device_stack import StackGraph
+from io_topology import local_buffer, numa_placement, pin_thread
+from signature_wipe import neutralize
+
+try:
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    CRYPTO_AVAILABLE = True
+except ImportError:
+    CRYPTO_AVAILABLE = False
 
 ProgressCallback = Optional[Callable[[int, int], None]]  # (written_bytes, total_bytes)
+Throttle = Optional[object]  # anything with consume(nbytes), e.g. io_topology.TokenBucket
+Stats = Optional[object]  # wipe_metrics.DeviceStats
+Trace = Optional[object]  # io_trace.IOTrace
 
 DEFAULT_BLOCK_SIZE = 8 * 1024 * 1024  # 8 MiB
+DEFAULT_SECTOR_SIZE = 512
+# Consecutive blocks without a single writable sector before the device is declared dead
+MAX_DEAD_BLOCKS = 4
+
+# Named overwrite passes usable in a pass plan; 'random' is generated per block and
+# 'zeroout' asks the device to zero itself (BLKZEROOUT), falling back to 'zeros'
+PASS_PATTERNS: Dict[str, bytes] = {
+    'zeros': b"\x00",
+    'ones': b"\xff",
+}
+PASS_NAMES = tuple(PASS_PATTERNS) + ('random', 'zeroout')
+ZERO_PASSES = ('zeros', 'zeroout')
+
+BLKZEROOUT = 0x127f  # _IO(0x12, 127)
+ZEROOUT_CHUNK = 256 * 1024 * 1024
+
+# Durability barriers: 'interval' syncs every barrier_interval bytes, 'pass' after
+# every pass, 'end' once before verification/certification (always done)
+BARRIER_POLICIES = ('interval', 'pass', 'end')
+DEFAULT_BARRIER_INTERVAL = 4 * 1024 ** 3
+DEFAULT_WRITE_BEHIND = 64 * 1024 * 1024
+SYNC_FILE_RANGE_WAIT_BEFORE = 1
+SYNC_FILE_RANGE_WRITE = 2
+SYNC_FILE_RANGE_WAIT_AFTER = 4
+_sync_file_range = None
+
+# Read-back of the random pass: none, evenly spaced samples, or the whole device
+RANDOM_VERIFY_MODES = ('none', 'sample', 'full')
+RANDOM_VERIFY_SAMPLES = 64
+RANDOM_VERIFY_SAMPLE_SIZE = 1024 * 1024
+
+
+class SectorRanges:
+    """Sorted, merged half-open LBA ranges of sectors that could not be written."""
+
+    def __init__(self, sector_size: int = DEFAULT_SECTOR_SIZE):
+        self.sector_size = sector_size
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        self.failed_writes = 0
+
+    def add_bytes(self, offset: int, length: int) -> None:
+        start = offset // self.sector_size
+        end = -(-(offset + length) // self.sector_size)
+        # Merge with every range that touches [start, end)
+        lo = bisect.bisect_left(self._ends, start)
+        hi = bisect.bisect_right(self._starts, end)
+        if lo < hi:
+            start = min(start, self._starts[lo])
+            end = max(end, self._ends[hi - 1])
+        self._starts[lo:hi] = [start]
+        self._ends[lo:hi] = [end]
+
+    def overlaps(self, offset: int, length: int) -> bool:
+        start = offset // self.sector_size
+        end = -(-(offset + length) // self.sector_size)
+        i = bisect.bisect_right(self._ends, start)
+        return i < len(self._starts) and self._starts[i] < end
+
+    def ranges(self) -> List[Tuple[int, int]]:
+        return list(zip(self._starts, self._ends))
+
+    def sector_count(self) -> int:
+        return sum(e - s for s, e in zip(self._starts, self._ends))
+
+    def format(self, limit: int = 32) -> str:
+        """Inclusive LBA list such as '2048-2055,9000', truncated after ``limit`` ranges."""
+        parts = [f"{s}-{e - 1}" if e - s > 1 else str(s) for s, e in self.ranges()[:limit]]
+        if len(self._starts) > limit:
+            parts.append(f"+{len(self._starts) - limit} more")
+        return ','.join(parts)
+
+    def __bool__(self) -> bool:
+        return bool(self._starts)
+
+
+class KeyedRandomStream:
+    """Random pass content as AES-256-CTR keystream under a key held only in memory.
+
+    The counter block is the byte offset divided by 16, so the expected
+    content of any range can be regenerated from its offset alone, in any
+    order and from several threads. The key is generated per wipe and never
+    stored; once the wipe object is gone the pattern cannot be reproduced.
+    """
+
+    def __init__(self, key: Optional[bytes] = None):
+        if not CRYPTO_AVAILABLE:
+            raise RuntimeError("Reproducible random passes require the 'cryptography' package")
+        self._algorithm = algorithms.AES(key or os.urandom(32))
+        self._zeros = b''
+
+    def block(self, offset: int, length: int) -> bytes:
+        skip = offset % 16
+        counter = (offset // 16).to_bytes(16, 'big')
+        encryptor = Cipher(self._algorithm, modes.CTR(counter)).encryptor()
+        if len(self._zeros) < skip + length:
+            self._zeros = bytes(skip + length)
+        data = encryptor.update(memoryview(self._zeros)[:skip + length])
+        return data[skip:] if skip else data
+
+
+def _load_sync_file_range():
+    global _sync_file_range
+    if _sync_file_range is None:
+        _sync_file_range = False
+        if platform.system().lower() == 'linux':
+            try:
+                fn = ctypes.CDLL(None, use_errno=True).sync_file_range
+                fn.argtypes = [ctypes.c_int, ctypes.c_longlong, ctypes.c_longlong, ctypes.c_uint]
+                fn.restype = ctypes.c_int
+                _sync_file_range = fn
+            except (OSError, AttributeError):
+                pass
+    return _sync_file_range
+
+
+class BarrierFailure(OSError):
+    """A write-behind wait or barrier reported an error for data written earlier.
+
+    Buffered writes only fail at writeback, so the error is attributed to
+    [start, end), the range of the current pass that no earlier barrier had
+    confirmed; start is None when nothing is outstanding.
+    """
+
+    def __init__(self, error: OSError, start: Optional[int] = None, end: Optional[int] = None):
+        super().__init__(error.errno, error.strerror or str(error))
+        self.start = start
+        self.end = end
+
+
+class WriteBarrier:
+    """Write-behind and durability barriers for one wipe, with the time they cost.
+
+    Write-behind starts writeback of each completed window with
+    sync_file_range and waits for the window before it, so dirty pages stay
+    bounded without a full flush. Barriers are fdatasync calls placed by the
+    policy; the final barrier is an fsync, which also flushes the drive's
+    volatile write cache. Errors from any of them raise BarrierFailure with
+    the range they cover.
+    """
+
+    def __init__(self, policy: str = 'end', interval: int = DEFAULT_BARRIER_INTERVAL,
+                 write_behind: int = DEFAULT_WRITE_BEHIND):
+        if policy not in BARRIER_POLICIES:
+            raise ValueError(f"Unknown barrier policy: {policy}")
+        self.policy = policy
+        self.interval = interval
+        self.write_behind = write_behind
+        self._sfr = _load_sync_file_range() if write_behind else None
+        self._window_start = 0
+        self._since_barrier = 0
+        # [start, end) written in the current pass and not yet confirmed by a wait or barrier
+        self._unsynced: Optional[List[int]] = None
+        self.seconds = 0.0
+        self.barriers = 0
+
+    def after_write(self, fd: int, offset: int, nbytes: int) -> None:
+        end = offset + nbytes
+        if self._unsynced is None or self._unsynced[1] != offset:
+            # A new pass; an unconfirmed tail of the previous one has just been overwritten
+            self._unsynced = [offset, end]
+        else:
+            self._unsynced[1] = end
+        if self._sfr and end - self._window_start >= self.write_behind:
+            start = self._window_start
+            self._sync_range(fd, start, end - start, SYNC_FILE_RANGE_WRITE)
+            confirmed = self._unsynced[0]
+            if start > confirmed:
+                # Wait for everything before the window just started
+                self._sync_range(fd, confirmed, start - confirmed,
+                                 SYNC_FILE_RANGE_WAIT_BEFORE | SYNC_FILE_RANGE_WRITE | SYNC_FILE_RANGE_WAIT_AFTER)
+                self._unsynced[0] = start
+            self._window_start = end
+        if self.policy == 'interval':
+            self._since_barrier += nbytes
+            if self._since_barrier >= self.interval:
+                self._sync(fd)
+
+    def end_pass(self, fd: int) -> None:
+        self._window_start = 0
+        if self.policy in ('interval', 'pass'):
+            self._sync(fd)
+
+    def final(self, device_path: str, system: str) -> None:
+        flags = os.O_RDWR | (os.O_BINARY if system == 'windows' else 0)
+        fd = os.open(device_path, flags)
+        try:
+            self._sync(fd, full=True)
+        finally:
+            os.close(fd)
+
+    def flush(self, fd: int) -> None:
+        """Unconditional data barrier, e.g. before reading a pass back."""
+        self._sync(fd)
+
+    def _sync_range(self, fd: int, offset: int, nbytes: int, flags: int) -> None:
+        if self._sfr(fd, offset, nbytes, flags) == 0:
+            return
+        err = ctypes.get_errno()
+        if err in (errno.EINVAL, errno.ESPIPE, errno.ENOSYS, errno.EOPNOTSUPP):
+            self._sfr = None  # not supported for this target; barriers still apply
+            return
+        self._fail(OSError(err, os.strerror(err)))
+
+    def _sync(self, fd: int, full: bool = False) -> None:
+        start = time.perf_counter()
+        try:
+            if full or not hasattr(os, 'fdatasync'):
+                os.fsync(fd)
+            else:
+                os.fdatasync(fd)
+        except OSError as e:
+            self._fail(e)
+        finally:
+            self.seconds += time.perf_counter() - start
+        self.barriers += 1
+        self._since_barrier = 0
+        self._unsynced = None
+
+    def _fail(self, error: OSError) -> None:
+        span, self._unsynced = self._unsynced, None  # handed to the caller to rewrite
+        raise BarrierFailure(error, *(span or (None, None)))
+
+    def report(self) -> Dict:
+        return {'barrier_policy': self.policy, 'barriers': self.barriers,
+                'barrier_seconds': round(self.seconds, 3)}
+
+
+class _SalvageWriter:
+    """O_DIRECT|O_DSYNC writes for retries and bisection.
+
+    Each write reaches the device before returning, so a failing sector
+    reports its error on that write rather than at a later writeback.
+    Falls back to O_DSYNC alone when direct I/O is refused.
+    """
+
+    def __init__(self, device_path: str, system: str, block_size: int):
+        self.device_path = device_path
+        self.flags = os.O_WRONLY | getattr(os, 'O_DSYNC', 0) | (os.O_BINARY if system == 'windows' else 0)
+        self.direct = getattr(os, 'O_DIRECT', 0)
+        self._buf: Optional[mmap.mmap] = None
+        try:
+            self.fd = os.open(device_path, self.flags | self.direct)
+        except OSError:
+            self._buffered()
+        if self.direct:
+            # Direct I/O needs an aligned buffer; anonymous mappings are page aligned
+            self._buf = mmap.mmap(-1, -(-block_size // 4096) * 4096)
+
+    def _buffered(self) -> None:
+        self.direct = 0
+        self.fd = os.open(self.device_path, self.flags)
+
+    def pwrite(self, data, offset: int) -> int:
+        if self.direct:
+            n = len(data)
+            self._buf[:n] = data
+            try:
+                return DiskWiper._pwrite(self.fd, memoryview(self._buf)[:n], offset)
+            except OSError as e:
+                if e.errno != errno.EINVAL:
+                    raise
+                # Alignment the device will not take directly (odd tail); retry synchronously buffered
+                os.close(self.fd)
+                self._buffered()
+        return DiskWiper._pwrite(self.fd, data, offset)
+
+    def close(self) -> None:
+        os.close(self.fd)
+        if self._buf is not None:
+            self._buf.close()
+
 
 class DiskWiper:
-    def __init__(self, block_size: int = DEFAULT_BLOCK_SIZE):
+    def __init__(self, block_size: int = DEFAULT_BLOCK_SIZE, tolerate_errors: bool = False,
+                 sector_retries: int = 2, block_timeout: float = 30.0, barrier: str = 'end',
+                 barrier_interval: int = DEFAULT_BARRIER_INTERVAL, write_behind: int = DEFAULT_WRITE_BEHIND,
+                 image_policy: str = 'zero-range', verify_threads: int = 4, neutralize: bool = True,
+                 numa: bool = False):
+        """``tolerate_errors`` bisects failed blocks down to single sectors, retries
+        each sector ``sector_retries`` times and records the ones that still fail
+        instead of aborting; ``block_timeout`` bounds the time spent salvaging one block.
+        ``barrier`` is one of BARRIER_POLICIES and ``write_behind`` the
+        sync_file_range window in bytes (0 disables it). Regular files (VM
+        images) are handed to image_wiper.ImageWiper with ``image_policy``.
+        ``verify_threads`` regenerate and compare the random pass in parallel.
+        ``neutralize`` first overwrites partition tables and filesystem
+        superblocks (signature_wipe) so the device is unusable from the start.
+        ``numa`` pins the threads wiping a device to the NUMA node of its
+        adapter and allocates their buffers there (no-op on single-node systems).
+        """
+        if barrier not in BARRIER_POLICIES:
+            raise ValueError(f"Unknown barrier policy: {barrier}")
         self.block_size = block_size
         self.system = platform.system().lower()
+        self.tolerate_errors = tolerate_errors
+        self.sector_retries = sector_retries
+        self.block_timeout = block_timeout
+        self.barrier = barrier
+        self.barrier_interval = barrier_interval
+        self.write_behind = write_behind
+        self.image_policy = image_policy
+        self.verify_threads = max(1, verify_threads)
+        self.neutralize = neutralize
+        self.numa = numa
 
     # ---------------------- Public API ----------------------
     def list_disks(self) -> List[Dict]:
         """Enumerate physical disks with model and size.
-        Returns list of dicts: {id, path, model, size_bytes}.
+        Returns list of dicts: {id, path, model, size_bytes}. On Linux, disks
+        also carry 'stack' (assembled arrays/volumes using them) and assembled
+        md/dm devices are listed with their physical 'members'.
         """
         if self.system == 'windows':
             return self._list_disks_windows()
@@ -43,27 +363,153 @@ class DiskWiper:
         else:
             return []
 
-    def wipe_clear(self, device_path: str, progress: ProgressCallback = None) -> None:
+    def wipe_clear(self, device_path: str, progress: ProgressCallback = None, trace: Trace = None) -> Dict:
         """NIST Clear: single pass of zeros across the entire device."""
-        total = self._get_device_size(device_path)
-        self._write_pattern(device_path, total, pattern=b"\x00", progress=progress)
+        return self.wipe_plan(device_path, ['zeros'], verify=False, progress=progress, trace=trace)
 
-    def wipe_purge(self, device_path: str, progress: ProgressCallback = None) -> None:
+    def wipe_purge(self, device_path: str, progress: ProgressCallback = None, trace: Trace = None) -> Dict:
         """NIST Purge: multi-pass (random, zeros) with lightweight verification."""
+        return self.wipe_plan(device_path, ['random', 'zeros'], verify=True, progress=progress, trace=trace)
+
+    def wipe_plan(self, device_path: str, passes: List[str], verify: bool = False,
+                  progress: ProgressCallback = None, throttle: Throttle = None,
+                  stats: Stats = None, trace: Trace = None, verify_random: str = 'none') -> Dict:
+        """Run an explicit pass plan, e.g. ['random', 'zeros'].
+
+        Verification samples the device after the last pass and requires the
+        plan to end with 'zeros'. ``throttle`` is consulted before every block
+        so wipes sharing a link can share a bandwidth budget; ``stats``
+        receives per-pass counters for the metrics endpoint and ``trace``
+        (io_trace.IOTrace) per-I/O latencies. ``verify_random`` ('sample' or
+        'full') reads each random pass back right after it is written and
+        compares it with the regenerated keystream.
+
+        Returns a coverage report: total_bytes, sector_size, unwritable_bytes,
+        unwritable_ranges (half-open LBA pairs, merged over all passes) and
+        coverage (fraction of the device overwritten by every pass), plus the
+        barrier policy, barrier count and seconds spent in barriers,
+        'neutralized' (the metadata phase report, or None) and 'numa_node'
+        (the node the wipe was pinned to, or None). Data is flushed to
+        stable media before verification and before returning.
+        """
+        unknown = [p for p in passes if p not in PASS_NAMES]
+        if unknown or not passes:
+            raise ValueError(f"Invalid pass plan: {passes}")
+        if verify and passes[-1] not in ZERO_PASSES:
+            raise ValueError("Verification requires the final pass to be 'zeros' or 'zeroout'")
+        if verify_random not in RANDOM_VERIFY_MODES:
+            raise ValueError(f"Unknown random verification mode: {verify_random}")
+        if os.path.isfile(device_path):
+            from image_wiper import ImageWiper
+            image = ImageWiper(self.block_size, self.image_policy, self.barrier, self.barrier_interval,
+                               self.write_behind)
+            return image.wipe_plan(
+                device_path, passes, verify=verify, progress=progress, throttle=throttle, stats=stats, trace=trace,
+                verify_random=verify_random)
+        if verify_random != 'none' and not CRYPTO_AVAILABLE and 'random' in passes:
+            raise RuntimeError("Random pass verification requires the 'cryptography' package")
         total = self._get_device_size(device_path)
-        # Pass 1: random
-        self._write_random(device_path, total, progress=progress)
-        # Pass 2: zeros
-        self._write_pattern(device_path, total, pattern=b"\x00", progress=progress)
-        # Verify sample sectors (read back a few offsets)
-        self._verify_zeros(device_path, total)
+        # Pin before anything is allocated so buffers and keystream land on the device's node
+        placement = numa_placement(device_path) if self.numa else None
+        cpus = placement[1] if placement else None
+        previous_cpus = pin_thread(cpus) if cpus else None
+        bad = SectorRanges(self._get_sector_size(device_path)) if self.tolerate_errors else None
+        barrier = WriteBarrier(self.barrier, self.barrier_interval, self.write_behind)
+        # Key lives only in this call; without cryptography the pass falls back to os.urandom
+        stream = KeyedRandomStream() if CRYPTO_AVAILABLE and 'random' in passes else None
+        random_checked = 0
+        neutralized = None
+        if stats:
+            user_progress = progress
+
+            def progress(written: int, total_bytes: int) -> None:
+                stats.set_written(written)
+                if user_progress:
+                    user_progress(written, total_bytes)
+        try:
+            if self.neutralize:
+                if trace:
+                    trace.begin_pass('neutralize')
+                neutralized = neutralize(device_path, total, self._get_sector_size(device_path), trace=trace)
+            for index, name in enumerate(passes):
+                if stats:
+                    stats.begin_pass(index, name, total, len(passes))
+                if trace:
+                    trace.begin_pass(name)
+                failed_before = bad.failed_writes if bad is not None else 0
+                if name == 'random':
+                    self._write_random(device_path, total, progress=progress, throttle=throttle, trace=trace,
+                                       bad=bad, barrier=barrier, stream=stream)
+                    if verify_random != 'none':
+                        if trace:
+                            trace.begin_pass('verify-random')
+                        checked = self._verify_random(device_path, total, stream, verify_random, barrier, bad,
+                                                      cpus=cpus)
+                        random_checked += checked
+                        if stats:
+                            stats.add_verified(checked)
+                elif name == 'zeroout':
+                    self._zero_out(device_path, total, progress=progress, throttle=throttle, trace=trace, bad=bad,
+                                   barrier=barrier)
+                else:
+                    self._write_pattern(device_path, total, pattern=PASS_PATTERNS[name], progress=progress,
+                                        throttle=throttle, trace=trace, bad=bad, barrier=barrier, cpus=cpus)
+                if stats and bad is not None and bad.failed_writes > failed_before:
+                    stats.add_error(bad.failed_writes - failed_before)
+            self._barrier_step(lambda: barrier.final(device_path, self.system), device_path, bad,
+                               self._pass_data(passes[-1], stream))
+            if stats:
+                stats.barrier_seconds = barrier.seconds
+            if verify:
+                # Verify sample sectors (read back a few offsets)
+                if trace:
+                    trace.begin_pass('verify')
+                checked = self._verify_zeros(device_path, total, trace=trace, bad=bad)
+                if stats:
+                    stats.add_verified(checked)
+        except OSError:
+            if stats:
+                stats.add_error()
+            raise
+        finally:
+            if stats:
+                stats.finish()
+            if previous_cpus:
+                # Pool threads (AsyncWiper) go on to wipe other devices
+                pin_thread(previous_cpus)
+        return dict(self._coverage_report(total, bad), random_verify=verify_random,
+                    random_verified_bytes=random_checked, neutralized=neutralized,
+                    numa_node=placement[0] if placement else None, **barrier.report())
+
+    @staticmethod
+    def _coverage_report(total: int, bad: Optional[SectorRanges]) -> Dict:
+        sector_size = bad.sector_size if bad is not None else DEFAULT_SECTOR_SIZE
+        unwritable = min(total, bad.sector_count() * sector_size) if bad else 0
+        return {
+            'total_bytes': total,
+            'sector_size': sector_size,
+            'unwritable_bytes': unwritable,
+            'unwritable_ranges': bad.ranges() if bad else [],
+            'bad_sectors': bad.format() if bad else '',
+            'coverage': (total - unwritable) / total if total else 1.0,
+        }
 
     # ---------------------- Internals ----------------------
-    def _write_pattern(self, device_path: str, total: int, pattern: bytes, progress: ProgressCallback) -> None:
-        block = pattern * (self.block_size // len(pattern))
+    def _write_pattern(self, device_path: str, total: int, pattern: bytes, progress: ProgressCallback,
+                       throttle: Throttle = None, trace: Trace = None, bad: Optional[SectorRanges] = None,
+                       barrier: Optional[WriteBarrier] = None, cpus: Optional[set] = None) -> None:
+        if cpus:
+            # Filled by this (pinned) thread, so the pages are local to the device's node
+            block = local_buffer(pattern, self.block_size)
+        else:
+            block = pattern * (self.block_size // len(pattern))
         if len(block) == 0:
             block = b"\x00"
+
+        def data(offset: int, length: int):
+            return block[:length] if length <= len(block) else pattern * length
         written = 0
+        dead_blocks = 0
         flags = os.O_RDWR
         if self.system == 'windows':
             flags |= os.O_BINARY
@@ -77,17 +523,39 @@ class DiskWiper:
                     buf = block[:to_write]
                 else:
                     buf = block
-                n = os.write(fd, buf)
-                if n <= 0:
-                    raise OSError("Short write while wiping")
+                if throttle:
+                    throttle.consume(to_write)
+                try:
+                    if trace:
+                        n = self._traced_write(fd, buf, written, trace)
+                    else:
+                        n = os.write(fd, buf)
+                    if n <= 0:
+                        raise OSError("Short write while wiping")
+                except OSError:
+                    if bad is None:
+                        raise
+                    dead_blocks = self._salvage_block(device_path, buf, written, bad, dead_blocks)
+                    n = len(buf)
+                    os.lseek(fd, written + n, os.SEEK_SET)
+                if barrier:
+                    self._barrier_step(lambda: barrier.after_write(fd, written, n), device_path, bad, data)
                 written += n
                 if progress:
                     progress(written, total)
+            if barrier:
+                self._barrier_step(lambda: barrier.end_pass(fd), device_path, bad, data)
         finally:
             os.close(fd)
+            if isinstance(block, mmap.mmap):
+                block.close()
 
-    def _write_random(self, device_path: str, total: int, progress: ProgressCallback) -> None:
+    def _write_random(self, device_path: str, total: int, progress: ProgressCallback,
+                      throttle: Throttle = None, trace: Trace = None, bad: Optional[SectorRanges] = None,
+                      barrier: Optional[WriteBarrier] = None, stream: Optional[KeyedRandomStream] = None) -> None:
         written = 0
+        dead_blocks = 0
+        data = self._pass_data('random', stream)
         flags = os.O_RDWR
         if self.system == 'windows':
             flags |= os.O_BINARY
@@ -96,34 +564,278 @@ class DiskWiper:
             os.lseek(fd, 0, os.SEEK_SET)
             while written < total:
                 to_write = min(self.block_size, total - written)
-                rnd = os.urandom(to_write)
-                n = os.write(fd, rnd)
-                if n <= 0:
-                    raise OSError("Short write while wiping (random)")
+                rnd = stream.block(written, to_write) if stream else os.urandom(to_write)
+                if throttle:
+                    throttle.consume(to_write)
+                try:
+                    if trace:
+                        n = self._traced_write(fd, rnd, written, trace)
+                    else:
+                        n = os.write(fd, rnd)
+                    if n <= 0:
+                        raise OSError("Short write while wiping (random)")
+                except OSError:
+                    if bad is None:
+                        raise
+                    dead_blocks = self._salvage_block(device_path, rnd, written, bad, dead_blocks)
+                    n = len(rnd)
+                    os.lseek(fd, written + n, os.SEEK_SET)
+                if barrier:
+                    self._barrier_step(lambda: barrier.after_write(fd, written, n), device_path, bad, data)
                 written += n
                 if progress:
                     progress(written, total)
+            if barrier:
+                self._barrier_step(lambda: barrier.end_pass(fd), device_path, bad, data)
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _traced_write(fd: int, buf: bytes, offset: int, trace) -> int:
+        start = time.perf_counter_ns()
+        try:
+            n = os.write(fd, buf)
+        except OSError as e:
+            trace.record(offset, len(buf), time.perf_counter_ns() - start, e.errno or 0)
+            raise
+        trace.record(offset, len(buf), time.perf_counter_ns() - start)
+        return n
+
+    def _zero_out(self, device_path: str, total: int, progress: ProgressCallback,
+                  throttle: Throttle = None, trace: Trace = None, bad: Optional[SectorRanges] = None,
+                  barrier: Optional[WriteBarrier] = None) -> None:
+        # Offloaded zeroing; devices or kernels without it get an ordinary zeros pass
+        if self.system != 'linux':
+            self._write_pattern(device_path, total, PASS_PATTERNS['zeros'], progress, throttle, trace, bad, barrier)
+            return
+        import fcntl
+        fd = os.open(device_path, os.O_RDWR)
+        try:
+            done = 0
+            while done < total:
+                length = min(ZEROOUT_CHUNK, total - done)
+                if throttle:
+                    throttle.consume(length)
+                start = time.perf_counter_ns()
+                try:
+                    fcntl.ioctl(fd, BLKZEROOUT, struct.pack('QQ', done, length))
+                except OSError as e:
+                    if done == 0 and e.errno in (errno.ENOTTY, errno.EOPNOTSUPP, errno.EINVAL):
+                        break
+                    if bad is None:
+                        raise
+                    # Zero the failed range block by block so bad sectors are isolated
+                    self._salvage_range(device_path, done, done + length, bad, self._pass_data('zeros'))
+                if trace:
+                    trace.record(done, length, time.perf_counter_ns() - start)
+                done += length
+                if progress:
+                    progress(done, total)
+            else:
+                if barrier:
+                    self._barrier_step(lambda: barrier.end_pass(fd), device_path, bad, self._pass_data('zeros'))
+                return
+        finally:
+            os.close(fd)
+        self._write_pattern(device_path, total, PASS_PATTERNS['zeros'], progress, throttle, trace, bad, barrier)
+
+    def _verify_random(self, device_path: str, total: int, stream: KeyedRandomStream, mode: str,
+                       barrier: WriteBarrier, bad: Optional[SectorRanges] = None,
+                       cpus: Optional[set] = None) -> int:
+        """Read the random pass back and compare it with the regenerated keystream.
+
+        Uses O_DIRECT where available so the comparison sees the media rather
+        than the page cache; returns bytes checked.
+        """
+        fd = os.open(device_path, os.O_RDWR | (os.O_BINARY if self.system == 'windows' else 0))
+        try:
+            self._barrier_step(lambda: barrier.flush(fd), device_path, bad, self._pass_data('random', stream))
+        finally:
+            os.close(fd)
+        chunk = RANDOM_VERIFY_SAMPLE_SIZE if mode == 'sample' else self.block_size
+        if mode == 'sample':
+            step = max(total // RANDOM_VERIFY_SAMPLES, chunk)
+            offsets = sorted({min(step * i, max(0, total - chunk)) // 4096 * 4096
+                              for i in range(RANDOM_VERIFY_SAMPLES)})
+        else:
+            offsets = list(range(0, total, chunk))
+        offsets = [o for o in offsets if not (bad and bad.overlaps(o, min(chunk, total - o)))]
+        direct = getattr(os, 'O_DIRECT', 0)
+        try:
+            fd = os.open(device_path, os.O_RDONLY | direct)
+        except OSError:
+            direct = 0
+            fd = os.open(device_path, os.O_RDONLY | (os.O_BINARY if self.system == 'windows' else 0))
+
+        def check(offset: int) -> int:
+            length = min(chunk, total - offset)
+            if direct and hasattr(os, 'preadv'):
+                # O_DIRECT needs an aligned buffer and an aligned length
+                buf = mmap.mmap(-1, -(-length // 4096) * 4096)
+                try:
+                    n = os.preadv(fd, [buf], offset)
+                    data = buf[:min(n, length)]
+                finally:
+                    buf.close()
+            elif hasattr(os, 'pread'):
+                data = os.pread(fd, length, offset)
+            else:
+                os.lseek(fd, offset, os.SEEK_SET)
+                data = os.read(fd, length)
+            if data != stream.block(offset, length):
+                raise IOError(f"Random pass verification failed at offset {offset}")
+            return length
+
+        try:
+            if self.verify_threads > 1 and len(offsets) > 1 and self.system != 'windows':
+                with ThreadPoolExecutor(self.verify_threads, initializer=pin_thread if cpus else None,
+                                        initargs=(cpus,) if cpus else ()) as pool:
+                    return sum(pool.map(check, offsets))
+            return sum(check(o) for o in offsets)
         finally:
             os.close(fd)
 
-    def _verify_zeros(self, device_path: str, total: int) -> None:
-        # Read a few evenly spaced sectors and ensure they are zeroed
+    # ---------------------- Bad sector handling ----------------------
+    @staticmethod
+    def _pwrite(fd: int, data, offset: int) -> int:
+        if hasattr(os, 'pwrite'):
+            return os.pwrite(fd, data, offset)
+        os.lseek(fd, offset, os.SEEK_SET)
+        return os.write(fd, data)
+
+    @staticmethod
+    def _pass_data(name: str, stream: Optional[KeyedRandomStream] = None) -> Callable[[int, int], bytes]:
+        """Content of a pass at (offset, length), to rewrite ranges after an error."""
+        if name == 'random':
+            return stream.block if stream else lambda offset, length: os.urandom(length)
+        pattern = PASS_PATTERNS.get(name, PASS_PATTERNS['zeros'])
+        return lambda offset, length: pattern * (length // len(pattern))
+
+    def _barrier_step(self, step: Callable[[], None], device_path: str, bad: Optional[SectorRanges],
+                      data: Callable[[int, int], bytes]) -> None:
+        """Run a write-behind/barrier step; with error tolerance, rewrite the range a failure covers."""
+        try:
+            step()
+        except BarrierFailure as e:
+            if bad is None or e.start is None:
+                raise
+            bad.failed_writes += 1
+            self._salvage_range(device_path, e.start, e.end, bad, data)
+
+    def _salvage_range(self, device_path: str, start: int, end: int, bad: SectorRanges,
+                       data: Callable[[int, int], bytes]) -> None:
+        """Rewrite [start, end) block by block with synchronous writes, bisecting blocks that fail."""
+        writer = _SalvageWriter(device_path, self.system, self.block_size)
+        try:
+            dead_blocks = 0
+            for off in range(start, end, self.block_size):
+                dead_blocks = self._salvage_block(device_path, data(off, min(self.block_size, end - off)), off,
+                                                  bad, dead_blocks, writer=writer, failed=False)
+        finally:
+            writer.close()
+
+    def _salvage_block(self, device_path: str, buf: bytes, offset: int, bad: SectorRanges, dead_blocks: int,
+                       writer: Optional[_SalvageWriter] = None, failed: bool = True) -> int:
+        """Rewrite a block by bisection, recording sectors that stay unwritable.
+
+        Writes go through an O_DIRECT|O_DSYNC _SalvageWriter so each one
+        reports its own error. ``failed`` means the block already failed once,
+        so bisection starts right away. Returns the updated count of
+        consecutive blocks in which nothing could be written; raises OSError
+        once that reaches MAX_DEAD_BLOCKS.
+        """
+        if writer is None:
+            writer = _SalvageWriter(device_path, self.system, self.block_size)
+            try:
+                return self._salvage_block(device_path, buf, offset, bad, dead_blocks, writer, failed)
+            finally:
+                writer.close()
+        sector = bad.sector_size
+        deadline = time.monotonic() + self.block_timeout
+        if failed:
+            bad.failed_writes += 1
+        salvaged = 0
+        # A block that already failed once starts with its two halves
+        pending = [(offset, memoryview(buf))]
+        first = failed
+        while pending:
+            off, chunk = pending.pop()
+            if time.monotonic() > deadline:
+                bad.add_bytes(off, len(chunk))
+                continue
+            if len(chunk) <= sector:
+                if self._retry_sector(writer, chunk, off, bad, deadline):
+                    salvaged += len(chunk)
+                else:
+                    bad.add_bytes(off, len(chunk))
+                continue
+            if not first:
+                try:
+                    n = writer.pwrite(chunk, off)
+                    if n > 0:
+                        salvaged += n
+                        if n < len(chunk):
+                            pending.append((off + n, chunk[n:]))
+                        continue
+                except OSError:
+                    bad.failed_writes += 1
+            first = False
+            # Split on a sector boundary; the upper half is pushed first so the lower runs first
+            half = max(sector, (len(chunk) // 2) // sector * sector)
+            pending.append((off + half, chunk[half:]))
+            pending.append((off, chunk[:half]))
+        if salvaged:
+            return 0
+        dead_blocks += 1
+        if dead_blocks >= MAX_DEAD_BLOCKS:
+            raise OSError(f"Device stopped accepting writes near offset {offset}")
+        return dead_blocks
+
+    def _retry_sector(self, writer: _SalvageWriter, chunk, offset: int, bad: SectorRanges,
+                      deadline: float) -> bool:
+        for attempt in range(self.sector_retries + 1):
+            try:
+                if writer.pwrite(chunk, offset) == len(chunk):
+                    return True
+            except OSError:
+                pass
+            bad.failed_writes += 1
+            if time.monotonic() > deadline:
+                break
+            if attempt < self.sector_retries:
+                time.sleep(0.01 * (attempt + 1))
+        return False
+
+    def _verify_zeros(self, device_path: str, total: int, trace: Trace = None,
+                      bad: Optional[SectorRanges] = None) -> int:
+        # Read a few evenly spaced sectors and ensure they are zeroed; returns bytes checked
         samples = 8
         step = max(total // samples, 512)
         size = 4096
         flags = os.O_RDONLY
         if self.system == 'windows':
             flags |= os.O_BINARY
+        checked = 0
         fd = os.open(device_path, flags)
         try:
             for i in range(samples):
                 offset = min(step * i, max(0, total - size))
+                if bad and bad.overlaps(offset, size):
+                    # Unwritable sectors are reported separately and cannot be read back either
+                    continue
                 os.lseek(fd, offset, os.SEEK_SET)
-                data = os.read(fd, size)
+                if trace:
+                    start = time.perf_counter_ns()
+                    data = os.read(fd, size)
+                    trace.record(offset, size, time.perf_counter_ns() - start)
+                else:
+                    data = os.read(fd, size)
                 if any(b != 0 for b in data):
                     raise IOError(f"Verification failed at offset {offset}")
+                checked += len(data)
         finally:
             os.close(fd)
+        return checked
 
     # ---------------------- Enumeration ----------------------
     def _list_disks_windows(self) -> List[Dict]:
@@ -180,11 +892,39 @@ class DiskWiper:
                     'model': model or device,
                     'size_bytes': size_bytes,
                 })
+            graph = StackGraph()
+            for disk in disks:
+                disk['stack'] = [graph.path(h) for h in graph.holders_above(disk['id'])
+                                 if not graph.nodes[h]['holders']]
+            # Assembled arrays and volumes are offered as one target, wiped through their members
+            for name, node in graph.nodes.items():
+                if graph.is_stacked(name) and not node['holders']:
+                    members = graph.members(name)
+                    disks.append({
+                        'id': name,
+                        'path': graph.path(name),
+                        'model': f"{graph.describe(name)} on {', '.join(members)}",
+                        'size_bytes': self._get_device_size(graph.path(name)),
+                        'members': [graph.path(m) for m in members],
+                    })
         except Exception:
             pass
         return disks
 
     # ---------------------- Size helpers ----------------------
+    def _get_sector_size(self, device_path: str) -> int:
+        """Logical sector size from sysfs (partitions use their parent's queue)."""
+        if self.system == 'linux':
+            name = os.path.basename(os.path.realpath(device_path))
+            base = os.path.join('/sys/class/block', name)
+            for queue in (os.path.join(base, 'queue'), os.path.join(base, '..', 'queue')):
+                try:
+                    with open(os.path.join(queue, 'logical_block_size')) as f:
+                        return int(f.read().strip())
+                except (OSError, ValueError):
+                    continue
+        return DEFAULT_SECTOR_SIZE
+
     def _get_device_size(self, device_path: str) -> int:
         if self.system == 'windows':
             return self._get_device_size_windows(device_path)
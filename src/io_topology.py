@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+OBLIVION I/O Topology and Scheduling Helpers (Production)
+
+Groups block devices by the shared link they hang off (SAS/SATA HBA, USB
+hub) using the sysfs device path, hands out one token bucket per link so
+concurrent wipes share a bandwidth budget instead of saturating it, sets
+the Linux I/O priority class of wipe worker threads, and pins those threads
+to the NUMA node of the device's host adapter so their buffers are
+allocated there.
+
+All helpers degrade to no-ops on platforms without sysfs, ioprio_set or
+sched_setaffinity, and NUMA placement does nothing on single-node machines.
+"""
+
+from __future__ import annotations
+import os
+import re
+import glob
+import mmap
+import time
+import ctypes
+import platform
+import threading
+from typing import Dict, Optional, Set, Tuple
+
+_USB_DEVICE = re.compile(r'^\d+-[\d.]+$')
+_SCSI_HOST = re.compile(r'^host\d+$')
+
+# ioprio_set syscall numbers per architecture
+_IOPRIO_SET_NR = {
+    'x86_64': 251, 'amd64': 251,
+    'i386': 289, 'i686': 289,
+    'aarch64': 30, 'arm64': 30,
+    'armv7l': 314,
+    'ppc64le': 273, 'ppc64': 273,
+    'riscv64': 30,
+}
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_CLASS_SHIFT = 13
+IOPRIO_CLASSES = {'rt': 1, 'be': 2, 'idle': 3}
+NODE_ROOT = '/sys/devices/system/node'
+LOCAL_FILL_CHUNK = 1024 * 1024
+
+
+# ---------------------- Topology ----------------------
+def _block_name(device_path: str) -> str:
+    return os.path.basename(os.path.realpath(device_path))
+
+
+def sysfs_device_path(device_path: str) -> Optional[str]:
+    """Resolved /sys/devices/... path of a block device, or None."""
+    link = os.path.join('/sys/block', _block_name(device_path), 'device')
+    if not os.path.exists(link):
+        return None
+    return os.path.realpath(link)
+
+
+def link_group(device_path: str) -> str:
+    """Key naming the shared link a device is attached through.
+
+    USB devices group by their parent hub, SCSI/SATA/SAS devices by their
+    host adapter; NVMe and anything unrecognized get a group of their own.
+    """
+    sys_path = sysfs_device_path(device_path)
+    if not sys_path:
+        return device_path
+    parts = sys_path.split('/')
+    usb = [i for i, p in enumerate(parts) if _USB_DEVICE.match(p)]
+    if usb:
+        return '/'.join(parts[:usb[-1]])
+    hosts = [i for i, p in enumerate(parts) if _SCSI_HOST.match(p)]
+    if hosts:
+        return '/'.join(parts[:hosts[0] + 1])
+    return sys_path
+
+
+def group_devices(device_paths) -> Dict[str, list]:
+    groups: Dict[str, list] = {}
+    for path in device_paths:
+        groups.setdefault(link_group(path), []).append(path)
+    return groups
+
+
+# ---------------------- Bandwidth ----------------------
+class TokenBucket:
+    """Thread-safe byte budget: ``rate`` bytes/s with up to ``burst`` bytes banked."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else rate)
+        self._tokens = self.burst
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited = 0.0
+
+    def consume(self, amount: int) -> None:
+        """Block until ``amount`` bytes may be written."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            # Take the tokens now (possibly going negative) so waiters queue fairly
+            self._tokens -= amount
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.waited += delay
+        if delay > 0:
+            time.sleep(delay)
+
+
+class LinkBudget:
+    """One shared TokenBucket per link group."""
+
+    def __init__(self, bytes_per_second: float):
+        self.bytes_per_second = bytes_per_second
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket_for(self, device_path: str) -> TokenBucket:
+        group = link_group(device_path)
+        with self._lock:
+            if group not in self._buckets:
+                self._buckets[group] = TokenBucket(self.bytes_per_second)
+            return self._buckets[group]
+
+
+# ---------------------- I/O priority ----------------------
+def parse_io_class(spec: str) -> tuple:
+    """'idle', 'be', 'be:7' or 'rt:0' -> (class, level)."""
+    name, _, level = spec.partition(':')
+    if name not in IOPRIO_CLASSES:
+        raise ValueError(f"Unknown I/O class: {name}")
+    return name, int(level) if level else 4
+
+
+def set_io_priority(io_class: str = 'be', level: int = 4) -> bool:
+    """Set the calling thread's I/O scheduling class; False if unsupported."""
+    if platform.system().lower() != 'linux':
+        return False
+    nr = _IOPRIO_SET_NR.get(platform.machine().lower())
+    if nr is None:
+        return False
+    value = (IOPRIO_CLASSES[io_class] << IOPRIO_CLASS_SHIFT) | (0 if io_class == 'idle' else level & 7)
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        return libc.syscall(nr, IOPRIO_WHO_PROCESS, threading.get_native_id(), value) == 0
+    except (OSError, AttributeError):
+        return False
+
+
+# ---------------------- NUMA placement ----------------------
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def parse_cpulist(text: str) -> Set[int]:
+    """Kernel cpulist format, e.g. '0-7,16-23' -> {0, ..., 7, 16, ..., 23}."""
+    cpus: Set[int] = set()
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        cpus.update(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def numa_node_count() -> int:
+    return len(glob.glob(os.path.join(NODE_ROOT, 'node[0-9]*')))
+
+
+def device_numa_node(device_path: str) -> Optional[int]:
+    """NUMA node of the adapter a block device hangs off, or None if unknown.
+
+    The block device itself has no numa_node; the nearest PCI ancestor
+    (HBA, NVMe controller) does, so walk up the sysfs device path.
+    """
+    path = sysfs_device_path(device_path)
+    while path and path.startswith('/sys/devices/'):
+        value = _read(os.path.join(path, 'numa_node'))
+        if value is not None and value.lstrip('-').isdigit():
+            node = int(value)
+            return node if node >= 0 else None  # -1: firmware did not report one
+        path = os.path.dirname(path)
+    return None
+
+
+def numa_placement(device_path: str) -> Optional[Tuple[int, Set[int]]]:
+    """(node, cpus) to pin a device's wipe threads to, or None when pinning would not help.
+
+    The CPU set is limited to CPUs the process may already use (cpusets).
+    """
+    if not hasattr(os, 'sched_setaffinity') or numa_node_count() < 2:
+        return None
+    node = device_numa_node(device_path)
+    if node is None:
+        return None
+    cpulist = _read(os.path.join(NODE_ROOT, f'node{node}', 'cpulist'))
+    if not cpulist:
+        return None
+    cpus = parse_cpulist(cpulist) & os.sched_getaffinity(0)
+    return (node, cpus) if cpus else None
+
+
+def pin_thread(cpus: Set[int]) -> Optional[Set[int]]:
+    """Restrict the calling thread to ``cpus``; returns its previous CPU set, None if unsupported."""
+    if not hasattr(os, 'sched_setaffinity'):
+        return None
+    try:
+        previous = os.sched_getaffinity(0)
+        os.sched_setaffinity(0, cpus)  # pid 0 is the calling thread on Linux
+        return previous
+    except OSError:
+        return None
+
+
+def local_buffer(pattern: bytes, size: int) -> mmap.mmap:
+    """Anonymous mapping filled with ``pattern`` by the calling thread.
+
+    Pages are placed on the node of the thread that first touches them, so a
+    pinned thread gets a node-local buffer. Close it when done.
+    """
+    buf = mmap.mmap(-1, size)
+    chunk = pattern * max(1, LOCAL_FILL_CHUNK // len(pattern))
+    for off in range(0, size, len(chunk)):
+        n = min(len(chunk), size - off)
+        buf[off:off + n] = chunk[:n]
+    return buf
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+OBLIVION I/O Latency Tracing (Production)
+
+Per-pass latency histograms for the DiskWiper write and read loops, plus an
+opt-in fixed-size ring buffer of individual I/O events.
+
+- LatencyHistogram: HDR-style log-linear buckets (32 sub-buckets per power
+  of two, about 3% relative error) over microseconds; recording is an index
+  computation and one list increment.
+- TraceRing: preallocated bytearray of fixed-size records
+  (offset u64, size u32, latency_us u32, errno i32); the oldest events are
+  overwritten once it is full. Dumps to a compact binary file or JSON.
+
+When no IOTrace is passed to DiskWiper the loops skip all of this.
+"""
+
+from __future__ import annotations
+import json
+import struct
+from typing import Dict, List, Optional
+
+SUB_BITS = 5
+SUB_COUNT = 1 << SUB_BITS
+MAX_SHIFT = 40  # covers latencies up to ~12 days in microseconds
+BUCKETS = 2 * SUB_COUNT + MAX_SHIFT * SUB_COUNT
+
+TRACE_MAGIC = b'OBTR'
+TRACE_VERSION = 1
+_EVENT = struct.Struct('<QIIi')
+_HEADER = struct.Struct('<4sHHQQ')  # magic, version, record size, events stored, events seen
+
+
+class LatencyHistogram:
+    __slots__ = ('counts', 'total', 'sum_us', 'min_us', 'max_us')
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.total = 0
+        self.sum_us = 0
+        self.min_us = 0
+        self.max_us = 0
+
+    @staticmethod
+    def _index(us: int) -> int:
+        if us < 2 * SUB_COUNT:
+            return us
+        shift = min(us.bit_length() - 1 - SUB_BITS, MAX_SHIFT)
+        top = min(us >> shift, 2 * SUB_COUNT - 1)
+        return 2 * SUB_COUNT + (shift - 1) * SUB_COUNT + (top - SUB_COUNT)
+
+    @staticmethod
+    def _lower_bound(index: int) -> int:
+        if index < 2 * SUB_COUNT:
+            return index
+        shift, top = divmod(index - 2 * SUB_COUNT, SUB_COUNT)
+        return (top + SUB_COUNT) << (shift + 1)
+
+    def record(self, latency_ns: int) -> None:
+        us = latency_ns // 1000
+        self.counts[self._index(us)] += 1
+        if self.total == 0 or us < self.min_us:
+            self.min_us = us
+        if us > self.max_us:
+            self.max_us = us
+        self.total += 1
+        self.sum_us += us
+
+    def percentile(self, pct: float) -> int:
+        """Latency (us) at or below which ``pct`` percent of samples fall."""
+        if self.total == 0:
+            return 0
+        rank = max(1, int(round(pct / 100.0 * self.total)))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self._lower_bound(index), self.max_us)
+        return self.max_us
+
+    def summary(self) -> Dict:
+        return {
+            'count': self.total,
+            'min_us': self.min_us,
+            'mean_us': round(self.sum_us / self.total, 1) if self.total else 0,
+            'p50_us': self.percentile(50),
+            'p90_us': self.percentile(90),
+            'p99_us': self.percentile(99),
+            'p999_us': self.percentile(99.9),
+            'max_us': self.max_us,
+        }
+
+
+class TraceRing:
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("TraceRing capacity must be positive")
+        self.capacity = capacity
+        self._buf = bytearray(capacity * _EVENT.size)
+        self.seen = 0
+
+    def append(self, offset: int, size: int, latency_us: int, errno: int = 0) -> None:
+        slot = self.seen % self.capacity
+        _EVENT.pack_into(self._buf, slot * _EVENT.size, offset, size, min(latency_us, 0xffffffff), errno)
+        self.seen += 1
+
+    def events(self) -> List[tuple]:
+        """Stored events, oldest first."""
+        stored = min(self.seen, self.capacity)
+        start = self.seen % self.capacity if self.seen > self.capacity else 0
+        return [_EVENT.unpack_from(self._buf, ((start + i) % self.capacity) * _EVENT.size)
+                for i in range(stored)]
+
+    def dump_binary(self, path: str) -> int:
+        events = self.events()
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, _EVENT.size, len(events), self.seen))
+            for event in events:
+                f.write(_EVENT.pack(*event))
+        return len(events)
+
+    def dump_json(self, path: str) -> int:
+        events = self.events()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'seen': self.seen, 'fields': ['offset', 'size', 'latency_us', 'errno'],
+                       'events': events}, f, separators=(',', ':'))
+        return len(events)
+
+
+def load_binary_trace(path: str) -> List[tuple]:
+    with open(path, 'rb') as f:
+        magic, version, size, stored, _seen = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != TRACE_MAGIC or version != TRACE_VERSION or size != _EVENT.size:
+            raise ValueError(f"Not an OBLIVION trace file: {path}")
+        data = f.read(stored * size)
+    return [_EVENT.unpack_from(data, i * size) for i in range(stored)]
+
+
+class IOTrace:
+    """Histograms per pass and an optional event ring for one device wipe."""
+
+    def __init__(self, ring_size: int = 0):
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.ring: Optional[TraceRing] = TraceRing(ring_size) if ring_size else None
+        self._current: Optional[LatencyHistogram] = None
+
+    def begin_pass(self, name: str) -> None:
+        key = name
+        suffix = 2
+        while key in self.histograms:
+            key = f"{name}#{suffix}"
+            suffix += 1
+        self._current = self.histograms[key] = LatencyHistogram()
+
+    def record(self, offset: int, size: int, latency_ns: int, errno: int = 0) -> None:
+        if self._current is None:
+            self.begin_pass('io')
+        self._current.record(latency_ns)
+        if self.ring is not None:
+            self.ring.append(offset, size, latency_ns // 1000, errno)
+
+    def summary(self) -> Dict[str, Dict]:
+        return {name: h.summary() for name, h in self.histograms.items()}
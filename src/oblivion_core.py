@@ -9,13 +9,22 @@ import os
 import sys
 import time
 import uuid
-import jwt
-import qrcode
 import hashlib
+import sqlite3
+import asyncio
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 
 from disk_wiper import DiskWiper
+from cert_signer import CertificateSigner
+from cert_compact import encode_compact
+from qr_render import qr_matrix, save_png
+from cert_ledger import CertificateLedger
+from wipe_planner import METHODS, PlanHistory, format_duration, plan as plan_wipe
+from throughput_trace import ThroughputRecorder
+from device_stack import StackError, deactivate_stacks, resolve_targets
+from crypto_erase import CRYPTO_ERASE_METHOD, CryptoEraseError, crypto_erase, luks_targets
+from wipe_async import AsyncWiper
 from hardware_info import get_device_type, get_device_id
 
 # Helper: resource_path for PyInstaller and dev
@@ -27,10 +36,28 @@ def resource_path(relative_path: str) -> str:
     return os.path.join(base_path, relative_path)
 
 OUTPUT_DIR = os.path.join(os.path.abspath('.'), 'output')
+LEDGER_PATH = os.path.join(OUTPUT_DIR, 'ledger.db')
+PLAN_HISTORY_PATH = os.path.join(OUTPUT_DIR, 'plan_history.jsonl')
+TRACE_DIR = os.path.join(OUTPUT_DIR, 'traces')
+
+
+def private_key_candidates():
+    """Locations searched for the signing key, bundled copy first."""
+    return [
+        resource_path('private_key.pem'),
+        os.path.join(os.path.dirname(__file__), '..', 'CP', 'python-scripts', 'output', 'private_key.pem'),
+        os.path.join(os.path.abspath('.'), 'CP', 'python-scripts', 'output', 'private_key.pem'),
+        os.path.join(os.path.abspath('.'), 'python-scripts', 'output', 'private_key.pem'),
+    ]
+
 
 class OblivionCore:
-    def __init__(self):
-        self.dw = DiskWiper()
+    def __init__(self, cert_format: str = 'jwt'):
+        # cert_format: 'jwt' (mobile app compatible) or 'compact' (COSE/base45, smaller QR)
+        self.cert_format = cert_format
+        self.dw = DiskWiper(tolerate_errors=True)
+        self._signer: Optional[CertificateSigner] = None
+        self._ledger: Optional[CertificateLedger] = None
         os.makedirs(OUTPUT_DIR, exist_ok=True)
 
     def run(self) -> int:
@@ -43,41 +70,224 @@ class OblivionCore:
         sel = self._prompt_int("Select disk index to wipe", min_val=0, max_val=len(disks)-1)
         target = disks[sel]
         print(f"\nTarget: {target['path']} ({target['model']}) Size: {target['size_bytes']/(1024**3):.1f} GiB")
-        print("\nWipe Methods:\n  1) NIST Clear (single pass zeros)\n  2) NIST Purge (random + zeros + verify)")
-        method = self._prompt_int("Choose method", min_val=1, max_val=2)
+        luks = self._luks_plan(target['path'])
+        try:
+            stack = resolve_targets([target['path']])
+        except StackError as e:
+            if luks is None:
+                print(f"❌ {e}")
+                return 1
+            # A LUKS partition inside a stack can still be crypto-erased, just not overwritten alone
+            print(f"⚠️  {e}\n   Only cryptographic erase is available for this selection.")
+            stack = None
+        members = stack['members'] if stack else luks['targets']
+        if stack and stack['stacks']:
+            print(f"Stacked device: {', '.join(stack['stacks'])} will be deactivated and its "
+                  f"{len(members)} member disk(s) wiped in parallel: {', '.join(members)}")
+        history = PlanHistory(PLAN_HISTORY_PATH)
+        wipe_plan = None
+        estimates: List[Dict] = []
+        if stack is not None:
+            try:
+                # Members are wiped in parallel, so one member's duration is the estimate
+                # Random passes are sample-verified below, so their read-back is part of the estimate
+                wipe_plan = plan_wipe(members[0], 'clear', history=history, wiper=self.dw, verify_random='sample')
+                estimates = wipe_plan['estimates']
+            except (OSError, ValueError, RuntimeError) as e:
+                print(f"\n⚠️  Could not probe the device for estimates: {e}")
+                estimates = [{'method': name, 'label': spec['label'], 'level': spec['level'],
+                              'passes': spec['passes'], 'verify': spec['verify'], 'seconds': None}
+                             for name, spec in METHODS.items() if not spec.get('requires')]
+        if luks is not None:
+            estimates.insert(0, {'method': 'crypto-erase', 'label': 'NIST Purge (LUKS cryptographic erase)',
+                                 'level': 'purge', 'passes': [], 'verify': True, 'seconds': 1.0})
+        fastest = {}
+        for e in estimates:
+            best = fastest.get(e['level'])
+            if e['seconds'] is not None and (best is None or e['seconds'] < best['seconds']):
+                fastest[e['level']] = e
+        print("\nWipe Methods:")
+        for i, e in enumerate(estimates, start=1):
+            eta = f" ~{format_duration(e['seconds'])}" if e['seconds'] is not None else ""
+            mark = f"  (fastest {e['level'].title()})" if fastest.get(e['level']) is e else ""
+            print(f"  {i}) {e['label']}{eta}{mark}")
+        choice = estimates[self._prompt_int("Choose method", min_val=1, max_val=len(estimates)) - 1]
+        method = 2 if choice['level'] == 'purge' else 1
         print("\n⚠️  FINAL WARNING: This operation will PERMANENTLY ERASE data on the selected disk.")
         confirm = input("Type ERASE to proceed: ").strip()
         if confirm != "ERASE":
             print("Operation cancelled.")
             return 2
+        if choice['method'] == 'crypto-erase':
+            # Close the crypt mappings above the LUKS containers, not the whole disk's stacks
+            try:
+                for cmd in deactivate_stacks({'stacks': luks['stacks'], 'members': luks['targets']}):
+                    print(f"   {cmd}")
+            except StackError as e:
+                print(f"❌ Could not close the LUKS mapping: {e}")
+                return 3
+            return self._run_crypto_erase(luks, target)
+        if stack['stacks']:
+            try:
+                for cmd in deactivate_stacks(stack):
+                    print(f"   {cmd}")
+            except StackError as e:
+                print(f"❌ Could not deactivate the stack: {e}")
+                return 3
         start = time.time()
-        try:
-            def progress(written, total):
-                pct = (written/total)*100
-                print(f"\rProgress: {pct:6.2f}%", end='')
-            if method == 1:
-                self.dw.wipe_clear(target['path'], progress=progress)
+        # Throughput profile of each member's wipe, replayable by the demo and dashboard tests
+        recorders = {m: ThroughputRecorder(meta={
+            'device': m, 'model': target['model'], 'method': choice['method'], 'passes': choice['passes'],
+            'rotational': wipe_plan['traits']['rotational'] if wipe_plan else None,
+        }) for m in members}
+        reports, errors = self._wipe_members(members, choice, recorders)
+        for member in members:
+            label = f"{member}: " if len(members) > 1 else ""
+            report = reports.get(member)
+            if report is None:
+                print(f"\n❌ {label}Wipe failed: {errors[member]}")
+            elif report['unwritable_bytes']:
+                print(f"\n⚠️  {label}Wipe completed with {report['unwritable_bytes']} unwritable bytes "
+                      f"(coverage {report['coverage'] * 100:.4f}%), sectors: {report['bad_sectors']}")
             else:
-                self.dw.wipe_purge(target['path'], progress=progress)
-            print("\n✅ Wipe completed successfully.")
-        except Exception as e:
-            print(f"\n❌ Wipe failed: {e}")
+                print(f"\n✅ {label}Wipe completed successfully.")
+        if not reports:
             return 3
         duration = int(time.time() - start)
-        token, qr_path = self._generate_certificate(duration, method)
-        print(f"\n📄 Certificate JWT length: {len(token)}")
-        print(f"📦 QR saved: {qr_path}")
+        ts = datetime.now().strftime('%Y%m%d_%H%M%S')
+        try:
+            os.makedirs(TRACE_DIR, exist_ok=True)
+            for member in reports:
+                recorders[member].trace().save(
+                    os.path.join(TRACE_DIR, f"throughput_{ts}_{os.path.basename(member)}.obtt"))
+        except OSError as e:
+            print(f"⚠️  Could not save throughput trace: {e}")
+        if wipe_plan is not None and not errors:
+            print(f"⏱️  Took {format_duration(duration)} (predicted {format_duration(choice['seconds'])})")
+            try:
+                history.record(wipe_plan['traits'], choice['method'], choice['model_seconds'], time.time() - start)
+            except OSError:
+                pass
+        # One certificate per physical member that was wiped
+        for member, report in reports.items():
+            token, qr_path = self._generate_certificate(duration, method, report,
+                                                        device=member if len(members) > 1 else None)
+            if len(members) > 1:
+                print(f"\n🔹 {member}")
+            print(f"\n📄 Certificate JWT length: {len(token)}")
+            print(f"📦 QR saved: {qr_path}")
         print("\nScan the QR code file using the OBLIVION mobile verifier app.")
-        return 0
+        return 3 if errors else 0
+
+    def _luks_plan(self, path: str) -> Optional[Dict]:
+        """LUKS containers of the selected device (see luks_targets), or None when it cannot be crypto-erased."""
+        try:
+            return luks_targets([path])
+        except (OSError, StackError, CryptoEraseError):
+            return None
 
-    def _generate_certificate(self, wipe_duration: int, method: int):
+    def _run_crypto_erase(self, luks: Dict, target: Dict) -> int:
+        members = luks['targets']
+        start = time.time()
+        reports: Dict[str, Dict] = {}
+        for member in members:
+            try:
+                report = crypto_erase(member)
+            except (OSError, CryptoEraseError) as e:
+                print(f"❌ {member}: Crypto-erase failed: {e}")
+                continue
+            reports[member] = report
+            print(f"✅ {member}: LUKS{report['luks_version']} header and keyslots destroyed, "
+                  f"{report['erased_bytes']} bytes verified in {report['seconds']} s")
+        duration = int(time.time() - start)
+        for member, report in reports.items():
+            token, qr_path = self._generate_certificate(duration, 2, report,
+                                                        device=member if len(members) > 1 else None)
+            print(f"\n📄 Certificate JWT length: {len(token)}")
+            print(f"📦 QR saved: {qr_path}")
+        if not reports:
+            return 3
+        # The ciphertext is already unreadable; overwriting it as well is optional
+        answer = input("\nAlso overwrite the full device now (certificate already issued)? [y/N]: ")
+        if answer.strip().lower() == 'y':
+            self._overwrite_after_crypto_erase(list(dict.fromkeys(luks['overwrite'][m] for m in reports)), target)
+        print("\nScan the QR code file using the OBLIVION mobile verifier app.")
+        return 3 if len(reports) < len(members) else 0
+
+    def _overwrite_after_crypto_erase(self, devices: List[str], target: Dict) -> None:
+        # The selected device may still carry other stacks; they go down like any other overwrite
+        try:
+            follow = resolve_targets(devices)
+            for cmd in deactivate_stacks(follow):
+                print(f"   {cmd}")
+        except StackError as e:
+            print(f"\n⚠️  Follow-up overwrite skipped: {e}")
+            return
+        recorders = {m: ThroughputRecorder(meta={'device': m, 'model': target['model'], 'method': 'clear'})
+                     for m in follow['members']}
+        _, errors = self._wipe_members(follow['members'], METHODS['clear'], recorders)
+        for member, error in errors.items():
+            print(f"\n⚠️  {member}: Follow-up overwrite failed: {error}")
+        if not errors:
+            print("\n✅ Follow-up overwrite completed.")
+
+    def _wipe_members(self, members: List[str], choice: Dict, recorders: Dict[str, ThroughputRecorder]):
+        """Wipe all members concurrently; returns ({member: report}, {member: error}).
+
+        Ctrl-C cancels every member at its next block boundary and reports
+        how far each one got instead of leaving the state unknown.
+        """
+        return asyncio.run(self._wipe_members_async(members, choice, recorders))
+
+    async def _wipe_members_async(self, members: List[str], choice: Dict,
+                                  recorders: Dict[str, ThroughputRecorder]):
+        runner = AsyncWiper(self.dw, max_jobs=len(members))
+        handles = {}
+        for member in members:
+            handles[member] = await runner.start({
+                'device': member, 'passes': choice['passes'], 'verify': choice['verify'],
+                'verify_random': 'sample' if 'random' in choice['passes'] else 'none',
+                'progress': recorders[member].wrap(),
+            })
+        try:
+            while not await runner.wait(timeout=0.5):
+                snaps = [h.snapshot() for h in handles.values()]
+                done = sum(sn['written'] for sn in snaps)
+                total = sum(sn['total'] for sn in snaps)
+                print(f"\rProgress: {done / total * 100 if total else 0.0:6.2f}%", end='')
+        except asyncio.CancelledError:
+            print("\n⏹️  Cancelling at the next block boundary...")
+            await runner.cancel_all()
+        finally:
+            runner.shutdown()
+        reports: Dict[str, Dict] = {}
+        errors: Dict[str, str] = {}
+        for member, handle in handles.items():
+            if handle.state == 'done':
+                reports[member] = handle.report
+            elif handle.state == 'cancelled':
+                sn = handle.snapshot()
+                errors[member] = (f"cancelled by user in pass {sn['pass_index'] + 1}/{sn['passes_total']} "
+                                  f"({sn['pass_name']}) after {sn['written']} of {sn['total']} bytes; "
+                                  f"the device is only partially overwritten")
+            else:
+                errors[member] = handle.error or 'unknown error'
+        return reports, errors
+
+    def _generate_certificate(self, wipe_duration: int, method: int, report: Optional[Dict] = None,
+                              device: Optional[str] = None):
         device_type = get_device_type()
         device_id = get_device_id()
         cert_id = str(uuid.uuid4())
         now = int(time.time())
         wipe_method = "NIST SP 800-88 Purge" if method == 2 else "NIST SP 800-88 Clear"
+        if report and report.get('backend') == 'crypto-erase':
+            wipe_method = CRYPTO_ERASE_METHOD
         # Deterministic-ish data hash basis
         hash_input = f"{now}-{device_id}-{wipe_method}-{wipe_duration}"
+        if device:
+            # Members of one stack are certified separately; keep their hashes distinct
+            hash_input += f"-{device}"
         data_hash = hashlib.sha256(hash_input.encode()).hexdigest()
         payload = {
             'iss': 'OBLIVION',
@@ -89,39 +299,41 @@ class OblivionCore:
             'wipeTimestamp': now,
             'dataHash': data_hash,
         }
-        # Load private key via resource_path
-        key_path_candidates = [
-            resource_path('private_key.pem'),
-            os.path.join(os.path.dirname(__file__), '..', 'CP', 'python-scripts', 'output', 'private_key.pem'),
-            os.path.join(os.path.abspath('.'), 'CP', 'python-scripts', 'output', 'private_key.pem'),
-            os.path.join(os.path.abspath('.'), 'python-scripts', 'output', 'private_key.pem'),
-        ]
-        private_key = None
-        for kp in key_path_candidates:
-            try:
-                if os.path.exists(kp):
-                    with open(kp, 'r', encoding='utf-8') as f:
-                        private_key = f.read()
-                        break
-            except Exception:
-                pass
-        if not private_key:
-            raise RuntimeError('private_key.pem not found. Ensure it is bundled or present.')
-        token = jwt.encode(payload, private_key, algorithm='RS256')
-        # Generate QR
-        qr = qrcode.QRCode(version=None, error_correction=qrcode.constants.ERROR_CORRECT_M, box_size=8, border=4)
-        qr.add_data(token)
-        qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white")
+        if report and report['unwritable_bytes']:
+            # State exactly what was not overwritten rather than claiming a full wipe
+            payload['coverage'] = round(report['coverage'] * 100, 6)
+            payload['badSectors'] = report['bad_sectors']
+        if self.cert_format == 'compact':
+            token = encode_compact(payload, self._get_signer())
+        else:
+            token = self._get_signer().sign(payload)
+        # Generate QR (rendered from the module matrix, not through a PIL image)
         ts = datetime.now().strftime('%Y%m%d_%H%M%S')
-        qr_path = os.path.join(OUTPUT_DIR, f"certificate_qr_{ts}.png")
-        img.save(qr_path)
+        suffix = f"_{os.path.basename(device)}" if device else ""
+        qr_path = os.path.join(OUTPUT_DIR, f"certificate_qr_{ts}{suffix}_{cert_id}.png")
+        save_png(qr_matrix(token, error_correction='M', border=4), qr_path, box_size=8)
+        try:
+            self._get_ledger().record(payload, token, qr_path)
+        except sqlite3.Error as e:
+            print(f"\n⚠️  Certificate ledger write failed: {e}")
         return token, qr_path
 
+    def _get_signer(self) -> CertificateSigner:
+        # Load and parse the private key once per session
+        if self._signer is None:
+            self._signer = CertificateSigner.from_candidates(private_key_candidates())
+        return self._signer
+
+    def _get_ledger(self) -> CertificateLedger:
+        if self._ledger is None:
+            self._ledger = CertificateLedger(LEDGER_PATH)
+        return self._ledger
+
     def _display_disks(self, disks):
         print("Detected Disks:")
         for i, d in enumerate(disks):
-            print(f"  [{i}] {d['path']} | {d['model']} | {d['size_bytes']/(1024**3):.1f} GiB")
+            in_stack = f" | in {', '.join(d['stack'])}" if d.get('stack') else ""
+            print(f"  [{i}] {d['path']} | {d['model']} | {d['size_bytes']/(1024**3):.1f} GiB{in_stack}")
 
     def _prompt_int(self, label: str, min_val: int, max_val: int) -> int:
         while True:
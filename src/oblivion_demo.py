@@ -20,12 +20,21 @@ import platform
 import subprocess
 import time
 import hashlib
-import jwt
 import qrcode
 import json
 from datetime import datetime
 from pathlib import Path
 import ctypes
+from typing import Optional
+
+from cert_signer import CertificateSigner
+from throughput_trace import ThroughputTrace, replay, synthetic_trace
+
+# Recorded throughput trace (.obtt) to replay instead of a synthetic profile, and
+# the playback speed; by default each pass is compressed to about DEMO_PASS_SECONDS
+DEMO_TRACE_ENV = 'OBLIVION_DEMO_TRACE'
+DEMO_SPEED_ENV = 'OBLIVION_DEMO_SPEED'
+DEMO_PASS_SECONDS = 12.0
 
 
 # Hardcoded RS256 private key for certificate signing
@@ -62,11 +71,15 @@ BfghFptmmOTXmABztywt2lU=
 class OblivionDemo:
     """Complete OBLIVION demonstration workflow."""
     
-    def __init__(self):
+    def __init__(self, trace_path: Optional[str] = None, replay_speed: Optional[float] = None):
+        self.trace_path = trace_path or os.environ.get(DEMO_TRACE_ENV)
+        speed = replay_speed or os.environ.get(DEMO_SPEED_ENV)
+        self.replay_speed = float(speed) if speed else None
         self.system_info = {}
         self.drives = []
         self.selected_drive = None
         self.wipe_mode = None
+        self.signer = None
         self.is_admin = self._check_admin_privileges()
         
         # Enable fullscreen mode on startup
@@ -569,53 +582,68 @@ class OblivionDemo:
         
         # Calculate total size to wipe (in GB)
         total_size_gb = self.selected_drive['size_gb']
+        size_bytes = max(1, int(total_size_gb * 1024 ** 3))
         
-        start_time = time.time()
+        # Progress follows a recorded throughput trace (or a synthetic profile for the drive type)
+        trace = self._load_trace(size_bytes, passes)
+        speed = self.replay_speed
+        if speed is None:
+            per_pass = size_bytes / (sum(trace.passes()[0]) / (len(trace.passes()[0]) * trace.interval))
+            speed = max(1.0, per_pass / DEMO_PASS_SECONDS)
+        print(f"[*] Throughput profile: {trace.meta.get('source', 'synthetic ' + trace.meta.get('drive_type', ''))}"
+              f" (playback {speed:.0f}x)")
+        print()
         
-        for pass_num in range(passes):
-            pass_name = pass_names[pass_num] if pass_num < len(pass_names) else f'Pass {pass_num + 1}'
-            print(f"[*] Pass {pass_num + 1}/{passes}: Writing {pass_name}...")
-            print(f"    Target Size: {total_size_gb} GB")
-            print()
-            
-            # Simulate progress for this pass with realistic timing
-            # Use smaller increments for more realistic progress
-            total_steps = 200  # More granular progress steps
-            gb_per_step = total_size_gb / total_steps
-            
-            for step in range(total_steps + 1):
-                progress = (step / total_steps) * 100
-                current_gb = step * gb_per_step
-                
-                # Create progress bar
-                bar_length = 50
-                filled_length = int(bar_length * step // total_steps)
+        start_time = time.time()
+        simulated = 0.0
+        current_pass = -1
+        bar_length = 50
+        written = 0
+        try:
+            for pass_num, written, total, simulated in replay(trace, size_bytes, passes, speed=speed):
+                if pass_num != current_pass:
+                    if current_pass >= 0:
+                        print(f'\n✅ Pass {current_pass + 1}/{passes} completed - {total_size_gb} GB processed')
+                        print()
+                    current_pass = pass_num
+                    pass_name = pass_names[pass_num] if pass_num < len(pass_names) else f'Pass {pass_num + 1}'
+                    print(f"[*] Pass {pass_num + 1}/{passes}: Writing {pass_name}...")
+                    print(f"    Target Size: {total_size_gb} GB")
+                    print()
+                progress = written / total * 100
+                filled_length = int(bar_length * written // total)
                 bar = '█' * filled_length + '-' * (bar_length - filled_length)
-                
-                # Display progress with actual size information
-                print(f'\r[{bar}] {progress:.1f}% - {current_gb:.1f}/{total_size_gb} GB wiped', end='', flush=True)
-                
-                # Slower, more realistic timing based on drive size
-                # Larger drives take longer per step
-                if total_size_gb > 500:
-                    time.sleep(0.08)  # Slower for large drives
-                elif total_size_gb > 100:
-                    time.sleep(0.06)  # Medium speed for medium drives
-                else:
-                    time.sleep(0.04)  # Faster for smaller drives
-            
-            print(f'\n✅ Pass {pass_num + 1}/{passes} completed - {total_size_gb} GB processed')
-            print()
+                print(f'\r[{bar}] {progress:.1f}% - {written / 1024 ** 3:.1f}/{total_size_gb} GB wiped', end='', flush=True)
+        except KeyboardInterrupt:
+            print(f"\n\n⏹️  Stopped in pass {max(current_pass, 0) + 1}/{passes} after "
+                  f"{written / 1024 ** 3:.1f}/{total_size_gb} GB; no certificate was issued.")
+            raise
+        print(f'\n✅ Pass {passes}/{passes} completed - {total_size_gb} GB processed')
+        print()
         
         end_time = time.time()
         duration = round(end_time - start_time, 2)
         
-        print(f"⏱️  Total wipe time: {duration} seconds")
+        print(f"⏱️  Total wipe time: {duration} seconds (equivalent real wipe: {int(simulated // 60)} min)")
         print(f"📊 Data processed: {total_size_gb} GB across {passes} pass(es)")
         print("✅ Secure wipe operation completed successfully!")
         
         return duration
     
+    def _load_trace(self, size_bytes: int, passes: int) -> ThroughputTrace:
+        if self.trace_path:
+            try:
+                trace = ThroughputTrace.load(self.trace_path)
+                # Playback speed is derived from the samples, so they must show some throughput
+                if trace.interval <= 0 or not trace.passes() or not all(sum(p) for p in trace.passes()):
+                    raise ValueError("trace has no throughput samples")
+                trace.meta.setdefault('source', os.path.basename(self.trace_path))
+                return trace
+            except (OSError, ValueError) as e:
+                print(f"[!] Could not load throughput trace {self.trace_path}: {e}")
+        drive_type = self.selected_drive.get('drive_type', 'SSD')
+        return synthetic_trace(size_bytes, 'HDD' if drive_type == 'HDD' else 'SSD', passes)
+
     def generate_certificate(self, wipe_duration):
         """Generate and display the completion certificate."""
         print("\n[*] Generating signed completion certificate...")
@@ -640,7 +668,9 @@ class OblivionDemo:
         
         # Sign the certificate
         try:
-            token = jwt.encode(certificate_data, PRIVATE_KEY, algorithm='RS256')
+            if self.signer is None:
+                self.signer = CertificateSigner(PRIVATE_KEY)
+            token = self.signer.sign(certificate_data)
             
             # Generate QR code with optimal settings for mobile scanning
             qr = qrcode.QRCode(
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+OBLIVION Batch QR Decoder (Production)
+
+Decodes folders of certificate QR images (saved PNGs or scanned photos) and
+feeds every decoded certificate straight into verification.
+
+Pipeline per run:
+1. Walk the input directories for image files.
+2. Hash every file (SHA-256 of its bytes) on the worker pool and drop files
+   whose content is a duplicate within this run or was successfully
+   processed in an earlier run recorded in the seen-hash file.
+3. Decode the remaining images on the worker pool: grayscale, downscale
+   large photos, try zbar, then retry on a binarized copy if nothing was found.
+4. Verify each decoded token with the same checks as cert_verify and stream
+   one JSON line per certificate. Only images that yielded at least one
+   valid certificate (or, without keys, at least one decoded code) are
+   recorded as seen; failed decodes and verifications are retried next run.
+
+Requires Pillow and pyzbar (zbar shared library) at runtime.
+"""
+
+from __future__ import annotations
+import os
+import sys
+import json
+import hashlib
+import argparse
+import multiprocessing
+from typing import Dict, Iterator, List, Optional, Sequence, Set
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+try:
+    from pyzbar import pyzbar
+    PYZBAR_AVAILABLE = True
+except ImportError:
+    PYZBAR_AVAILABLE = False
+
+from cert_keyring import KeyRing
+from cert_verify import verify_token
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tif', '.tiff', '.webp')
+MAX_DECODE_SIDE = 1600
+HASH_CHUNK = 1024 * 1024
+
+
+def iter_images(paths: Sequence[str]) -> Iterator[str]:
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _dirs, files in os.walk(path):
+                for name in sorted(files):
+                    if name.lower().endswith(IMAGE_EXTENSIONS):
+                        yield os.path.join(root, name)
+        elif os.path.isfile(path):
+            yield path
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# ---------------------- Decoding ----------------------
+def _prepare(image: 'Image.Image') -> 'Image.Image':
+    gray = image.convert('L')
+    if max(gray.size) > MAX_DECODE_SIDE:
+        gray.thumbnail((MAX_DECODE_SIDE, MAX_DECODE_SIDE))
+    return gray
+
+
+def _binarize(gray: 'Image.Image') -> 'Image.Image':
+    # Threshold at the midpoint between the darkest and brightest populated levels
+    histogram = gray.histogram()
+    levels = [i for i, count in enumerate(histogram) if count]
+    threshold = (levels[0] + levels[-1]) // 2 if levels else 128
+    return gray.point(lambda v: 255 if v > threshold else 0, mode='1')
+
+
+def decode_image(path: str) -> List[str]:
+    """Return every QR payload found in the image (may be empty)."""
+    with Image.open(path) as image:
+        gray = _prepare(image)
+    symbols = [pyzbar.ZBarSymbol.QRCODE]
+    found = pyzbar.decode(gray, symbols=symbols)
+    if not found:
+        found = pyzbar.decode(_binarize(gray), symbols=symbols)
+    return [obj.data.decode('utf-8', errors='replace') for obj in found]
+
+
+# ---------------------- Worker pool ----------------------
+_worker_ring: Optional[KeyRing] = None
+
+
+def _init_worker(key_paths: Sequence[str]) -> None:
+    global _worker_ring
+    _worker_ring = KeyRing.from_files(key_paths) if key_paths else None
+
+
+def _hash_item(path: str) -> tuple:
+    try:
+        return path, file_digest(path)
+    except OSError:
+        return path, None
+
+
+def _decode_item(item: tuple) -> List[Dict]:
+    path, digest = item
+    base = {'source': path, 'sha256': digest}
+    try:
+        tokens = decode_image(path)
+    except Exception as e:
+        return [dict(base, valid=False, reason=f"Image decode failed: {e}")]
+    if not tokens:
+        return [dict(base, valid=False, reason='No QR code found')]
+    results = []
+    for token in tokens:
+        if _worker_ring is None:
+            results.append(dict(base, token=token))
+            continue
+        # One unreadable code must not take down the worker and the rest of the batch
+        try:
+            results.append(dict(verify_token(token, _worker_ring), **base))
+        except Exception as e:
+            results.append(dict(base, valid=False, reason=f"Verification failed: {e}"))
+    return results
+
+
+def load_seen(path: Optional[str]) -> Set[str]:
+    if not path or not os.path.exists(path):
+        return set()
+    with open(path, 'r', encoding='utf-8') as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def _succeeded(result: Dict) -> bool:
+    """A valid certificate, or a decoded code when no keys were given."""
+    return result['valid'] is True if 'valid' in result else 'token' in result
+
+
+def decode_batch(paths: Sequence[str], key_paths: Sequence[str] = (), seen: Optional[Set[str]] = None,
+                 workers: Optional[int] = None, on_new_hash=None) -> Iterator[Dict]:
+    """Yield result records for every new image under ``paths``.
+
+    ``seen`` is updated in place with the hashes of images that succeeded;
+    ``on_new_hash`` is called for each one so callers can persist it. Images
+    whose results all failed stay out of ``seen`` and are retried next time.
+    """
+    if not (PIL_AVAILABLE and PYZBAR_AVAILABLE):
+        raise RuntimeError("Batch decoding requires Pillow and pyzbar")
+    seen = set() if seen is None else seen
+    workers = workers or os.cpu_count() or 1
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(list(key_paths),)) as pool:
+        pending = []
+        queued: Set[str] = set()
+        for path, digest in pool.imap(_hash_item, iter_images(paths), chunksize=16):
+            if digest is None or digest in seen or digest in queued:
+                continue
+            queued.add(digest)
+            pending.append((path, digest))
+        for results in pool.imap_unordered(_decode_item, pending, chunksize=4):
+            for result in results:
+                yield result
+            if any(_succeeded(r) for r in results):
+                seen.add(results[0]['sha256'])
+                if on_new_hash is not None:
+                    on_new_hash(results[0]['sha256'])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Decode and verify folders of certificate QR images")
+    parser.add_argument('inputs', nargs='+', help="Image files or directories")
+    parser.add_argument('--key', action='append', default=[], help="Public key PEM for verification (repeatable)")
+    parser.add_argument('--seen', help="File of already processed content hashes (appended to)")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+    for path in args.key:
+        if not os.path.isfile(path):
+            parser.error(f"key file not found: {path}")
+
+    seen = load_seen(args.seen)
+    seen_file = open(args.seen, 'a', encoding='utf-8') if args.seen else None
+    failed = 0
+    try:
+        record = (lambda digest: seen_file.write(digest + '\n')) if seen_file else None
+        for result in decode_batch(args.inputs, args.key, seen, args.workers, on_new_hash=record):
+            if args.key and not result.get('valid'):
+                failed += 1
+            sys.stdout.write(json.dumps(result, separators=(',', ':')) + '\n')
+    finally:
+        if seen_file:
+            seen_file.close()
+    return 0 if failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
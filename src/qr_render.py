@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+OBLIVION QR Renderer (Production)
+
+Renders certificate QR codes straight from the qrcode module matrix instead
+of qrcode's PIL image factory. Outputs:
+- PNG: minimal 1-bit grayscale (IHDR/IDAT/IEND, zlib over packed rows)
+- SVG: a single path covering every dark module
+- Terminal: half-block characters, two module rows per text line
+
+This skips PIL's per-pixel drawing and PNG encoder. It does not avoid
+loading PIL: the qrcode package imports it on its own when available.
+"""
+
+from __future__ import annotations
+import struct
+import time
+import zlib
+from typing import List, Optional
+
+import qrcode
+
+Matrix = List[List[bool]]
+
+_EC_LEVELS = {
+    'L': qrcode.constants.ERROR_CORRECT_L,
+    'M': qrcode.constants.ERROR_CORRECT_M,
+    'Q': qrcode.constants.ERROR_CORRECT_Q,
+    'H': qrcode.constants.ERROR_CORRECT_H,
+}
+
+
+def qr_matrix(data: str, error_correction: str = 'M', border: int = 4,
+              version: Optional[int] = None) -> Matrix:
+    """Build the module matrix (True = dark) including the quiet-zone border."""
+    qr = qrcode.QRCode(version=version, error_correction=_EC_LEVELS[error_correction], border=border)
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr.get_matrix()
+
+
+# ---------------------- PNG ----------------------
+def _png_chunk(kind: bytes, body: bytes) -> bytes:
+    return struct.pack('>I', len(body)) + kind + body + struct.pack('>I', zlib.crc32(kind + body) & 0xffffffff)
+
+
+def render_png(matrix: Matrix, box_size: int = 8) -> bytes:
+    """Encode the matrix as a 1-bit grayscale PNG (black modules, white background)."""
+    modules = len(matrix)
+    size = modules * box_size
+    pad = (-size) % 8
+    rows = []
+    for row in matrix:
+        # One bit per pixel, white = 1; each module row is packed once and repeated
+        bits = ''.join('0' * box_size if dark else '1' * box_size for dark in row) + '1' * pad
+        packed = b'\x00' + int(bits, 2).to_bytes(len(bits) // 8, 'big')  # filter type 0
+        rows.append(packed * box_size)
+    ihdr = struct.pack('>IIBBBBB', size, size, 1, 0, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n'
+            + _png_chunk(b'IHDR', ihdr)
+            + _png_chunk(b'IDAT', zlib.compress(b''.join(rows), 6))
+            + _png_chunk(b'IEND', b''))
+
+
+def save_png(matrix: Matrix, path: str, box_size: int = 8) -> str:
+    with open(path, 'wb') as f:
+        f.write(render_png(matrix, box_size=box_size))
+    return path
+
+
+# ---------------------- SVG ----------------------
+def render_svg(matrix: Matrix, box_size: int = 8) -> str:
+    """Encode the matrix as SVG; horizontal runs of dark modules become one rectangle each."""
+    modules = len(matrix)
+    parts = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < modules:
+            if row[x]:
+                start = x
+                while x < modules and row[x]:
+                    x += 1
+                parts.append(f"M{start},{y}h{x - start}v1h-{x - start}z")
+            else:
+                x += 1
+    size = modules * box_size
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" '
+            f'viewBox="0 0 {modules} {modules}" shape-rendering="crispEdges">'
+            f'<rect width="100%" height="100%" fill="#fff"/>'
+            f'<path fill="#000" d="{"".join(parts)}"/></svg>')
+
+
+# ---------------------- Terminal ----------------------
+def render_terminal(matrix: Matrix, invert: bool = False) -> str:
+    """Render with half blocks so each text line covers two module rows.
+
+    By default light modules are drawn as block glyphs, which suits the
+    usual light-on-dark console; pass ``invert=True`` for light terminals.
+    """
+    glyphs = {  # (top dark, bottom dark) -> character drawing the light parts
+        (False, False): '█',
+        (True, False): '▄',
+        (False, True): '▀',
+        (True, True): ' ',
+    }
+    if invert:
+        glyphs = {k: glyphs[(not k[0], not k[1])] for k in glyphs}
+    modules = len(matrix)
+    lines = []
+    for y in range(0, modules, 2):
+        top = matrix[y]
+        bottom = matrix[y + 1] if y + 1 < modules else [False] * modules
+        lines.append(''.join(glyphs[(t, b)] for t, b in zip(top, bottom)))
+    return '\n'.join(lines)
+
+
+# ---------------------- Benchmark ----------------------
+def benchmark(data: str, rounds: int = 20, box_size: int = 8) -> dict:
+    """Compare the PIL make_image+save path with matrix rendering (ms per image).
+
+    The QR is built once so only the rendering stage is timed.
+    """
+    import io
+
+    def timed(fn) -> float:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            fn()
+        return (time.perf_counter() - start) * 1000 / rounds
+
+    qr = qrcode.QRCode(version=None, error_correction=qrcode.constants.ERROR_CORRECT_M,
+                       box_size=box_size, border=4)
+    qr.add_data(data)
+    start = time.perf_counter()
+    qr.make(fit=True)
+    matrix = qr.get_matrix()
+    result = {
+        'qr_version': qr.version,
+        'qr_make_ms': round((time.perf_counter() - start) * 1000, 3),
+        'matrix_png_ms': round(timed(lambda: render_png(matrix, box_size=box_size)), 3),
+        'png_bytes': len(render_png(matrix, box_size=box_size)),
+        'svg_ms': round(timed(lambda: render_svg(matrix, box_size=box_size)), 3),
+        'terminal_ms': round(timed(lambda: render_terminal(matrix)), 3),
+    }
+    try:
+        import PIL.Image  # noqa: F401
+        result['pil_png_ms'] = round(timed(
+            lambda: qr.make_image(fill_color="black", back_color="white").save(io.BytesIO(), format='PNG')), 3)
+    except ImportError:
+        result['pil_png_ms'] = None
+    return result
+
+
+if __name__ == '__main__':
+    # Benchmark: python qr_render.py [data]
+    import sys
+    sample = sys.argv[1] if len(sys.argv) > 1 else 'OBLIVION-' + 'X' * 600
+    print(render_terminal(qr_matrix('OBLIVION')))
+    print(benchmark(sample))
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+OBLIVION Shared-Memory Wipe Stats (Production)
+
+A fixed-size table of per-device wipe counters in a
+multiprocessing.shared_memory segment, so a dashboard in another process
+can watch every active wipe without talking to the writers.
+
+Each slot is a packed struct written with struct.pack_into by exactly one
+wipe thread. A sequence number is bumped to odd, the payload behind it is
+written, and only then is the even sequence stored with a separate write;
+readers read the sequence, copy the slot, read the sequence again, and
+retry when it was odd or changed. After a few attempts they show the last
+value they got. Writers never wait for readers.
+"""
+
+from __future__ import annotations
+import time
+import struct
+import threading
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+
+from wipe_metrics import DeviceStats
+
+DEFAULT_SHM_NAME = 'oblivion-stats'
+DEFAULT_SLOTS = 32
+
+MAGIC = b'OBSH'
+VERSION = 1
+_HEADER = struct.Struct('<4sHH')  # magic, version, slot count
+# seq, state, pass index, passes total, device, pass name, pass bytes, pass total,
+# bytes in completed passes, verified bytes, I/O errors, started, updated, finished (wall clock)
+_SLOT = struct.Struct('<IIii64s16sQQQQQddd')
+_SEQ = struct.Struct('<I')
+_PAYLOAD = struct.Struct('<' + _SLOT.format.lstrip('<')[1:])  # everything after seq
+
+STATE_FREE, STATE_RUNNING, STATE_DONE, STATE_FAILED = 0, 1, 2, 3
+STATE_NAMES = {STATE_FREE: 'free', STATE_RUNNING: 'running', STATE_DONE: 'done', STATE_FAILED: 'failed'}
+
+
+def _open_segment(name: str) -> shared_memory.SharedMemory:
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        # Python < 3.13 registers attached segments with the resource tracker,
+        # which would unlink the daemon's segment when the viewer exits
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, 'shared_memory')  # type: ignore[attr-defined]
+    except Exception:
+        pass
+    return shm
+
+
+class SharedStatsTable:
+    """Owner side: creates the segment and hands out one slot per device wipe."""
+
+    def __init__(self, name: str = DEFAULT_SHM_NAME, slots: int = DEFAULT_SLOTS):
+        size = _HEADER.size + slots * _SLOT.size
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a crashed daemon; take it over
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.name = name
+        self.slots = slots
+        self.shm.buf[:size] = bytes(size)
+        _HEADER.pack_into(self.shm.buf, 0, MAGIC, VERSION, slots)
+        self._owner: List[Optional[str]] = [None] * slots
+        self._lock = threading.Lock()  # slot allocation only
+
+    def device_stats(self, device: str) -> 'SharedDeviceStats':
+        with self._lock:
+            index = self._pick_slot(device)
+            self._owner[index] = device
+        return SharedDeviceStats(device, self.shm.buf, _HEADER.size + index * _SLOT.size)
+
+    def _pick_slot(self, device: str) -> int:
+        states = [(_SLOT.unpack_from(self.shm.buf, _HEADER.size + i * _SLOT.size)[1], i) for i in range(self.slots)]
+        for state, i in states:
+            if self._owner[i] == device and state != STATE_RUNNING:
+                return i
+        for state, i in states:
+            if state == STATE_FREE:
+                return i
+        finished = [(self._finished_at(i), i) for state, i in states if state != STATE_RUNNING]
+        if not finished:
+            raise RuntimeError(f"All {self.slots} stats slots are in use")
+        return min(finished)[1]
+
+    def _finished_at(self, index: int) -> float:
+        return _SLOT.unpack_from(self.shm.buf, _HEADER.size + index * _SLOT.size)[13]
+
+    def close(self) -> None:
+        self.shm.close()
+        self.shm.unlink()
+
+
+class SharedDeviceStats(DeviceStats):
+    """DeviceStats that also publishes every update into its shared-memory slot."""
+
+    __slots__ = ('_buf', '_offset', '_seq', '_wall_start')
+
+    def __init__(self, device: str, buf, offset: int):
+        super().__init__(device)
+        self._buf = buf
+        self._offset = offset
+        self._seq = 0
+        self._wall_start = time.time()
+        self._publish(STATE_RUNNING)
+
+    def begin_pass(self, index: int, name: str, total: int, passes_total: int) -> None:
+        super().begin_pass(index, name, total, passes_total)
+        self._publish(STATE_RUNNING)
+
+    def set_written(self, written: int) -> None:
+        super().set_written(written)
+        self._publish(STATE_RUNNING)
+
+    def add_verified(self, nbytes: int) -> None:
+        super().add_verified(nbytes)
+        self._publish(STATE_RUNNING)
+
+    def add_error(self, count: int = 1) -> None:
+        super().add_error(count)
+        self._publish(STATE_RUNNING)
+
+    def finish(self) -> None:
+        # A pass that stopped short means the wipe raised; tolerated bad sectors do not
+        incomplete = self.pass_index >= 0 and self.pass_bytes < self.pass_total
+        super().finish()
+        self._publish(STATE_FAILED if incomplete else STATE_DONE)
+
+    def _publish(self, state: int) -> None:
+        done = sum(b for _, _, b in self.completed_passes)
+        now = time.time()
+        self._seq += 1  # odd: update in progress
+        _SEQ.pack_into(self._buf, self._offset, self._seq & 0xffffffff)
+        _PAYLOAD.pack_into(self._buf, self._offset + _SEQ.size, state, self.pass_index,
+                           self.passes_total, self.device.encode()[:64], self.pass_name.encode()[:16],
+                           self.pass_bytes, self.pass_total, done, self.bytes_verified, self.io_errors,
+                           self._wall_start, now, now if state in (STATE_DONE, STATE_FAILED) else 0.0)
+        # Even again only once the whole payload is in place
+        self._seq += 1
+        _SEQ.pack_into(self._buf, self._offset, self._seq & 0xffffffff)
+
+
+class SharedStatsReader:
+    """Viewer side: attaches to an existing segment and snapshots the used slots."""
+
+    def __init__(self, name: str = DEFAULT_SHM_NAME):
+        self.shm = _open_segment(name)
+        magic, version, slots = _HEADER.unpack_from(self.shm.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            self.shm.close()
+            raise ValueError(f"Shared memory segment {name} is not an OBLIVION stats table")
+        self.slots = slots
+
+    def snapshot(self) -> List[Dict]:
+        rows = []
+        for i in range(self.slots):
+            offset = _HEADER.size + i * _SLOT.size
+            for _ in range(4):
+                seq_before = _SEQ.unpack_from(self.shm.buf, offset)[0]
+                raw = bytes(self.shm.buf[offset + _SEQ.size:offset + _SLOT.size])
+                seq_after = _SEQ.unpack_from(self.shm.buf, offset)[0]
+                values = _PAYLOAD.unpack(raw)
+                if seq_before % 2 == 0 and seq_after == seq_before:
+                    break
+            (state, pass_index, passes_total, device, pass_name, pass_bytes, pass_total,
+             completed, verified, errors, started, updated, finished) = values
+            if state == STATE_FREE:
+                continue
+            rows.append({
+                'slot': i,
+                'state': STATE_NAMES.get(state, 'unknown'),
+                'device': device.rstrip(b'\0').decode(errors='replace'),
+                'pass_index': pass_index,
+                'passes_total': passes_total,
+                'pass_name': pass_name.rstrip(b'\0').decode(errors='replace'),
+                'pass_bytes': pass_bytes,
+                'pass_total': pass_total,
+                'bytes_done': completed + (pass_bytes if pass_index >= 0 else 0),
+                'bytes_verified': verified,
+                'io_errors': errors,
+                'started': started,
+                'updated': updated,
+                'finished': finished or None,
+            })
+        return rows
+
+    def close(self) -> None:
+        self.shm.close()
@@ -24,6 +24,14 @@ def resource_path(relative_path):
 
 
 def main():
+    # Headless wipe station: start_oblivion.py daemon [daemon options]
+    if len(sys.argv) > 1 and sys.argv[1] == 'daemon':
+        from wipe_daemon import main as daemon_main
+        return daemon_main(sys.argv[2:])
+    # Live view of daemon wipes: start_oblivion.py dashboard [--shm NAME]
+    if len(sys.argv) > 1 and sys.argv[1] == 'dashboard':
+        from wipe_dashboard import main as dashboard_main
+        return dashboard_main(sys.argv[2:])
     bm = BootManager()
     print("=== OBLIVION Launcher ===")
     print(bm.get_platform_info())
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+OBLIVION Async Wipe Jobs (Production)
+
+asyncio front end for DiskWiper so a UI or daemon can drive many wipes from
+one event loop:
+
+    wiper = AsyncWiper()
+    handle = await wiper.start({'device': '/dev/sdb', 'passes': ['random', 'zeros']})
+    async for event in handle.progress():
+        ...
+    report = await handle          # raises WipeCancelled after handle.cancel()
+
+The blocking I/O runs on a thread pool owned by the AsyncWiper. Pause,
+resume and cancel take effect at block boundaries: the job's control object
+is passed to wipe_plan as its throttle, which every write loop consults
+before each block, and is checked again after each block through the
+progress callback. A paused job parks its worker thread; a cancelled job
+raises WipeCancelled inside wipe_plan, which closes the device and marks
+its stats failed, so the state on return is always "passes completed plus
+a known prefix of the current pass".
+"""
+
+from __future__ import annotations
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, List, Optional
+
+from disk_wiper import DiskWiper, PASS_NAMES, RANDOM_VERIFY_MODES
+from wipe_metrics import DeviceStats
+
+JOB_METHODS = {
+    'clear': ['zeros'],
+    'purge': ['random', 'zeros'],
+}
+DEFAULT_MAX_JOBS = 32
+PROGRESS_INTERVAL = 0.2
+
+
+class WipeCancelled(Exception):
+    pass
+
+
+class JobControl:
+    """Thread-side safe point shared by a job's worker and its handle."""
+
+    def __init__(self, throttle=None):
+        self.throttle = throttle  # chained, e.g. a per-link TokenBucket
+        self._running = threading.Event()
+        self._running.set()
+        self.cancelled = False
+
+    def consume(self, amount: int) -> None:
+        self.checkpoint()
+        if self.throttle:
+            self.throttle.consume(amount)
+
+    def checkpoint(self) -> None:
+        if self.cancelled:
+            raise WipeCancelled()
+        self._running.wait()
+        if self.cancelled:
+            raise WipeCancelled()
+
+    def pause(self) -> None:
+        self._running.clear()
+
+    def resume(self) -> None:
+        self._running.set()
+
+    def cancel(self) -> None:
+        self.cancelled = True
+        self._running.set()  # wake a paused worker so it can unwind
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+
+def normalize_job(job: Dict) -> Dict:
+    """Validate a single-device job: device, passes or method, verify, verify_random.
+
+    Optional keys: 'throttle' (chained after the pause/cancel safe point),
+    'stats' (a DeviceStats, e.g. from MetricsRegistry.device), 'trace' and
+    'progress' (a plain (written, total) callback run on the worker thread).
+    """
+    if not isinstance(job, dict) or not isinstance(job.get('device'), str):
+        raise ValueError("Job must be a dict with a 'device' path")
+    passes = job.get('passes') or JOB_METHODS.get(job.get('method', 'clear'))
+    if not passes or any(p not in PASS_NAMES for p in passes):
+        raise ValueError(f"Invalid pass plan: {passes}")
+    verify_random = job.get('verify_random', 'none')
+    if verify_random not in RANDOM_VERIFY_MODES:
+        raise ValueError(f"Unknown random verification mode: {verify_random}")
+    return dict(job, passes=list(passes), verify=bool(job.get('verify', False)), verify_random=verify_random)
+
+
+class WipeHandle:
+    """Event-loop side of one running job."""
+
+    def __init__(self, job: Dict, loop: asyncio.AbstractEventLoop, interval: float = PROGRESS_INTERVAL):
+        self.job = job
+        self.device = job['device']
+        self.control = JobControl(job.get('throttle'))
+        self.stats: DeviceStats = job.get('stats') or DeviceStats(self.device)
+        self.state = 'running'  # running | paused | done | failed | cancelled
+        self.error: Optional[str] = None
+        self.report: Optional[Dict] = None
+        self.started = time.time()
+        self.finished: Optional[float] = None
+        self._loop = loop
+        self._interval = interval
+        self._last_publish = 0.0
+        self._subscribers: List[asyncio.Queue] = []
+        self._future: Optional[asyncio.Future] = None
+
+    # ---------------------- Control ----------------------
+    def pause(self) -> None:
+        if self.state == 'running':
+            self.control.pause()
+            self.state = 'paused'
+            self._fanout(self.snapshot())
+
+    def resume(self) -> None:
+        if self.state == 'paused':
+            self.control.resume()
+            self.state = 'running'
+            self._fanout(self.snapshot())
+
+    def cancel(self) -> None:
+        """Request cancellation; the job stops at the next block boundary."""
+        if self.state in ('running', 'paused'):
+            self.control.cancel()
+
+    @property
+    def done(self) -> bool:
+        return self.state in ('done', 'failed', 'cancelled')
+
+    # ---------------------- Results ----------------------
+    async def result(self) -> Dict:
+        """The wipe report; raises WipeCancelled or the wipe's exception."""
+        return await asyncio.shield(self._future)
+
+    def __await__(self):
+        return self.result().__await__()
+
+    def snapshot(self) -> Dict:
+        st = self.stats
+        index, name, written = st.pass_index, st.pass_name, st.pass_bytes
+        if index < 0 and st.completed_passes:
+            # Finished or stopped: describe the last pass reached
+            index, name, written = st.completed_passes[-1]
+        return {
+            'device': self.device,
+            'state': self.state,
+            'pass_index': index,
+            'pass_name': name,
+            'passes_total': st.passes_total,
+            'written': written,
+            'total': st.pass_total,
+            'bytes_done': st.bytes_done(),
+            'verified': st.bytes_verified,
+            'errors': st.io_errors,
+            'error': self.error,
+        }
+
+    async def progress(self) -> AsyncIterator[Dict]:
+        """Progress events (at most one per interval, plus state changes) until the job ends."""
+        if self.done:
+            # Finished before we subscribed: _finish has already sent its sentinel
+            yield self.snapshot()
+            return
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.append(queue)
+        try:
+            yield self.snapshot()
+            # Drain until the sentinel so the terminal snapshot always reaches the consumer
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield event
+        finally:
+            self._subscribers.remove(queue)
+
+    def _fanout(self, event: Optional[Dict]) -> None:
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+
+    # ---------------------- Worker side ----------------------
+    def _on_progress(self, written: int, total: int) -> None:
+        if self.job.get('progress'):
+            self.job['progress'](written, total)
+        now = time.monotonic()
+        if now - self._last_publish >= self._interval:
+            self._last_publish = now
+            self._loop.call_soon_threadsafe(self._fanout, self.snapshot())
+        self.control.checkpoint()
+
+    def _run(self, wiper: DiskWiper) -> Dict:
+        job = self.job
+        return wiper.wipe_plan(self.device, job['passes'], verify=job['verify'], progress=self._on_progress,
+                               throttle=self.control, stats=self.stats, trace=job.get('trace'),
+                               verify_random=job['verify_random'])
+
+    def _finish(self, future: asyncio.Future) -> None:
+        self.finished = time.time()
+        if future.cancelled() or isinstance(future.exception(), WipeCancelled):
+            self.state = 'cancelled'
+        elif future.exception() is not None:
+            self.state = 'failed'
+            self.error = str(future.exception())
+        else:
+            self.state = 'done'
+            self.report = future.result()
+        self._fanout(self.snapshot())
+        self._fanout(None)
+
+
+class AsyncWiper:
+    """Starts wipe jobs on a private thread pool and hands back WipeHandles."""
+
+    def __init__(self, wiper: Optional[DiskWiper] = None, max_jobs: int = DEFAULT_MAX_JOBS,
+                 interval: float = PROGRESS_INTERVAL):
+        self.wiper = wiper or DiskWiper(tolerate_errors=True)
+        self.interval = interval
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_jobs), thread_name_prefix='wipe')
+        self.handles: List[WipeHandle] = []
+
+    async def start(self, job: Dict) -> WipeHandle:
+        loop = asyncio.get_running_loop()
+        handle = WipeHandle(normalize_job(job), loop, self.interval)
+        handle._future = loop.run_in_executor(self._executor, handle._run, self.wiper)
+        handle._future.add_done_callback(handle._finish)
+        self.handles.append(handle)
+        return handle
+
+    async def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait up to ``timeout`` seconds for every job; True once all have finished."""
+        pending = [h._future for h in self.handles if not h._future.done()]
+        if pending:
+            await asyncio.wait(pending, timeout=timeout)
+        return all(h._future.done() for h in self.handles)
+
+    async def cancel_all(self) -> None:
+        """Cancel every unfinished job and wait until each has stopped at a block boundary."""
+        pending = [h for h in self.handles if not h.done]
+        for handle in pending:
+            handle.cancel()
+        await asyncio.gather(*(h._future for h in pending), return_exceptions=True)
+
+    def shutdown(self) -> None:
+        for handle in self.handles:
+            handle.cancel()
+        self._executor.shutdown(wait=True)
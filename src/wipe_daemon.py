@@ -0,0 +1,646 @@
+#!/usr/bin/env python3
+"""
+OBLIVION Wipe Station Daemon (Production)
+
+Non-interactive mode for unattended wipe stations. Job specs are submitted
+as JSON (or YAML when PyYAML is installed) over a local HTTP endpoint, bound
+to 127.0.0.1 or to a Unix socket, queued, and executed through DiskWiper
+with a fixed limit on concurrently wiped devices. Each finished job gets one
+aggregate certificate covering the devices that were wiped successfully.
+
+Access control: the Unix socket is created mode 0600. Over TCP every request
+needs "Authorization: Bearer <token>", the token being read from a 0600 file
+(created on first start). Requests carrying an Origin header, a Host other
+than 127.0.0.1:<port> or localhost:<port>, or a body that is not
+application/json (application/yaml with PyYAML) are refused, so web pages
+cannot reach the daemon through CSRF or DNS rebinding. Targets must be block
+devices or regular files inside an allow-listed image directory.
+
+md-RAID arrays, LVM volumes and other device-mapper devices are expanded to
+their physical member disks, which are deactivated and wiped concurrently;
+each member gets its own record in the certificate. Crypto-erase instead
+targets the LUKS containers themselves (usually partitions under a dm-crypt
+mapping), and its follow-up overwrite covers the devices that were asked for.
+
+SMART/NVMe health counters of every device are read before and after each
+job; the job record carries their deltas, the write amplification and the
+share of the wipe the drive itself counted (see device_health).
+
+Job spec:
+    {
+      "devices": ["/dev/sdb", "/dev/sdc"],
+      "method": "purge",              # clear | purge | crypto-erase (LUKS), or give "passes"
+      "passes": ["random", "zeros"],  # optional explicit pass plan
+      "verify": "sample",             # none | sample
+      "verify_random": "sample",      # none | sample | full read-back of random passes
+      "overwrite": "none",            # crypto-erase only: none | clear | purge follow-up job
+      "confirm": "ERASE"              # required, as in the interactive TUI
+    }
+
+Endpoints:
+    POST /jobs               submit a job spec -> {"id": ...}
+    GET  /jobs               list jobs
+    GET  /jobs/<id>          job status with per-device progress
+    POST /jobs/<id>/cancel   cancel a job that has not started yet
+    GET  /health             daemon liveness and queue depth
+
+WARNING: Submitted jobs PERMANENTLY DESTROY DATA on the listed devices.
+"""
+
+from __future__ import annotations
+import os
+import sys
+import json
+import time
+import hmac
+import stat
+import uuid
+import secrets
+import argparse
+import threading
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+try:
+    import yaml
+    YAML_AVAILABLE = True
+except ImportError:
+    YAML_AVAILABLE = False
+
+from disk_wiper import DiskWiper, BARRIER_POLICIES, PASS_NAMES, RANDOM_VERIFY_MODES, ZERO_PASSES
+from io_topology import LinkBudget, parse_io_class, set_io_priority
+from device_stack import deactivate_stacks, resolve_targets
+from crypto_erase import CRYPTO_ERASE_METHOD, crypto_erase, luks_targets
+from device_health import HealthMonitor, health_delta
+from io_trace import IOTrace
+from throughput_trace import ThroughputRecorder
+from image_wiper import IMAGE_POLICIES
+from shm_stats import DEFAULT_SHM_NAME, SharedStatsTable
+from wipe_metrics import MetricsRegistry, start_metrics_server
+
+METHOD_PLANS = {
+    'clear': ['zeros'],
+    'purge': ['random', 'zeros'],
+}
+VERIFY_LEVELS = ('none', 'sample')
+DEFAULT_TOKEN_FILE = '/etc/oblivion/daemon.token'
+YAML_CONTENT_TYPES = ('application/yaml', 'application/x-yaml', 'text/yaml')
+
+
+class JobSpecError(ValueError):
+    pass
+
+
+def parse_job_spec(raw: Dict) -> Dict:
+    """Validate a submitted spec and normalize it to devices/passes/verify."""
+    if not isinstance(raw, dict):
+        raise JobSpecError("Job spec must be an object")
+    if raw.get('confirm') != 'ERASE':
+        raise JobSpecError("Job spec must contain \"confirm\": \"ERASE\"")
+    devices = raw.get('devices')
+    if not devices or not isinstance(devices, list) or not all(isinstance(d, str) for d in devices):
+        raise JobSpecError("'devices' must be a non-empty list of device paths")
+    if len(set(devices)) != len(devices):
+        raise JobSpecError("'devices' contains duplicates")
+    method = raw.get('method', 'clear')
+    if method == 'crypto-erase':
+        # Destroys the LUKS header and keyslots; the overwrite, if wanted, runs as a follow-up job
+        overwrite = raw.get('overwrite', 'none')
+        if overwrite != 'none' and overwrite not in METHOD_PLANS:
+            raise JobSpecError(f"'overwrite' must be none or one of {', '.join(METHOD_PLANS)}")
+        return {'devices': devices, 'method': method, 'passes': [], 'verify': 'none',
+                'verify_random': 'none', 'overwrite': overwrite}
+    passes = raw.get('passes') or METHOD_PLANS.get(method)
+    if not passes:
+        raise JobSpecError(f"Unknown method: {method}")
+    if not isinstance(passes, list) or any(p not in PASS_NAMES for p in passes):
+        raise JobSpecError(f"'passes' must use only {', '.join(PASS_NAMES)}")
+    verify = raw.get('verify', 'sample' if method == 'purge' else 'none')
+    if verify not in VERIFY_LEVELS:
+        raise JobSpecError(f"'verify' must be one of {', '.join(VERIFY_LEVELS)}")
+    if verify != 'none' and passes[-1] not in ZERO_PASSES:
+        raise JobSpecError("Verification requires the final pass to be 'zeros' or 'zeroout'")
+    verify_random = raw.get('verify_random', 'sample' if 'random' in passes else 'none')
+    if verify_random not in RANDOM_VERIFY_MODES:
+        raise JobSpecError(f"'verify_random' must be one of {', '.join(RANDOM_VERIFY_MODES)}")
+    if verify_random != 'none' and 'random' not in passes:
+        raise JobSpecError("'verify_random' requires a 'random' pass")
+    return {'devices': devices, 'method': method, 'passes': passes, 'verify': verify,
+            'verify_random': verify_random}
+
+
+class WipeJob:
+    def __init__(self, spec: Dict):
+        self.id = str(uuid.uuid4())
+        self.spec = spec
+        self.state = 'queued'  # queued | running | done | failed | cancelled
+        self.submitted = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.certificate: Optional[str] = None
+        self.error: Optional[str] = None
+        self.follow_up: Optional[str] = None
+        self.devices: Dict[str, Dict] = {
+            d: {'state': 'queued', 'written': 0, 'total': 0, 'error': None, 'started': None, 'finished': None,
+                'latency': None, 'trace': None, 'coverage': None, 'bad_sectors': '',
+                'barrier_seconds': None, 'throughput_trace': None, 'crypto_erase': None,
+                'bytes_written': 0, 'health': None, 'numa_node': None}
+            for d in spec['devices']
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            'id': self.id,
+            'state': self.state,
+            'spec': self.spec,
+            'submitted': self.submitted,
+            'started': self.started,
+            'finished': self.finished,
+            'certificate': self.certificate,
+            'error': self.error,
+            'follow_up': self.follow_up,
+            'devices': {d: dict(st) for d, st in self.devices.items()},
+        }
+
+
+class WipeDaemon:
+    def __init__(self, max_concurrent: int = 2, wiper: Optional[DiskWiper] = None, certify: bool = True,
+                 link_budget: Optional[float] = None, io_class: Optional[str] = 'be:7',
+                 trace_events: int = 0, trace_dir: Optional[str] = None, record_throughput: bool = False,
+                 health: Optional[HealthMonitor] = None, image_dirs: Optional[List[str]] = None):
+        self.wiper = wiper or DiskWiper(tolerate_errors=True)
+        self.certify = certify
+        # Per-device I/O event ring (0 = latency histograms only), dumped to trace_dir after each device
+        self.trace_events = trace_events
+        self.trace_dir = trace_dir
+        # Save a replayable throughput trace (.obtt) per device into trace_dir
+        self.record_throughput = record_throughput and bool(trace_dir)
+        # Per-link bandwidth budget (bytes/s) shared by all wipes on the same HBA/hub
+        self.link_budget = LinkBudget(link_budget) if link_budget else None
+        self.io_class = parse_io_class(io_class) if io_class else None
+        # SMART/NVMe counters snapshotted around each job (None = not collected)
+        self.health_monitor = health
+        # Regular files (VM images) are only accepted inside these directories
+        self.image_dirs = [os.path.realpath(d) for d in image_dirs or []]
+        self.metrics = MetricsRegistry()
+        self.metrics.queue_depth = lambda: len(self._queue)
+        self.max_concurrent = max(1, max_concurrent)
+        self._slots = threading.BoundedSemaphore(self.max_concurrent)
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._queue: List[WipeJob] = []
+        self._jobs: Dict[str, WipeJob] = {}
+        self._busy_devices: set = set()
+        self._stopping = False
+        self._dispatcher = threading.Thread(target=self._dispatch, name='wipe-dispatch', daemon=True)
+
+    # ---------------------- Control ----------------------
+    def start(self) -> None:
+        self._dispatcher.start()
+
+    def stop(self) -> None:
+        with self._wake:
+            self._stopping = True
+            self._wake.notify_all()
+
+    def submit(self, raw_spec: Dict) -> WipeJob:
+        spec = parse_job_spec(raw_spec)
+        for device in spec['devices']:
+            self._check_target(device)
+        if spec['method'] == 'crypto-erase':
+            # The LUKS header sits on the container under the crypt mapping, not on the whole disk
+            luks = luks_targets(spec['devices'])
+            spec.update(requested=spec['devices'], devices=luks['targets'], stacks=luks['stacks'],
+                        member_of=luks['member_of'], overwrite_devices=luks['overwrite'])
+        else:
+            # Stacked devices are wiped through their members; refuse partial or mounted stacks up front
+            stack = resolve_targets(spec['devices'])
+            spec.update(requested=spec['devices'], devices=stack['members'], stacks=stack['stacks'],
+                        member_of=stack['member_of'])
+        job = WipeJob(spec)
+        with self._wake:
+            self._jobs[job.id] = job
+            self._queue.append(job)
+            self._wake.notify_all()
+        return job
+
+    def _check_target(self, device: str) -> None:
+        try:
+            mode = os.stat(device).st_mode
+        except OSError as e:
+            raise JobSpecError(f"Cannot access {device}: {e.strerror}")
+        if stat.S_ISBLK(mode):
+            return
+        real = os.path.realpath(device)
+        if stat.S_ISREG(mode) and any(os.path.commonpath([real, d]) == d for d in self.image_dirs):
+            return
+        raise JobSpecError(f"{device} is not a block device or an image in an allowed image directory")
+
+    def cancel(self, job_id: str) -> bool:
+        with self._wake:
+            job = self._jobs.get(job_id)
+            if job is None or job.state != 'queued':
+                return False
+            self._queue.remove(job)
+            job.state = 'cancelled'
+            job.finished = time.time()
+            return True
+
+    def status(self, job_id: Optional[str] = None):
+        with self._lock:
+            if job_id is not None:
+                job = self._jobs.get(job_id)
+                return job.to_dict() if job else None
+            return [j.to_dict() for j in self._jobs.values()]
+
+    def health(self) -> Dict:
+        with self._lock:
+            running = sum(1 for j in self._jobs.values() if j.state == 'running')
+            return {'ok': True, 'queued': len(self._queue), 'running': running,
+                    'max_concurrent': self.max_concurrent}
+
+    # ---------------------- Scheduling ----------------------
+    def _dispatch(self) -> None:
+        while True:
+            with self._wake:
+                job = None
+                while job is None:
+                    if self._stopping:
+                        return
+                    # First queued job whose devices are all idle; others keep their place
+                    job = next((j for j in self._queue if not self._busy_devices & set(j.spec['devices'])), None)
+                    if job is None:
+                        self._wake.wait()
+                self._queue.remove(job)
+                self._busy_devices.update(job.spec['devices'])
+                job.state = 'running'
+                job.started = time.time()
+            threading.Thread(target=self._run_job, args=(job,), name=f'job-{job.id[:8]}', daemon=True).start()
+
+    def _run_job(self, job: WipeJob) -> None:
+        try:
+            deactivate_stacks({'stacks': job.spec['stacks'], 'members': job.spec['devices']})
+        except Exception as e:
+            job.error = f"Could not deactivate stacked devices: {e}"
+            for st in job.devices.values():
+                st['state'] = 'failed'
+                st['error'] = job.error
+        if job.error is None:
+            before = self._health_snapshots(job, fresh=False)
+            threads = [threading.Thread(target=self._run_device, args=(job, d), daemon=True)
+                       for d in job.spec['devices']]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            self._attach_health(job, before)
+        failed = [d for d, st in job.devices.items() if st['state'] != 'done']
+        wiped = [d for d in job.spec['devices'] if job.devices[d]['state'] == 'done']
+        # Failed devices are never certified; the job still ends up 'failed'
+        if self.certify and job.error is None and wiped:
+            try:
+                job.certificate = self._issue_certificate(job)
+            except Exception as e:
+                job.error = f"Certificate generation failed: {e}"
+        with self._wake:
+            job.state = 'failed' if failed or job.error else 'done'
+            job.finished = time.time()
+            self._busy_devices.difference_update(job.spec['devices'])
+            self._wake.notify_all()
+        if wiped and job.spec.get('overwrite', 'none') != 'none':
+            # Crypto-erase is certified already; the full overwrite queues behind it as its own job
+            overwrite = job.spec.get('overwrite_devices', {})
+            devices = list(dict.fromkeys(overwrite.get(d, d) for d in wiped))
+            try:
+                follow = self.submit({'devices': devices, 'method': job.spec['overwrite'], 'confirm': 'ERASE'})
+                job.follow_up = follow.id
+            except Exception as e:
+                job.error = f"Could not queue the follow-up overwrite: {e}"
+                job.state = 'failed'
+
+    def _health_snapshots(self, job: WipeJob, fresh: bool) -> Dict[str, Dict]:
+        if self.health_monitor is None:
+            return {}
+        try:
+            return self.health_monitor.snapshot_all(job.spec['devices'], fresh=fresh)
+        except Exception as e:
+            print(f"Warning: could not read health counters for job {job.id}: {e}")
+            return {}
+
+    def _attach_health(self, job: WipeJob, before: Dict[str, Dict]) -> None:
+        after = self._health_snapshots(job, fresh=True) if before else {}
+        for device, st in job.devices.items():
+            if device in before and device in after:
+                seconds = (st['finished'] or time.time()) - (st['started'] or time.time())
+                st['health'] = health_delta(before[device], after[device], st['bytes_written'], seconds)
+
+    def _run_device(self, job: WipeJob, device: str) -> None:
+        status = job.devices[device]
+        with self._slots:
+            status['state'] = 'running'
+            status['started'] = time.time()
+            if self.io_class:
+                # Keep the HTTP front end and certificate stage responsive
+                set_io_priority(*self.io_class)
+            throttle = self.link_budget.bucket_for(device) if self.link_budget else None
+
+            def progress(written: int, total: int) -> None:
+                status['written'] = written
+                status['total'] = total
+
+            trace = IOTrace(ring_size=self.trace_events)
+            recorder = ThroughputRecorder(meta={'device': device, 'job': job.id, 'passes': job.spec['passes']}) \
+                if self.record_throughput else None
+            if recorder:
+                progress = recorder.wrap(progress)
+            stats = self.metrics.device(device)
+            try:
+                if job.spec['method'] == 'crypto-erase':
+                    report = crypto_erase(device)
+                    status['crypto_erase'] = {'luks': report['luks_version'], 'keyslots': report['keyslots'],
+                                              'erased_bytes': report['erased_bytes']}
+                    progress(report['erased_bytes'], report['erased_bytes'])
+                    status['bytes_written'] = report['erased_bytes']
+                else:
+                    report = self.wiper.wipe_plan(device, job.spec['passes'],
+                                                  verify=job.spec['verify'] != 'none', progress=progress,
+                                                  throttle=throttle, stats=stats,
+                                                  trace=trace, verify_random=job.spec['verify_random'])
+                status['coverage'] = report['coverage']
+                status['bad_sectors'] = report['bad_sectors']
+                status['barrier_seconds'] = report['barrier_seconds']
+                status['numa_node'] = report.get('numa_node')
+                status['state'] = 'done'
+            except Exception as e:
+                status['state'] = 'failed'
+                status['error'] = str(e)
+            status['finished'] = time.time()
+            status['bytes_written'] = status['bytes_written'] or stats.bytes_done()
+            status['latency'] = trace.summary()
+            if trace.ring is not None and self.trace_dir:
+                path = os.path.join(self.trace_dir, f"trace_{job.id}_{os.path.basename(device)}.obtr")
+                try:
+                    os.makedirs(self.trace_dir, exist_ok=True)
+                    trace.ring.dump_binary(path)
+                    status['trace'] = path
+                except OSError as e:
+                    print(f"Warning: could not write I/O trace for {device}: {e}")
+            if recorder and status['state'] == 'done':
+                path = os.path.join(self.trace_dir, f"throughput_{job.id}_{os.path.basename(device)}.obtt")
+                try:
+                    os.makedirs(self.trace_dir, exist_ok=True)
+                    recorder.trace().save(path)
+                    status['throughput_trace'] = path
+                except OSError as e:
+                    print(f"Warning: could not write throughput trace for {device}: {e}")
+
+    def _issue_certificate(self, job: WipeJob) -> str:
+        # Imported lazily so the daemon can run without signing dependencies when certify=False
+        from cert_aggregate import build_aggregate
+        from cert_ledger import CertificateLedger
+        from cert_signer import CertificateSigner
+        from hardware_info import get_device_type, get_device_id
+        from oblivion_core import OUTPUT_DIR, LEDGER_PATH, private_key_candidates
+
+        records = []
+        for device, st in job.devices.items():
+            if st['state'] != 'done':
+                continue
+            records.append({
+                'device': device,
+                'passes': job.spec['passes'],
+                'verify': job.spec['verify'],
+                'verifyRandom': job.spec['verify_random'],
+                'bytes': st['total'],
+                'status': st['state'],
+                'error': st['error'],
+                'coverage': st['coverage'],
+                'badSectors': st['bad_sectors'],
+                'stack': job.spec['member_of'].get(device),
+                'cryptoErase': st['crypto_erase'],
+                'started': int(st.get('started') or 0),
+                'finished': int(st.get('finished') or 0),
+            })
+        method = {'purge': 'NIST SP 800-88 Purge', 'crypto-erase': CRYPTO_ERASE_METHOD}.get(
+            job.spec['method'], 'NIST SP 800-88 Clear')
+        signer = CertificateSigner.from_candidates(private_key_candidates())
+        aggregate = build_aggregate(records, signer, get_device_type(), get_device_id(), method, job_id=job.id)
+        aggregate.save(OUTPUT_DIR)
+        with CertificateLedger(LEDGER_PATH) as ledger:
+            ledger.record(aggregate.payload, aggregate.token, job_id=job.id)
+        return aggregate.token
+
+
+# ---------------------- HTTP front end ----------------------
+class _Handler(BaseHTTPRequestHandler):
+    wipe_daemon: WipeDaemon = None  # set per server
+    auth_token: Optional[str] = None
+    allowed_hosts: frozenset = frozenset()  # empty: Host is not checked (Unix socket)
+
+    def _send(self, code: int, body) -> None:
+        data = json.dumps(body, separators=(',', ':')).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _authorized(self) -> bool:
+        """Refuse browser-originated and unauthenticated requests; sends the error itself."""
+        if self.headers.get('Origin') is not None:
+            self._send(403, {'error': 'cross-origin requests are not accepted'})
+            return False
+        if self.allowed_hosts and self.headers.get('Host', '').lower() not in self.allowed_hosts:
+            self._send(403, {'error': 'unexpected Host header'})
+            return False
+        if self.auth_token is not None:
+            scheme, _, token = self.headers.get('Authorization', '').partition(' ')
+            if scheme.lower() != 'bearer' or not hmac.compare_digest(token.strip().encode(), self.auth_token.encode()):
+                self._send(401, {'error': 'missing or invalid bearer token'})
+                return False
+        return True
+
+    def _read_spec(self) -> Dict:
+        content_type = (self.headers.get('Content-Type') or '').split(';')[0].strip().lower()
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length).decode('utf-8')
+        if content_type == 'application/json':
+            try:
+                return json.loads(body)
+            except json.JSONDecodeError:
+                raise JobSpecError("Job spec is not valid JSON")
+        if content_type in YAML_CONTENT_TYPES and YAML_AVAILABLE:
+            return yaml.safe_load(body)
+        raise JobSpecError("Job specs must be sent as application/json")
+
+    def do_GET(self) -> None:
+        if not self._authorized():
+            return
+        parts = [p for p in self.path.split('?')[0].split('/') if p]
+        if parts == ['health']:
+            self._send(200, self.wipe_daemon.health())
+        elif parts == ['jobs']:
+            self._send(200, self.wipe_daemon.status())
+        elif len(parts) == 2 and parts[0] == 'jobs':
+            job = self.wipe_daemon.status(parts[1])
+            self._send(200 if job else 404, job or {'error': 'job not found'})
+        else:
+            self._send(404, {'error': 'not found'})
+
+    def do_POST(self) -> None:
+        if not self._authorized():
+            return
+        parts = [p for p in self.path.split('?')[0].split('/') if p]
+        if parts == ['jobs']:
+            try:
+                job = self.wipe_daemon.submit(self._read_spec())
+            except Exception as e:
+                self._send(400, {'error': str(e)})
+                return
+            self._send(202, {'id': job.id, 'state': job.state})
+        elif len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'cancel':
+            ok = self.wipe_daemon.cancel(parts[1])
+            self._send(200 if ok else 409, {'cancelled': ok})
+        else:
+            self._send(404, {'error': 'not found'})
+
+    def address_string(self) -> str:
+        # Unix socket peers have no (host, port) address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self) -> None:
+        socketserver.UnixStreamServer.server_bind(self)
+        self.server_name, self.server_port = 'localhost', 0
+
+
+def load_token(path: str) -> str:
+    """Bearer token from a file only its owner can read; creates one if missing."""
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        if os.stat(path).st_mode & 0o077:
+            raise PermissionError(f"{path} is accessible by other users; chmod 600 it")
+        with open(path) as f:
+            token = f.read().strip()
+        if not token:
+            raise ValueError(f"{path} is empty")
+        return token
+    token = secrets.token_urlsafe(32)
+    with os.fdopen(fd, 'w') as f:
+        f.write(token + '\n')
+    return token
+
+
+def make_server(daemon: WipeDaemon, host: str = '127.0.0.1', port: int = 8787,
+                unix_socket: Optional[str] = None, token: Optional[str] = None):
+    """HTTP server for the daemon; TCP listeners require ``token``."""
+    attrs = {'wipe_daemon': daemon, 'auth_token': token}
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+        old_umask = os.umask(0o177)  # no window in which the socket is reachable by others
+        try:
+            server = _UnixHTTPServer(unix_socket, type('WipeDaemonHandler', (_Handler,), attrs))
+        finally:
+            os.umask(old_umask)
+        os.chmod(unix_socket, 0o600)
+        return server
+    if token is None:
+        raise ValueError("A bearer token is required when listening on TCP")
+    server = ThreadingHTTPServer((host, port), type('WipeDaemonHandler', (_Handler,), attrs))
+    port = server.server_address[1]
+    hosts = {f'127.0.0.1:{port}', f'localhost:{port}'}
+    if host not in ('', '0.0.0.0', '::'):
+        hosts.add(f'{host}:{port}'.lower())
+    server.RequestHandlerClass.allowed_hosts = frozenset(hosts)
+    return server
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="OBLIVION headless wipe station daemon")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8787)
+    parser.add_argument('--unix-socket', help="Listen on a Unix socket (mode 0600) instead of TCP")
+    parser.add_argument('--token-file', default=DEFAULT_TOKEN_FILE,
+                        help=f"0600 file holding the bearer token required over TCP, created if missing "
+                             f"(default: {DEFAULT_TOKEN_FILE})")
+    parser.add_argument('--image-dir', action='append', default=[],
+                        help="Directory whose regular files (VM images) may be wiped; repeatable")
+    parser.add_argument('--max-concurrent', type=int, default=2, help="Devices wiped at the same time")
+    parser.add_argument('--no-certificates', action='store_true', help="Skip aggregate certificates")
+    parser.add_argument('--link-budget', type=float, default=None,
+                        help="MB/s shared by all wipes on one HBA or USB hub (default: unlimited)")
+    parser.add_argument('--io-class', default='be:7',
+                        help="I/O priority for wipe workers: idle, be[:0-7] or rt[:0-7] (default: be:7)")
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help="Serve Prometheus metrics on 127.0.0.1:PORT/metrics")
+    parser.add_argument('--trace-events', type=int, default=0,
+                        help="Keep the last N I/O events per device and dump them after the wipe")
+    parser.add_argument('--trace-dir', default='traces', help="Directory for I/O trace dumps")
+    parser.add_argument('--record-throughput', action='store_true',
+                        help="Save a replayable throughput trace per device into --trace-dir")
+    parser.add_argument('--barrier', choices=BARRIER_POLICIES, default='end',
+                        help="When to flush writes to stable media (default: end)")
+    parser.add_argument('--barrier-interval', type=float, default=4,
+                        help="GiB written between flushes with --barrier interval")
+    parser.add_argument('--stats-shm', nargs='?', const=DEFAULT_SHM_NAME, default=None,
+                        help=f"Publish live stats to a shared memory segment for the dashboard "
+                             f"(default name: {DEFAULT_SHM_NAME})")
+    parser.add_argument('--image-policy', choices=IMAGE_POLICIES, default='zero-range',
+                        help="How regular-file targets (VM images) are cleared (default: zero-range)")
+    parser.add_argument('--no-neutralize', action='store_true',
+                        help="Skip overwriting partition tables and superblocks before the passes")
+    parser.add_argument('--numa', action='store_true',
+                        help="Pin each device's wipe threads and buffers to the NUMA node of its adapter")
+    parser.add_argument('--smartctl', default='smartctl',
+                        help="smartctl executable used for health counters (default: from PATH)")
+    parser.add_argument('--no-health', action='store_true',
+                        help="Do not snapshot SMART/NVMe health counters around jobs")
+    args = parser.parse_args(argv)
+
+    wiper = DiskWiper(tolerate_errors=True, barrier=args.barrier,
+                      barrier_interval=int(args.barrier_interval * 1024 ** 3), image_policy=args.image_policy,
+                      neutralize=not args.no_neutralize, numa=args.numa)
+    daemon = WipeDaemon(max_concurrent=args.max_concurrent, wiper=wiper, certify=not args.no_certificates,
+                        link_budget=args.link_budget * 1024 * 1024 if args.link_budget else None,
+                        io_class=args.io_class, trace_events=args.trace_events, trace_dir=args.trace_dir,
+                        record_throughput=args.record_throughput,
+                        health=None if args.no_health else HealthMonitor(smartctl=args.smartctl),
+                        image_dirs=args.image_dir)
+    token = None
+    if not args.unix_socket:
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(args.token_file)), mode=0o700, exist_ok=True)
+            token = load_token(args.token_file)
+        except (OSError, ValueError) as e:
+            print(f"Cannot use token file {args.token_file}: {e}")
+            return 1
+    table = SharedStatsTable(args.stats_shm) if args.stats_shm else None
+    daemon.metrics.table = table
+    daemon.start()
+    if args.metrics_port:
+        start_metrics_server(daemon.metrics, port=args.metrics_port)
+    server = make_server(daemon, args.host, args.port, args.unix_socket, token=token)
+    where = args.unix_socket or f"http://{args.host}:{args.port}"
+    print(f"OBLIVION daemon listening on {where} (max {daemon.max_concurrent} concurrent wipes)")
+    if token is not None:
+        print(f"Clients must send the bearer token from {args.token_file}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        daemon.stop()
+        if table is not None:
+            table.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+OBLIVION Wipe Dashboard (Production)
+
+Curses view of every wipe published to the shared-memory stats table
+(see shm_stats): device, pass, progress, throughput sparkline, ETA and
+error count. The screen is redrawn at a fixed rate from a snapshot of the
+table, so the cost of drawing does not depend on how fast the wipes write,
+and the writers are never waited on.
+
+Usage:
+    python wipe_dashboard.py [--shm oblivion-stats] [--interval 0.5]
+    python start_oblivion.py dashboard [...]
+"""
+
+from __future__ import annotations
+import sys
+import time
+import argparse
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+try:
+    import curses
+    CURSES_AVAILABLE = True
+except ImportError:
+    CURSES_AVAILABLE = False
+
+from shm_stats import DEFAULT_SHM_NAME, SharedStatsReader
+
+SPARK_CHARS = '▁▂▃▄▅▆▇█'
+HISTORY = 40
+
+
+def sparkline(values: List[float]) -> str:
+    if not values:
+        return ''
+    top = max(values) or 1.0
+    return ''.join(SPARK_CHARS[min(len(SPARK_CHARS) - 1, int(v / top * (len(SPARK_CHARS) - 1)))] for v in values)
+
+
+def human_bytes(n: float) -> str:
+    for unit in ('B', 'KiB', 'MiB', 'GiB', 'TiB'):
+        if abs(n) < 1024 or unit == 'TiB':
+            return f"{n:.1f} {unit}" if unit != 'B' else f"{int(n)} B"
+        n /= 1024
+    return f"{n:.1f} TiB"
+
+
+def human_seconds(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return '--'
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}"
+
+
+class DashboardModel:
+    """Turns successive table snapshots into rows with rates, history and ETA."""
+
+    def __init__(self):
+        self._last: Dict[int, tuple] = {}
+        self._history: Dict[int, Deque[float]] = {}
+
+    def update(self, snapshot: List[Dict], now: float) -> List[Dict]:
+        rows = []
+        for st in snapshot:
+            slot = st['slot']
+            prev = self._last.get(slot)
+            if prev is None or prev[2] != st['started']:
+                self._history[slot] = deque(maxlen=HISTORY)
+                rate = 0.0
+            else:
+                elapsed = now - prev[0]
+                rate = max(0.0, (st['bytes_done'] - prev[1]) / elapsed) if elapsed > 0 else 0.0
+            self._last[slot] = (now, st['bytes_done'], st['started'])
+            history = self._history[slot]
+            if st['state'] == 'running':
+                history.append(rate)
+            total = st['pass_total'] * max(st['passes_total'], 1)
+            end = st['finished'] or st['updated']
+            average = st['bytes_done'] / (end - st['started']) if end > st['started'] else 0.0
+            eta = (total - st['bytes_done']) / average if st['state'] == 'running' and average > 0 else None
+            rows.append(dict(st, rate=rate if st['state'] == 'running' else 0.0, history=list(history),
+                             percent=st['bytes_done'] / total * 100 if total else 0.0, eta=eta))
+        return rows
+
+
+def _draw(screen, rows: List[Dict], name: str, interval: float) -> None:
+    screen.erase()
+    height, width = screen.getmaxyx()
+    running = sum(1 for r in rows if r['state'] == 'running')
+    title = f" OBLIVION wipes - {running} running, {len(rows)} shown - segment {name} - q to quit "
+    screen.addnstr(0, 0, title.ljust(width), width - 1, curses.A_REVERSE)
+    header = f"{'DEVICE':<18} {'STATE':<8} {'PASS':<14} {'DONE':>6} {'RATE':>11} {'ETA':>9} {'ERR':>5}  HISTORY"
+    screen.addnstr(2, 0, header, width - 1, curses.A_BOLD)
+    for i, r in enumerate(rows):
+        y = 3 + i
+        if y >= height - 1:
+            break
+        pass_text = f"{r['pass_index'] + 1}/{r['passes_total']} {r['pass_name']}" if r['pass_index'] >= 0 else '-'
+        line = (f"{r['device'][-18:]:<18} {r['state']:<8} {pass_text[:14]:<14} {r['percent']:5.1f}% "
+                f"{human_bytes(r['rate']) + '/s':>11} {human_seconds(r['eta']):>9} {r['io_errors']:>5}  ")
+        attr = curses.color_pair(1) if r['io_errors'] else 0
+        screen.addnstr(y, 0, line, width - 1, attr)
+        if len(line) < width - 1:
+            screen.addnstr(y, len(line), sparkline(r['history']), width - 1 - len(line))
+    screen.addnstr(height - 1, 0, f" refresh {interval:.1f}s ", width - 1, curses.A_DIM)
+    screen.refresh()
+
+
+def run_dashboard(reader: SharedStatsReader, name: str = DEFAULT_SHM_NAME, interval: float = 0.5) -> None:
+    model = DashboardModel()
+
+    def loop(screen) -> None:
+        curses.curs_set(0)
+        if curses.has_colors():
+            curses.start_color()
+            curses.init_pair(1, curses.COLOR_RED, curses.COLOR_BLACK)
+        screen.timeout(int(interval * 1000))
+        while True:
+            rows = model.update(reader.snapshot(), time.time())
+            _draw(screen, rows, name, interval)
+            # getch doubles as the fixed-rate sleep
+            key = screen.getch()
+            if key in (ord('q'), ord('Q'), 27):
+                return
+
+    curses.wrapper(loop)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Live dashboard of all running wipes")
+    parser.add_argument('--shm', default=DEFAULT_SHM_NAME, help="Shared memory segment published by the daemon")
+    parser.add_argument('--interval', type=float, default=0.5, help="Seconds between redraws")
+    args = parser.parse_args(argv)
+    if not CURSES_AVAILABLE:
+        print("The dashboard needs the curses module (on Windows: pip install windows-curses)")
+        return 1
+    try:
+        reader = SharedStatsReader(args.shm)
+    except FileNotFoundError:
+        print(f"No stats segment named {args.shm}; start the daemon with --stats-shm")
+        return 1
+    try:
+        run_dashboard(reader, args.shm, max(0.1, args.interval))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
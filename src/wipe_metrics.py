@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+OBLIVION Wipe Metrics (Production)
+
+Prometheus text-format metrics for running wipes, served by an optional
+standard-library HTTP endpoint.
+
+Each device has a DeviceStats record owned by its wipe thread. The hot loop
+only performs plain attribute stores (single writer, no locks); the scrape
+handler reads those values and derives throughput and ETA on its own side,
+so a slow or frequent scraper never stalls a writer.
+"""
+
+from __future__ import annotations
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class DeviceStats:
+    """Per-device counters written by exactly one wipe thread."""
+
+    __slots__ = ('device', 'pass_index', 'pass_name', 'passes_total', 'pass_bytes', 'pass_total',
+                 'completed_passes', 'bytes_verified', 'io_errors', 'started', 'pass_started',
+                 'cpu_seconds', '_cpu_start', 'barrier_seconds', 'finished')
+
+    def __init__(self, device: str):
+        self.device = device
+        self.pass_index = -1
+        self.pass_name = ''
+        self.passes_total = 0
+        self.pass_bytes = 0
+        self.pass_total = 0
+        self.completed_passes: List[Tuple[int, str, int]] = []
+        self.bytes_verified = 0
+        self.io_errors = 0
+        self.started = time.monotonic()
+        self.pass_started = self.started
+        self.cpu_seconds = 0.0
+        self._cpu_start: Optional[float] = None
+        self.barrier_seconds = 0.0
+        self.finished: Optional[float] = None
+
+    # ---------------------- Writer side ----------------------
+    def begin_pass(self, index: int, name: str, total: int, passes_total: int) -> None:
+        if self.pass_index >= 0:
+            self.completed_passes.append((self.pass_index, self.pass_name, self.pass_bytes))
+        if self._cpu_start is None:
+            self._cpu_start = time.thread_time()
+        self.pass_index = index
+        self.pass_name = name
+        self.passes_total = passes_total
+        self.pass_total = total
+        self.pass_bytes = 0
+        self.pass_started = time.monotonic()
+
+    def set_written(self, written: int) -> None:
+        self.pass_bytes = written
+        self.cpu_seconds = time.thread_time() - (self._cpu_start or 0.0)
+
+    def add_verified(self, nbytes: int) -> None:
+        self.bytes_verified += nbytes
+
+    def add_error(self, count: int = 1) -> None:
+        self.io_errors += count
+
+    def finish(self) -> None:
+        if self.pass_index >= 0:
+            self.completed_passes.append((self.pass_index, self.pass_name, self.pass_bytes))
+            self.pass_index = -1
+        self.finished = time.monotonic()
+
+    # ---------------------- Reader side ----------------------
+    def bytes_done(self) -> int:
+        done = sum(b for _, _, b in list(self.completed_passes))
+        return done + (self.pass_bytes if self.pass_index >= 0 else 0)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._devices: Dict[str, DeviceStats] = {}
+        self._lock = threading.Lock()  # guards registration and reader samples only
+        self._samples: Dict[str, Tuple[float, int]] = {}
+        self.queue_depth: Optional[Callable[[], int]] = None
+        self.table = None  # shm_stats.SharedStatsTable mirroring the records for the dashboard
+
+    def device(self, device: str) -> DeviceStats:
+        """Fresh stats record for a device that is about to be wiped."""
+        stats = self.table.device_stats(device) if self.table is not None else DeviceStats(device)
+        with self._lock:
+            self._devices[device] = stats
+            self._samples.pop(device, None)
+        return stats
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            devices = list(self._devices.values())
+        now = time.monotonic()
+        lines: List[str] = []
+
+        def family(name: str, kind: str, help_text: str, rows: List[Tuple[Dict, object]]) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in rows:
+                label_text = ','.join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+                text = str(value) if isinstance(value, int) else repr(float(value))
+                lines.append(f"{name}{{{label_text}}} {text}" if label_text else f"{name} {text}")
+
+        written, verified, errors, cpu, barrier, current, average, eta, pass_gauge = ([] for _ in range(9))
+        for st in devices:
+            dev = {'device': st.device}
+            for index, name, nbytes in list(st.completed_passes):
+                written.append(({'device': st.device, 'pass': index, 'pass_name': name}, nbytes))
+            if st.pass_index >= 0:
+                written.append(({'device': st.device, 'pass': st.pass_index, 'pass_name': st.pass_name},
+                                st.pass_bytes))
+            verified.append((dev, st.bytes_verified))
+            errors.append((dev, st.io_errors))
+            cpu.append((dev, st.cpu_seconds))
+            barrier.append((dev, st.barrier_seconds))
+            pass_gauge.append((dev, st.pass_index))
+            done = st.bytes_done()
+            elapsed = (st.finished or now) - st.started
+            avg = done / elapsed if elapsed > 0 else 0.0
+            average.append((dev, avg))
+            with self._lock:
+                prev = self._samples.get(st.device)
+                self._samples[st.device] = (now, done)
+            if st.finished is not None:
+                rate = 0.0
+            elif prev and now > prev[0]:
+                rate = (done - prev[1]) / (now - prev[0])
+            else:
+                rate = avg
+            current.append((dev, rate))
+            if st.pass_index >= 0 and avg > 0:
+                remaining = (st.pass_total - st.pass_bytes) + \
+                    (st.passes_total - st.pass_index - 1) * st.pass_total
+                eta.append((dev, remaining / avg))
+
+        family('oblivion_wipe_bytes_written_total', 'counter', 'Bytes written per device and pass', written)
+        family('oblivion_wipe_bytes_verified_total', 'counter', 'Bytes read back and verified', verified)
+        family('oblivion_wipe_io_errors_total', 'counter', 'I/O errors raised during the wipe', errors)
+        family('oblivion_wipe_cpu_seconds_total', 'counter', 'CPU time consumed by the wipe thread', cpu)
+        family('oblivion_wipe_barrier_seconds_total', 'counter', 'Time spent in durability barriers', barrier)
+        family('oblivion_wipe_throughput_bytes_per_second', 'gauge', 'Throughput since the previous scrape', current)
+        family('oblivion_wipe_average_throughput_bytes_per_second', 'gauge', 'Average throughput of the wipe',
+               average)
+        family('oblivion_wipe_eta_seconds', 'gauge', 'Estimated seconds until the wipe completes', eta)
+        family('oblivion_wipe_current_pass', 'gauge', 'Index of the running pass (-1 when idle)', pass_gauge)
+        if self.queue_depth is not None:
+            family('oblivion_wipe_queue_depth', 'gauge', 'Jobs waiting to start', [({}, self.queue_depth())])
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# ---------------------- HTTP endpoint ----------------------
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = None  # set per server
+
+    def do_GET(self) -> None:
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        # Scrapes every few seconds would flood the console
+        pass
+
+
+def start_metrics_server(registry: MetricsRegistry, host: str = '127.0.0.1', port: int = 9787) -> ThreadingHTTPServer:
+    """Serve /metrics from a background thread; returns the server for shutdown()."""
+    handler = type('MetricsHandler', (_MetricsHandler,), {'registry': registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+OBLIVION Wipe Planner (Production)
+
+Predicts how long each available wipe method will take on a device and
+recommends the fastest one that meets the requested NIST SP 800-88 level.
+
+Inputs to the cost model:
+- device traits from sysfs: rotational, discard and write-zeroes support,
+  logical sector size, capacity;
+- a short sequential probe: non-destructive reads at the start, middle and
+  end of the device (outer and inner zones of a disk differ), optionally
+  writes once the operator has confirmed the wipe;
+- the speed of the random pass generator (the wiper's AES-CTR keystream,
+  os.urandom without 'cryptography'), which feeds the random pass serially,
+  and the read-back of random passes when they are verified;
+- a history of predicted versus actual durations, whose median ratio per
+  method and media type calibrates later predictions.
+"""
+
+from __future__ import annotations
+import os
+import sys
+import json
+import mmap
+import time
+import argparse
+import statistics
+from typing import Dict, List, Optional
+
+from disk_wiper import (CRYPTO_AVAILABLE, DEFAULT_BLOCK_SIZE, RANDOM_VERIFY_MODES, RANDOM_VERIFY_SAMPLE_SIZE,
+                        RANDOM_VERIFY_SAMPLES, DiskWiper, KeyedRandomStream)
+
+# Methods the wipe engine can run, with the NIST level each satisfies
+METHODS: Dict[str, Dict] = {
+    'clear': {'level': 'clear', 'passes': ['zeros'], 'verify': False,
+              'label': 'NIST Clear (overwrite zeros)'},
+    'clear-zeroout': {'level': 'clear', 'passes': ['zeroout'], 'verify': False,
+                      'label': 'NIST Clear (device write-zeroes)', 'requires': 'write_zeroes'},
+    'purge': {'level': 'purge', 'passes': ['random', 'zeros'], 'verify': True,
+              'label': 'NIST Purge (random + zeros + verify)'},
+}
+LEVEL_RANK = {'clear': 1, 'purge': 2}
+
+PROBE_BYTES = 64 * 1024 * 1024
+PROBE_CHUNK = 4 * 1024 * 1024
+# Write speed relative to read speed when only a read probe was allowed
+WRITE_READ_RATIO = {True: 0.95, False: 0.7}
+# Offloaded zeroing relative to host writes; an initial guess until calibrated
+ZEROOUT_SPEEDUP = {True: 1.0, False: 2.0}
+HISTORY_WINDOW = 20
+RANDOM_PROBE_BYTES = 32 * 1024 * 1024
+
+_random_bps: Optional[float] = None
+
+
+# ---------------------- Device traits ----------------------
+def _queue_attr(device_path: str, attr: str) -> Optional[str]:
+    # Partitions have no queue directory of their own; use the parent disk's
+    base = os.path.join('/sys/class/block', os.path.basename(os.path.realpath(device_path)))
+    for queue in (os.path.join(base, 'queue'), os.path.join(base, '..', 'queue')):
+        try:
+            with open(os.path.join(queue, attr)) as f:
+                return f.read().strip()
+        except OSError:
+            continue
+    return None
+
+
+def _int_attr(device_path: str, attr: str) -> Optional[int]:
+    value = _queue_attr(device_path, attr)
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def device_traits(device_path: str, wiper: Optional[DiskWiper] = None) -> Dict:
+    wiper = wiper or DiskWiper()
+    rotational = _int_attr(device_path, 'rotational')
+    return {
+        'device': device_path,
+        'size_bytes': wiper._get_device_size(device_path),
+        'rotational': bool(rotational) if rotational is not None else True,
+        'discard': (_int_attr(device_path, 'discard_max_bytes') or 0) > 0,
+        'write_zeroes': (_int_attr(device_path, 'write_zeroes_max_bytes') or 0) > 0,
+        'sector_size': _int_attr(device_path, 'logical_block_size') or 512,
+    }
+
+
+# ---------------------- Probing ----------------------
+def _open_direct(device_path: str, flags: int) -> tuple:
+    """Open bypassing the page cache where supported; returns (fd, direct)."""
+    direct = getattr(os, 'O_DIRECT', 0)
+    if direct:
+        try:
+            return os.open(device_path, flags | direct), True
+        except OSError:
+            pass
+    return os.open(device_path, flags), False
+
+
+def _probe_offsets(size: int, nbytes: int) -> List[int]:
+    align = PROBE_CHUNK
+    last = max(0, (size - nbytes) // align * align)
+    return sorted({0, (last // 2) // align * align, last})
+
+
+def _timed_io(fd: int, buf: mmap.mmap, offsets: List[int], nbytes: int, write: bool) -> float:
+    done = 0
+    start = time.perf_counter()
+    for base in offsets:
+        for off in range(base, base + nbytes, PROBE_CHUNK):
+            if hasattr(os, 'preadv'):
+                n = os.pwritev(fd, [buf], off) if write else os.preadv(fd, [buf], off)
+            else:
+                os.lseek(fd, off, os.SEEK_SET)
+                n = os.write(fd, buf) if write else len(os.read(fd, PROBE_CHUNK))
+            if n <= 0:
+                break
+            done += n
+    if write:
+        os.fsync(fd)
+    elapsed = time.perf_counter() - start
+    return done / elapsed if elapsed > 0 else 0.0
+
+
+def probe_throughput(device_path: str, size: int, nbytes: int = PROBE_BYTES, write: bool = False) -> Dict:
+    """Sequential read (and with ``write=True`` destructive zero-write) throughput in bytes/s."""
+    nbytes = max(PROBE_CHUNK, min(nbytes, size // 3 // PROBE_CHUNK * PROBE_CHUNK))
+    offsets = _probe_offsets(size, nbytes)
+    buf = mmap.mmap(-1, PROBE_CHUNK)  # page aligned, as O_DIRECT requires
+    result: Dict = {'read_bps': None, 'write_bps': None, 'probe_bytes': nbytes * len(offsets)}
+    try:
+        fd, result['direct'] = _open_direct(device_path, os.O_RDONLY)
+        try:
+            result['read_bps'] = _timed_io(fd, buf, offsets, nbytes, write=False)
+        finally:
+            os.close(fd)
+        if write:
+            buf.write(bytes(PROBE_CHUNK))
+            fd, _ = _open_direct(device_path, os.O_RDWR)
+            try:
+                result['write_bps'] = _timed_io(fd, buf, offsets, nbytes, write=True)
+            finally:
+                os.close(fd)
+    finally:
+        buf.close()
+    return result
+
+
+def random_throughput() -> float:
+    """Bytes/s of the generator the wiper uses for random passes, in its block size."""
+    global _random_bps
+    if _random_bps is None:
+        if CRYPTO_AVAILABLE:
+            generate = KeyedRandomStream().block
+        else:
+            generate = lambda offset, length: os.urandom(length)
+        start = time.perf_counter()
+        for offset in range(0, RANDOM_PROBE_BYTES, DEFAULT_BLOCK_SIZE):
+            generate(offset, DEFAULT_BLOCK_SIZE)
+        _random_bps = RANDOM_PROBE_BYTES / max(time.perf_counter() - start, 1e-6)
+    return _random_bps
+
+
+# ---------------------- History ----------------------
+class PlanHistory:
+    """Append-only JSON lines of predicted vs actual wipe durations."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def record(self, traits: Dict, method: str, predicted: float, actual: float) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        entry = {
+            'ts': int(time.time()),
+            'device': traits.get('device'),
+            'rotational': traits.get('rotational'),
+            'size_bytes': traits.get('size_bytes'),
+            'method': method,
+            'predicted': round(predicted, 3),
+            'actual': round(actual, 3),
+        }
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+
+    def factor(self, method: str, rotational: bool) -> Optional[float]:
+        """Median actual/predicted ratio over recent matching wipes, or None."""
+        if not os.path.exists(self.path):
+            return None
+        ratios: List[float] = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get('method') == method and entry.get('rotational') == rotational \
+                        and entry.get('predicted', 0) > 0:
+                    ratios.append(entry['actual'] / entry['predicted'])
+        return statistics.median(ratios[-HISTORY_WINDOW:]) if ratios else None
+
+
+# ---------------------- Cost model ----------------------
+def estimate_seconds(method: str, traits: Dict, probe: Dict, verify_random: str = 'none') -> float:
+    size = traits['size_bytes']
+    rotational = traits['rotational']
+    write_bps = probe.get('write_bps') or (probe.get('read_bps') or 0) * WRITE_READ_RATIO[rotational]
+    if write_bps <= 0:
+        raise ValueError("Probe produced no throughput measurement")
+    read_bps = probe.get('read_bps') or write_bps
+    seconds = 0.0
+    for name in METHODS[method]['passes']:
+        if name == 'random':
+            # Each block is generated and then written, so the two costs add up
+            seconds += size / write_bps + size / random_throughput()
+            if verify_random != 'none':
+                # Read back and compared with the regenerated keystream
+                checked = size if verify_random == 'full' else \
+                    min(size, RANDOM_VERIFY_SAMPLES * RANDOM_VERIFY_SAMPLE_SIZE)
+                seconds += checked / read_bps + checked / random_throughput()
+        elif name == 'zeroout' and traits['write_zeroes']:
+            seconds += size / (write_bps * ZEROOUT_SPEEDUP[rotational])
+        else:
+            seconds += size / write_bps
+    return seconds
+
+
+def plan(device_path: str, level: str = 'clear', probe_write: bool = False,
+         history: Optional[PlanHistory] = None, wiper: Optional[DiskWiper] = None,
+         verify_random: str = 'none') -> Dict:
+    """Predict every available method and recommend the fastest one meeting ``level``.
+
+    ``verify_random`` is the read-back mode the wipe will use for random passes.
+    """
+    if level not in LEVEL_RANK:
+        raise ValueError(f"Unknown NIST level: {level}")
+    if verify_random not in RANDOM_VERIFY_MODES:
+        raise ValueError(f"Unknown random verification mode: {verify_random}")
+    traits = device_traits(device_path, wiper)
+    probe = probe_throughput(device_path, traits['size_bytes'], write=probe_write)
+    estimates = []
+    for name, spec in METHODS.items():
+        if spec.get('requires') and not traits.get(spec['requires']):
+            continue
+        seconds = estimate_seconds(name, traits, probe, verify_random)
+        factor = history.factor(name, traits['rotational']) if history else None
+        estimates.append({
+            'method': name,
+            'label': spec['label'],
+            'level': spec['level'],
+            'passes': spec['passes'],
+            'verify': spec['verify'],
+            'seconds': seconds * (factor or 1.0),
+            'model_seconds': seconds,  # uncalibrated, what the history compares against
+            'basis': 'calibrated' if factor else 'probe',
+        })
+    compliant = [e for e in estimates if LEVEL_RANK[e['level']] >= LEVEL_RANK[level]]
+    recommended = min(compliant, key=lambda e: e['seconds'])['method'] if compliant else None
+    return {'device': device_path, 'level': level, 'traits': traits, 'probe': probe,
+            'verify_random': verify_random, 'estimates': estimates, 'recommended': recommended}
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    if minutes:
+        return f"{minutes}m {secs:02d}s"
+    return f"{secs}s"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Estimate wipe durations and recommend a method")
+    parser.add_argument('device', help="Block device (or image file) to plan for")
+    parser.add_argument('--level', choices=sorted(LEVEL_RANK), default='clear', help="Required NIST level")
+    parser.add_argument('--write-probe', action='store_true',
+                        help="Also probe write speed (DESTROYS data in the probed regions)")
+    parser.add_argument('--history', help="Predicted/actual history file used for calibration")
+    parser.add_argument('--verify-random', choices=RANDOM_VERIFY_MODES, default='none',
+                        help="Read-back of random passes the wipe will do (default: none)")
+    parser.add_argument('--json', action='store_true', help="Print the full plan as JSON")
+    args = parser.parse_args(argv)
+
+    result = plan(args.device, args.level, probe_write=args.write_probe,
+                  history=PlanHistory(args.history) if args.history else None, verify_random=args.verify_random)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0
+    traits = result['traits']
+    print(f"{args.device}: {traits['size_bytes'] / (1024**3):.1f} GiB, "
+          f"{'rotational' if traits['rotational'] else 'solid state'}, "
+          f"discard={'yes' if traits['discard'] else 'no'}, write-zeroes={'yes' if traits['write_zeroes'] else 'no'}")
+    for e in result['estimates']:
+        mark = '  <- recommended' if e['method'] == result['recommended'] else ''
+        print(f"  {e['label']:40s} ~{format_duration(e['seconds']):>9s} ({e['basis']}){mark}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())